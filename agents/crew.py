@@ -17,6 +17,7 @@ from agents.research_agent import create_research_agent
 from agents.schemas import StrategicBrief
 from agents.synthesis_agent import create_synthesis_agent
 from agents.tasks import create_research_task, create_synthesis_task, create_critic_task
+from agents.tools.retrieval_tool import RetrievalTool
 from config import settings
 
 try:
@@ -224,6 +225,13 @@ def _make_task_callback(on_progress: Callable[[dict], None]):
     return _cb
 
 
+def _scope_retrieval(agent, company: str) -> None:
+    """Restrict the agent's document retrieval to chunks ingested for company."""
+    for tool in getattr(agent, "tools", None) or []:
+        if isinstance(tool, RetrievalTool):
+            tool.company = company
+
+
 class StratAgentCrew:
     def __init__(self):
         self.research_agent = create_research_agent()
@@ -238,6 +246,7 @@ class StratAgentCrew:
     ) -> StrategicBrief:
         logger.info("Starting StratAgent analysis for %s", company)
 
+        _scope_retrieval(self.research_agent, company)
         research_task = create_research_task(self.research_agent, company, question)
         critic_task = create_critic_task(self.critic_agent, company, question, research_task)
         synthesis_task = create_synthesis_task(
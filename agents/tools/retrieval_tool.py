@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 
 from config import settings
 from retrieval import retrieve_with_rerank
+from retrieval.packing import get_token_counter, pack_context
 
 
 class RetrievalInput(BaseModel):
@@ -37,35 +38,44 @@ def _format_source_label(doc: Document) -> str:
     return label
 
 
+def _format_header(index: int, doc: Document) -> str:
+    """Include both Source (for URL/path extraction) and Label (for display)."""
+    source = doc.metadata.get("source", "Unknown")
+    return f"[{index}] Source: {source}\nLabel: {_format_source_label(doc)}"
+
+
 class RetrievalTool(BaseTool):
     name: str = "Document Retrieval Tool"
     description: str = "Search internal docs (10-K, earnings, reports). Use before claiming financials."
     args_schema: type[BaseModel] = RetrievalInput
+    # When set, searches are filtered server-side to chunks ingested for this company
+    company: str | None = None
 
     def _run(self, query: str) -> str:
+        request = {
+            "query": query,
+            "retrieval_k": settings.retrieval_top_k,
+            "rerank_k": settings.rerank_top_k,
+        }
         try:
-            results: list[Document] = retrieve_with_rerank.invoke(
-                {
-                    "query": query,
-                    "retrieval_k": settings.retrieval_top_k,
-                    "rerank_k": settings.rerank_top_k,
-                }
-            )
+            if self.company:
+                results: list[Document] = retrieve_with_rerank.invoke(
+                    {**request, "filter": {"company": self.company}}
+                )
+                if not results:
+                    # Chunks ingested without company metadata never match; search everything
+                    results = retrieve_with_rerank.invoke(request)
+            else:
+                results = retrieve_with_rerank.invoke(request)
         except Exception as e:
             return f"Retrieval error: {e}. Try rephrasing your query or check that the document database is populated."
 
         if not results:
             return "No relevant documents found. Try broadening your query."
 
-        formatted_results = []
-        max_chunk_len = 300
-        for i, doc in enumerate(results, 1):
-            source = doc.metadata.get("source", "Unknown")
-            label = _format_source_label(doc)
-            content = doc.page_content
-            if len(content) > max_chunk_len:
-                content = content[:max_chunk_len] + "..."
-            # Include both Source (for URL/path extraction) and Label (for display)
-            formatted_results.append(f"[{i}] Source: {source}\nLabel: {label}\n{content}")
-
-        return "\n---\n".join(formatted_results)
\ No newline at end of file
+        return pack_context(
+            results,
+            budget_tokens=settings.retrieval_context_token_budget,
+            count_tokens=get_token_counter(settings.llm_model),
+            format_header=_format_header,
+        )
\ No newline at end of file
@@ -4,21 +4,30 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import asyncio
+import hashlib
 import logging
 import tempfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
 from api.routes.analysis import router as analysis_router
 from api.schemas import (
     IngestResponse,
+    IngestStreamEvent,
     IngestUrlRequest,
 )
 from config import settings
-from ingestion.load import SUPPORTED_EXTENSIONS, load_documents
-from ingestion.upsert import upsert_documents
+from ingestion.load import PDF_MAGIC, PDF_MAGIC_WINDOW, SUPPORTED_EXTENSIONS, load_documents
+from ingestion.metadata import document_metadata
+from ingestion.parallel import FileIngestResult, ingest_pdfs, shutdown_parse_pool
+from ingestion.upsert import UpsertProgress, aclose_async_clients, upsert_documents
+from retrieval import metrics_registry, warm_up
 
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +36,36 @@ logging.basicConfig(
     force=True,
 )
 
+logger = logging.getLogger(__name__)
+
+# Streamed-ingestion tasks; the event loop only holds weak references to tasks,
+# so one whose client disconnected could otherwise be garbage collected mid-run
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _warm_up(app: FastAPI) -> None:
+    """Load models and connections in a worker thread, then mark the app ready."""
+    try:
+        await asyncio.to_thread(warm_up)
+        app.state.ready = True
+    except Exception as e:
+        app.state.warmup_error = str(e)
+        logger.exception("Warm-up failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start background warm-up; close shared async clients and parser processes on shutdown."""
+    app.state.ready = not settings.warmup_enabled
+    app.state.warmup_error = None
+    task = asyncio.create_task(_warm_up(app)) if settings.warmup_enabled else None
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+    await aclose_async_clients()
+    shutdown_parse_pool()
+
+
 app = FastAPI(
     title="Stratagent API",
     description="Multi-Agent RAG System for Strategic Business Analysis",
@@ -34,6 +73,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -59,6 +99,102 @@ async def health_check() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def readiness_check() -> JSONResponse:
+    """Readiness probe: 503 until the reranker, embeddings and index are warm."""
+    if getattr(app.state, "ready", False):
+        return JSONResponse({"status": "ready"})
+    error = getattr(app.state, "warmup_error", None)
+    if error:
+        return JSONResponse({"status": "failed", "error": error}, status_code=503)
+    return JSONResponse({"status": "warming"}, status_code=503)
+
+
+@app.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    """Per-stage retrieval metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(
+        metrics_registry.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+def _ingest_metadata(
+    company: str | None, doc_type: str | None, doc_date: str | None
+) -> dict[str, str | int]:
+    """Filterable chunk metadata from ingest request fields (400 on a bad date)."""
+    try:
+        return document_metadata(company=company, doc_type=doc_type, doc_date=doc_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="doc_date must be an ISO date (YYYY-MM-DD)")
+
+
+def _check_upload_types(files: list[UploadFile]) -> None:
+    """400 unless every upload has a supported extension."""
+    for upload in files:
+        suffix = Path(upload.filename or "").suffix.lower()
+        if suffix not in SUPPORTED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {suffix or 'unknown'}. Supported: .pdf",
+            )
+
+
+async def _save_uploads(files: list[UploadFile], saved: list[tuple[str, Path]]) -> list[str]:
+    """Stream uploads to temp files, appending (filename, path) to saved as each is created.
+
+    Files are copied settings.upload_chunk_bytes at a time, so memory stays
+    constant however large the uploads are, and hashed as they are copied.
+
+    Returns:
+        SHA-256 hex digest of each file, in order.
+
+    Raises:
+        HTTPException: 400 if a file does not start with a PDF header,
+            413 if one exceeds settings.upload_max_bytes.
+    """
+    chunk_bytes = max(PDF_MAGIC_WINDOW, settings.upload_chunk_bytes)
+    digests = []
+    for upload in files:
+        filename = upload.filename or "unknown"
+        suffix = Path(filename).suffix.lower()
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            saved.append((filename, Path(tmp.name)))
+            while chunk := await upload.read(chunk_bytes):
+                if size == 0 and PDF_MAGIC not in chunk[:PDF_MAGIC_WINDOW]:
+                    raise HTTPException(status_code=400, detail=f"{filename} is not a PDF file")
+                size += len(chunk)
+                if size > settings.upload_max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{filename} exceeds the {settings.upload_max_bytes} byte upload limit",
+                    )
+                digest.update(chunk)
+                tmp.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail=f"{filename} is empty")
+        digests.append(digest.hexdigest())
+    return digests
+
+
+def _remove_uploads(saved: list[tuple[str, Path]]) -> None:
+    for _, tmp_path in saved:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _ingest_response(results: list[FileIngestResult], digests: list[str]) -> IngestResponse:
+    all_chunk_ids = [chunk_id for r in results for chunk_id in r.chunk_ids]
+    return IngestResponse(
+        chunk_ids=all_chunk_ids,
+        chunk_count=len(all_chunk_ids),
+        files=[
+            {"filename": r.filename, "documents": r.documents, "chunks": len(r.chunk_ids), "sha256": digest}
+            for r, digest in zip(results, digests)
+        ],
+    )
+
+
 @app.post(
     "/ingest/upload",
     response_model=IngestResponse,
@@ -68,55 +204,98 @@ async def health_check() -> dict:
 )
 async def ingest_upload(
     files: list[UploadFile] = File(..., description="PDF files to ingest"),
+    company: str | None = Form(None, description="Company the files are about"),
+    doc_type: str | None = Form(None, description="Document type, e.g. 10-K"),
+    doc_date: str | None = Form(None, description="Document date (YYYY-MM-DD)"),
 ) -> IngestResponse:
-    """Upload one or more files and ingest them into the vector store."""
+    """Upload one or more files and ingest them into the vector store.
+
+    Uploads are streamed to disk in fixed-size chunks (size-limited, checked
+    for a PDF header and hashed on the way); PDFs are parsed in parallel
+    worker processes (see ingestion.parallel);
+    each file is upserted in fixed-size windows as soon as its pages are parsed.
+    """
     if not files:
         raise HTTPException(status_code=400, detail="At least one file is required")
+    metadata = _ingest_metadata(company, doc_type, doc_date)
+    _check_upload_types(files)
 
-    all_chunk_ids: list[str] = []
-    file_results: list[dict] = []
+    saved: list[tuple[str, Path]] = []
+    try:
+        digests = await _save_uploads(files, saved)
+        try:
+            results = await asyncio.to_thread(ingest_pdfs, saved, metadata=metadata)
+        except (ValueError, FileNotFoundError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        _remove_uploads(saved)
 
-    for upload in files:
-        suffix = Path(upload.filename or "").suffix.lower()
-        if suffix not in SUPPORTED_EXTENSIONS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {suffix or 'unknown'}. Supported: .pdf",
-            )
+    return _ingest_response(results, digests)
 
-    for upload in files:
-        suffix = Path(upload.filename or "").suffix.lower()
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-            content = await upload.read()
-            tmp.write(content)
-            tmp_path = Path(tmp.name)
 
+@app.post(
+    "/ingest/upload/stream",
+    tags=["Ingestion"],
+    summary="Upload files with streamed progress",
+    description="Same as /ingest/upload, but responds with NDJSON events: one \"window\" event per "
+    "embedded and upserted window of chunks, then a final \"done\" event carrying the IngestResponse "
+    "(or an \"error\" event).",
+)
+async def ingest_upload_stream(
+    files: list[UploadFile] = File(..., description="PDF files to ingest"),
+    company: str | None = Form(None, description="Company the files are about"),
+    doc_type: str | None = Form(None, description="Document type, e.g. 10-K"),
+    doc_date: str | None = Form(None, description="Document date (YYYY-MM-DD)"),
+) -> StreamingResponse:
+    """Ingest uploaded files, streaming per-window progress as newline-delimited JSON."""
+    if not files:
+        raise HTTPException(status_code=400, detail="At least one file is required")
+    metadata = _ingest_metadata(company, doc_type, doc_date)
+    _check_upload_types(files)
+
+    saved: list[tuple[str, Path]] = []
+    try:
+        digests = await _save_uploads(files, saved)
+    except BaseException:
+        _remove_uploads(saved)
+        raise
+
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[IngestStreamEvent | None] = asyncio.Queue()
+
+    def on_progress(filename: str, progress: UpsertProgress) -> None:
+        event = IngestStreamEvent(
+            event="window",
+            filename=filename,
+            window=progress.window,
+            pages=progress.pages,
+            chunks=progress.chunks,
+        )
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    async def run() -> None:
         try:
-            docs = load_documents(tmp_path)
-            if not docs:
-                file_results.append(
-                    {"filename": upload.filename or "unknown", "documents": 0, "chunks": 0}
-                )
-                continue
-            ids = upsert_documents(docs)
-            all_chunk_ids.extend(ids)
-            file_results.append(
-                {
-                    "filename": upload.filename or "unknown",
-                    "documents": len(docs),
-                    "chunks": len(ids),
-                }
+            results = await asyncio.to_thread(
+                ingest_pdfs, saved, metadata=metadata, on_progress=on_progress
             )
-        except (ValueError, FileNotFoundError) as e:
-            raise HTTPException(status_code=400, detail=str(e))
+            events.put_nowait(IngestStreamEvent(event="done", result=_ingest_response(results, digests)))
+        except Exception as e:
+            logger.exception("Streamed ingestion failed: %s", e)
+            events.put_nowait(IngestStreamEvent(event="error", detail=str(e)))
         finally:
-            tmp_path.unlink(missing_ok=True)
+            _remove_uploads(saved)
+            events.put_nowait(None)
 
-    return IngestResponse(
-        chunk_ids=all_chunk_ids,
-        chunk_count=len(all_chunk_ids),
-        files=[{"filename": r["filename"], "documents": r["documents"], "chunks": r["chunks"]} for r in file_results],
-    )
+    async def stream() -> AsyncIterator[str]:
+        # The ingestion task owns the temp files and finishes even if the client disconnects
+        task = asyncio.create_task(run())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        while (event := await events.get()) is not None:
+            yield event.model_dump_json(exclude_none=True) + "\n"
+        await task
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @app.post(
@@ -132,6 +311,7 @@ def ingest_url(request: IngestUrlRequest) -> IngestResponse:
     if not url.lower().startswith(("http://", "https://")):
         raise HTTPException(status_code=400, detail="URL must start with http:// or https://")
 
+    metadata = _ingest_metadata(request.company, request.doc_type, request.doc_date)
     try:
         docs = load_documents(url)
     except ValueError as e:
@@ -140,7 +320,7 @@ def ingest_url(request: IngestUrlRequest) -> IngestResponse:
     if not docs:
         return IngestResponse(chunk_ids=[], chunk_count=0, files=[])
 
-    ids = upsert_documents(docs)
+    ids = upsert_documents(docs, metadata=metadata)
     return IngestResponse(
         chunk_ids=ids,
         chunk_count=len(ids),
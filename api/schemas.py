@@ -1,6 +1,7 @@
 """API request and response schemas."""
 
 from enum import Enum
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -58,6 +59,9 @@ class IngestUrlRequest(BaseModel):
     """Request body for POST /ingest/url."""
 
     url: str = Field(..., description="URL to load (http:// or https://)")
+    company: str | None = Field(None, description="Company the page is about (enables filtered retrieval)")
+    doc_type: str | None = Field(None, description="Document type, e.g. 10-K, earnings-call")
+    doc_date: str | None = Field(None, description="Document date (YYYY-MM-DD)")
 
 
 class FileIngestResult(BaseModel):
@@ -66,6 +70,7 @@ class FileIngestResult(BaseModel):
     filename: str
     documents: int
     chunks: int
+    sha256: str | None = Field(None, description="SHA-256 of the uploaded file (upload only)")
 
 
 class IngestResponse(BaseModel):
@@ -77,3 +82,15 @@ class IngestResponse(BaseModel):
         default_factory=list,
         description="Per-file breakdown (upload only)",
     )
+
+
+class IngestStreamEvent(BaseModel):
+    """One NDJSON line of POST /ingest/upload/stream."""
+
+    event: Literal["window", "done", "error"]
+    filename: str | None = Field(None, description="File the window belongs to (window events)")
+    window: int | None = Field(None, description="1-based window number within the file")
+    pages: int | None = Field(None, description="Pages read from the file so far")
+    chunks: int | None = Field(None, description="Chunks upserted from the file so far")
+    result: IngestResponse | None = Field(None, description="Final result (done event)")
+    detail: str | None = Field(None, description="Error message (error event)")
@@ -23,6 +23,8 @@ class Settings(BaseSettings):
     api_host: str = "localhost"
     api_port: int = 8000
     api_reload: bool = True
+    # Preload reranker/embeddings/index at startup; /ready reports 503 until done
+    warmup_enabled: bool = True
 
     groq_api_key: str = "grq_xxxxxxx"
     pinecone_api_key: str = "pc_xxxxxxx"
@@ -32,19 +34,119 @@ class Settings(BaseSettings):
     embedding_model: str = "llama-text-embed-v2"
     embedding_dimensions: int = 1024
     reranker_model: str = "BAAI/bge-reranker-v2-m3"
+    # Reranker backend: "flag" (FlagEmbedding, torch fp32) or "onnx" (int8 ONNX Runtime)
+    reranker_backend: str = "flag"
+    reranker_onnx_dir: str = str(_PROJECT_ROOT / "models" / "reranker-onnx")
+    reranker_onnx_threads: int = 0
+    # Reranker forward pass: pairs per batch (length-bucketed), max tokens per pair
+    reranker_batch_size: int = 16
+    reranker_max_length: int = 512
+    # Near-duplicate collapsing before rerank: word-shingle Jaccard threshold (0-1)
+    dedup_enabled: bool = True
+    dedup_similarity_threshold: float = 0.9
+    # Reranker cascade: cheap first pass (vector score + lexical overlap) before the
+    # cross-encoder. Skip margin: k-th vs (k+1)-th vector score gap that bypasses it;
+    # prune margin: max cheap-score gap to the best candidate for reaching it.
+    rerank_cascade_enabled: bool = False
+    rerank_cascade_skip_margin: float = 0.15
+    rerank_cascade_prune_margin: float = 0.2
+    rerank_cascade_max_candidates: int = 8
+    rerank_cascade_lexical_weight: float = 0.2
     llm_model: str = "groq/groq/compound"
     # Retrieval tuning: vector search candidates, final reranked count
     retrieval_top_k: int = 12
     rerank_top_k: int = 3
     retriever_threshold: float = 0.0
     reranker_threshold: float = 0.0
+    # Token budget for the context RetrievalTool returns to an agent (counted with
+    # llm_model's tokenizer); higher-reranked chunks get a larger share
+    retrieval_context_token_budget: int = 1024
+    # Vector backend: "pinecone" (hosted index) or "local" (embedded, memory-mapped
+    # matrix + SQLite metadata under local_vector_dir, one dir per namespace).
+    # Local vectors are float16 or int8; IVF (nprobe lists) kicks in past local_ivf_min_vectors.
+    vector_backend: str = "pinecone"
+    local_vector_dir: str = str(_PROJECT_ROOT / "data" / "vectors")
+    local_vector_dtype: str = "float16"
+    local_ivf_min_vectors: int = 20000
+    local_ivf_nprobe: int = 8
+    # Parent-document store (SQLite, off by default): upsert keeps full pages (sections of at
+    # most parent_max_chars) locally and indexes compact child chunks pointing at them;
+    # retrieval then returns the parent pages of reranked chunks. Needs a persistent volume
+    parent_store_path: str | None = None
+    parent_max_chars: int = 4000
+    # Manifest of chunk ids already indexed per namespace (SQLite, off by default): chunk ids
+    # are content hashes, so re-ingested chunks are skipped instead of re-embedded
+    chunk_manifest_path: str | None = None
+    # Skipped chunks sampled per write and looked up in the vector store; if any is missing
+    # (index rebuilt, manifest outlived it) the namespace's manifest is cleared (0 = trust it)
+    chunk_manifest_verify_sample: int = 4
+    # Passage embedding cache for ingestion (SQLite, float16 vectors; off by default) and
+    # its size cap (least recently used vectors evicted beyond it; ~2KB each at 1024 dims)
+    ingest_embedding_cache_path: str | None = None
+    ingest_embedding_cache_max_entries: int = 200_000
+    # Hybrid retrieval: local BM25 index (built at upsert, one dir per namespace; off until
+    # sparse_index_dir is set) fused with dense candidates by reciprocal rank fusion (rrf_k damping)
+    hybrid_enabled: bool = True
+    sparse_index_dir: str | None = None
+    sparse_max_segments: int = 8
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    rrf_k: int = 60
+    # Query-embedding cache: in-memory LRU entries (0 disables), TTL, optional SQLite path
+    # and the SQLite row cap (expired rows are purged, least recently used evicted beyond it)
+    query_embedding_cache_size: int = 1024
+    query_embedding_cache_ttl_seconds: float = 3600.0
+    query_embedding_cache_path: str | None = None
+    query_embedding_cache_max_disk_entries: int = 50_000
+    # Reranker score cache: max cached (query, chunk) scores (0 disables)
+    rerank_score_cache_size: int = 4096
+    # Semantic result cache (off by default): final reranked results reused for a query whose
+    # embedding has cosine >= result_cache_similarity with a cached one in the same
+    # namespace/k/filter scope and with the same numbers and entity names (max entries,
+    # 0 disables). A namespace's entries are dropped when upsert writes to it in this
+    # process only; other replicas and processes keep serving them until the TTL
+    result_cache_size: int = 0
+    result_cache_similarity: float = 0.99
+    result_cache_ttl_seconds: float | None = 3600.0
+    # Reranker micro-batching across threads: enable, max pairs per forward pass, max wait (ms;
+    # only spent while callers are concurrent, a lone caller is scored immediately)
+    reranker_dispatch_enabled: bool = True
+    reranker_dispatch_max_batch_size: int = 64
+    reranker_dispatch_max_wait_ms: float = 5.0
     # Chunk size for document ingestion (characters)
     chunk_size: int = 384
     max_tokens: int = 2048
-    # Upsert tuning: embedding batch (HuggingFace), Pinecone upsert batch, pool threads
+    # Parallel PDF ingestion: parser processes (0 = one per CPU available to the container,
+    # cgroup quota included), max pages per parse task, and parse tasks submitted ahead of
+    # the upsert (parsed pages held in memory stay below ingest_parse_ahead * pages per task)
+    ingest_workers: int = 2
+    ingest_pages_per_task: int = 32
+    ingest_parse_ahead: int = 4
+    # Uploads are streamed to disk in chunks of upload_chunk_bytes; larger files than
+    # upload_max_bytes are rejected with 413
+    upload_max_bytes: int = 100 * 1024 * 1024
+    upload_chunk_bytes: int = 1024 * 1024
+    # Upsert tuning: texts per embedding request, vectors per upsert request, pool threads
+    # (also the number of concurrent upserts in the ingestion pipeline)
     embedding_batch_size: int = 64
     upsert_batch_size: int = 64
     pinecone_pool_threads: int = 8
+    # Ingestion pipeline: embedding requests in flight, queue capacity (batches) between stages
+    embedding_concurrency: int = 4
+    ingest_queue_batches: int = 8
+    # Adaptive ingestion batching: request payload caps (bytes; Pinecone upserts max out at
+    # 2MB), latency above which batches shrink (s), request rates (req/s, 0 = unlimited;
+    # halved on 429 and recovered gradually) and retries per failed batch
+    embedding_max_request_bytes: int = 256_000
+    upsert_max_request_bytes: int = 1_900_000
+    ingest_target_latency_seconds: float = 10.0
+    embedding_rate_limit: float = 0.0
+    upsert_rate_limit: float = 0.0
+    ingest_max_retries: int = 5
+    # Streaming ingestion (upsert_stream): chunks embedded and upserted per window
+    upsert_window_chunks: int = 256
+    # Max namespaces kept in the vector store pool (LRU-evicted beyond this)
+    vector_store_pool_size: int = 32
 
     # CORS (comma-separated list, e.g. "http://localhost:3000,https://app.example.com")
     cors_origins: str = "*"
@@ -1,12 +1,42 @@
-"""Ingestion module for document processing and indexing."""
+"""Ingestion module for document processing and indexing.
 
-from ingestion.load import load_documents
-from ingestion.upsert import upsert_documents, get_vector_store
+Exports are imported on first access: parse worker processes (see
+ingestion.parallel) unpickle ingestion.load and must not pull in the
+vector store, embedding and Pinecone clients.
+"""
 
-__all__ = [
-    "load_documents",
-    "upsert_documents",
-    "get_vector_store"
-]
+import importlib
+from typing import Any
 
+_EXPORTS = {
+    "LocalVectorStore": "ingestion.local_store",
+    "ChunkManifest": "ingestion.manifest",
+    "EmbeddingCache": "ingestion.embedding_cache",
+    "get_embedding_cache": "ingestion.embedding_cache",
+    "get_chunk_manifest": "ingestion.manifest",
+    "ParentStore": "ingestion.parents",
+    "get_parent_store": "ingestion.parents",
+    "SparseIndex": "ingestion.sparse",
+    "get_sparse_index": "ingestion.sparse",
+    "document_metadata": "ingestion.metadata",
+    "normalize_company": "ingestion.metadata",
+    "load_documents": "ingestion.load",
+    "iter_documents": "ingestion.load",
+    "upsert_documents": "ingestion.upsert",
+    "upsert_stream": "ingestion.upsert",
+    "get_vector_store": "ingestion.upsert",
+    "get_vector_store_stats": "ingestion.upsert",
+}
 
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,190 @@
+"""Persistent cache of document (passage) embeddings for ingestion.
+
+Re-ingesting after a chunking change, rebuilding a namespace or migrating
+indexes embeds mostly text that was embedded before. Vectors are kept in a
+SQLite file keyed by (embedding model, dimensions, text hash) and stored as
+float16 blobs (half the size of float32; well within embedding noise for
+cosine similarity). The vector stores built by ingestion.upsert embed
+passages through CachedEmbeddings, so only unseen text reaches the API.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_SQL_BATCH = 500
+
+_embedding_cache: "EmbeddingCache | None" = None
+_embedding_cache_lock = threading.Lock()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Hit/miss/eviction counters of an EmbeddingCache (since it was opened)."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingCache:
+    """SQLite table of float16 passage embeddings with least-recently-used eviction.
+
+    Args:
+        path: SQLite file (parent directories are created).
+        max_entries: Size cap; the least recently used vectors are evicted beyond it.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.stats = EmbeddingCacheStats()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used_at ON embeddings (used_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, dimensions: int, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{dimensions}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, dimensions: int, texts: Sequence[str]) -> list[list[float] | None]:
+        """Look up embeddings for texts in one pass; None marks a miss."""
+        keys = [self.key(model, dimensions, t) for t in texts]
+        unique = list(dict.fromkeys(keys))
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for start in range(0, len(unique), _SQL_BATCH):
+                batch = unique[start : start + _SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                for key, blob in self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch
+                ):
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET used_at = ? WHERE key = ?", ((now, k) for k in found)
+                )
+                self._conn.commit()
+            hits = sum(key in found for key in keys)
+            self.stats.hits += hits
+            self.stats.misses += len(keys) - hits
+        return [found.get(key) for key in keys]
+
+    def put_many(
+        self,
+        model: str,
+        dimensions: int,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        """Store embeddings for texts, then evict down to max_entries."""
+        now = time.time()
+        rows = [
+            (self.key(model, dimensions, t), np.asarray(v, dtype=np.float16).tobytes(), now)
+            for t, v in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, used_at) VALUES (?, ?, ?)", rows
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY used_at LIMIT ?)",
+                    (excess,),
+                )
+                self.stats.evictions += excess
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings whose embed_documents goes through an EmbeddingCache.
+
+    Queries are passed straight to the wrapped model (they are cached on the
+    retrieval side, see retrieval.cache.QueryEmbeddingCache).
+
+    Args:
+        embeddings: Model used for cache misses and queries.
+        cache: Passage embedding cache.
+        model: Embedding model name (part of the cache key).
+        dimensions: Embedding dimensions (part of the cache key).
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: str, dimensions: int):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = self.cache.get_many(self.model, self.dimensions, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            fresh = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            self.cache.put_many(self.model, self.dimensions, missing, list(fresh.values()))
+            vectors = [v if v is not None else fresh[t] for t, v in zip(texts, vectors)]
+        logger.debug("Embedded %d passage(s), %d from cache", len(texts), len(texts) - len(missing))
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.embeddings.aembed_query(text)
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Shared cache at settings.ingest_embedding_cache_path, or None when disabled (unset)."""
+    global _embedding_cache
+    if _embedding_cache is None and settings.ingest_embedding_cache_path:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    settings.ingest_embedding_cache_path,
+                    settings.ingest_embedding_cache_max_entries,
+                )
+    return _embedding_cache
+
+
+def reset_embedding_cache() -> None:
+    """Close the shared cache (reopened on next use). Use in tests or when settings change."""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is not None:
+            _embedding_cache.close()
+        _embedding_cache = None
@@ -1,14 +1,20 @@
 """Unified document loading interface."""
 
 import logging
+from collections.abc import Iterator
 from pathlib import Path
 
 from langchain_community.document_loaders import PyPDFLoader, WebBaseLoader
+from langchain_core.document_loaders import BaseLoader
 from langchain_core.documents import Document
+from pypdf import PdfReader
 
 logger = logging.getLogger(__name__)
 
 PDF_EXTENSIONS = {".pdf"}
+# Every PDF starts with this header (readers tolerate it anywhere in the first 1 KiB)
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
 SUPPORTED_EXTENSIONS = PDF_EXTENSIONS
 
 
@@ -35,6 +41,34 @@ def load_documents(
         ValueError: If source type is unsupported.
         FileNotFoundError: If the file path does not exist.
     """
+    docs = _get_loader(source).load()
+    logger.info("Loaded %d document(s) from %s", len(docs), str(source).strip()[:80])
+    return docs
+
+
+def iter_documents(
+    source: str | Path,
+    *,
+    web_headers: dict[str, str] | None = None,
+) -> Iterator[Document]:
+    """Lazily load documents from a file path or URL, one page at a time for PDFs.
+
+    Same sources and validation as load_documents (errors are raised here,
+    not on first iteration), but pages are parsed as the iterator is consumed,
+    so e.g. ingestion.upsert.upsert_stream never holds a whole filing.
+
+    Returns:
+        Iterator of LangChain Document objects with page_content and metadata.
+
+    Raises:
+        ValueError: If source type is unsupported.
+        FileNotFoundError: If the file path does not exist.
+    """
+    return _get_loader(source).lazy_load()
+
+
+def _get_loader(source: str | Path) -> BaseLoader:
+    """Validate source and return the loader for it."""
     source_str = str(source).strip()
     if not source_str:
         raise ValueError("Source cannot be empty.")
@@ -44,10 +78,7 @@ def load_documents(
     if source_lower.startswith(("http://", "https://")):
         logger.info("Loading from URL: %s", source_str[:80])
         loader_kwargs: dict = {"web_path": source}
-        loader = WebBaseLoader(**loader_kwargs)
-        docs = loader.load()
-        logger.info("Loaded %d document(s) from URL", len(docs))
-        return docs
+        return WebBaseLoader(**loader_kwargs)
 
     path = Path(source)
     suffix = path.suffix.lower()
@@ -65,9 +96,54 @@ def load_documents(
         raise ValueError(f"Path is not a file: {path}")
 
     logger.info("Loading %s: %s", suffix, path)
+    return PyPDFLoader(file_path=path)
 
-    loader = PyPDFLoader(file_path=path)
-    docs = loader.load()
 
-    logger.info("Loaded %d document(s) from %s", len(docs), path.name)
-    return docs
+def count_pdf_pages(path: str | Path) -> int:
+    """Number of pages in a PDF (reads only the page tree, no text extraction).
+
+    Raises:
+        ValueError: If the file is not a readable PDF.
+    """
+    try:
+        return len(PdfReader(path).pages)
+    except Exception as e:
+        raise ValueError(f"Could not read PDF {Path(path).name}: {e}") from e
+
+
+def load_pdf_pages(path: str | Path, start: int = 0, stop: int | None = None) -> list[Document]:
+    """Load pages [start, stop) of a PDF, one Document per page like PyPDFLoader.
+
+    Metadata matches PyPDFLoader's page mode (PDF info fields, source,
+    total_pages, page, page_label), so page ranges loaded in separate
+    processes (see ingestion.parallel) are indistinguishable from a full load.
+    Top-level so it can run in a worker process.
+    """
+    reader = PdfReader(path)
+    pdf_info = reader.metadata
+    info = {
+        key.lstrip("/").lower(): str(value)
+        for key, value in (pdf_info or {}).items()
+        if value is not None
+    }
+    if pdf_info is not None:
+        # PDF dates ("D:20240131...") as ISO 8601, like PyPDFLoader
+        for key, attr in (("creationdate", "creation_date"), ("moddate", "modification_date")):
+            try:
+                parsed = getattr(pdf_info, attr)
+            except ValueError:
+                parsed = None
+            if parsed is not None:
+                info[key] = parsed.isoformat()
+    base = {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""} | info | {
+        "source": str(path),
+        "total_pages": len(reader.pages),
+    }
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    return [
+        Document(
+            page_content=reader.pages[i].extract_text(extraction_mode="plain").strip(),
+            metadata=base | {"page": i, "page_label": reader.page_labels[i]},
+        )
+        for i in range(start, stop)
+    ]
@@ -0,0 +1,459 @@
+"""Embedded vector store: a drop-in for PineconeVectorStore with no network hop.
+
+One directory per namespace:
+
+    vectors.<dtype>     row-major matrix of unit-normalized vectors (float16 or
+                        int8), memory-mapped and appended to in place
+    meta.sqlite         side table: row -> (id, text, metadata JSON, deleted)
+    store.json          dimension and dtype of the matrix
+    ivf_centroids.npy   IVF coarse quantizer (only once the store is large)
+    ivf_assign.npy      int32 list id per row
+
+Scores are cosine similarities, like a Pinecone index created with
+metric="cosine", so settings.retriever_threshold keeps its meaning. Search is
+exact (one vectorized matrix-vector product) until the store holds
+settings.local_ivf_min_vectors rows; beyond that a spherical k-means IVF index
+restricts the scan to the settings.local_ivf_nprobe closest lists.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from ingestion.metadata import match_filter
+
+logger = logging.getLogger(__name__)
+
+_DTYPES = {"float16": np.float16, "int8": np.int8}
+_INT8_SCALE = 127.0
+_SCAN_BLOCK_ROWS = 65536
+_SQL_BATCH = 500
+
+
+class LocalVectorStore(VectorStore):
+    """Memory-mapped vector matrix with an SQLite metadata side table.
+
+    Args:
+        path: Directory of this namespace's store (created if missing).
+        embedding: Embedding model used for add_texts and query search.
+        dtype: "float16" or "int8" (scalar-quantized); fixed when the store is created.
+        ivf_min_vectors: Row count at which the IVF index is trained.
+        nprobe: IVF lists scanned per query.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        embedding: Embeddings,
+        *,
+        dtype: str = "float16",
+        ivf_min_vectors: int = 20000,
+        nprobe: int = 8,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._embedding = embedding
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+
+        info_path = self.path / "store.json"
+        info = json.loads(info_path.read_text()) if info_path.exists() else {}
+        self.dtype = info.get("dtype", dtype)
+        if self.dtype not in _DTYPES:
+            raise ValueError(f"Unknown local vector dtype: {self.dtype!r} (use float16 or int8)")
+        self.dimension: int | None = info.get("dimension")
+
+        self._conn = sqlite3.connect(self.path / "meta.sqlite", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+            "text TEXT NOT NULL, metadata TEXT NOT NULL, deleted INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.commit()
+
+        self._matrix: np.ndarray = np.empty((0, 0), dtype=_DTYPES[self.dtype])
+        self._alive = np.zeros(0, dtype=bool)
+        self._centroids: np.ndarray | None = None
+        self._assign: np.ndarray | None = None
+        self._ivf_order: np.ndarray | None = None
+        self._ivf_bounds: np.ndarray | None = None
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.path / f"vectors.{self.dtype}"
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    # ------------------------------------------------------------------
+    # Loading and encoding
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        """Map the matrix and rebuild the live-row mask and IVF lists."""
+        count = 0
+        if self.dimension and self._vectors_path.exists():
+            itemsize = np.dtype(_DTYPES[self.dtype]).itemsize
+            count = self._vectors_path.stat().st_size // (self.dimension * itemsize)
+        if count:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=_DTYPES[self.dtype], mode="r", shape=(count, self.dimension)
+            )
+        alive = np.zeros(count, dtype=bool)
+        rows = [r for (r,) in self._conn.execute("SELECT row FROM chunks WHERE deleted = 0")]
+        if rows:
+            alive[np.array(rows, dtype=np.int64)] = True
+        self._alive = alive
+
+        centroids_path = self.path / "ivf_centroids.npy"
+        assign_path = self.path / "ivf_assign.npy"
+        if centroids_path.exists() and assign_path.exists():
+            assign = np.load(assign_path)
+            if len(assign) == count:
+                self._set_ivf(np.load(centroids_path), assign)
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = _normalize(vectors)
+        if self.dtype == "int8":
+            return np.clip(np.rint(vectors * _INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors.astype(np.float16)
+
+    def _decode(self, block: np.ndarray) -> np.ndarray:
+        block = np.asarray(block, dtype=np.float32)
+        return block / _INT8_SCALE if self.dtype == "int8" else block
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        """Embed and store texts; an existing id is overwritten in place.
+
+        Accepts PineconeVectorStore's embedding_chunk_size kwarg (texts embedded
+        per request); batch_size is ignored because writes are local.
+        """
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        chunk = kwargs.get("embedding_chunk_size") or 1000
+        vectors: list[list[float]] = []
+        for start in range(0, len(texts), chunk):
+            vectors.extend(self._embedding.embed_documents(texts[start : start + chunk]))
+        self.add_vectors(ids, texts, metadatas, vectors)
+        return ids
+
+    def add_vectors(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[dict],
+        vectors: Sequence[Sequence[float]] | np.ndarray,
+    ) -> None:
+        """Store precomputed vectors (last occurrence wins for repeated ids)."""
+        latest = {doc_id: i for i, doc_id in enumerate(ids)}
+        if not latest:
+            return
+        order = list(latest.values())
+        matrix = np.asarray(vectors, dtype=np.float32)[order]
+        if matrix.ndim != 2:
+            raise ValueError("vectors must be a 2-D sequence")
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = int(matrix.shape[1])
+                (self.path / "store.json").write_text(
+                    json.dumps({"dimension": self.dimension, "dtype": self.dtype})
+                )
+            if matrix.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Vector dimension {matrix.shape[1]} does not match store dimension {self.dimension}"
+                )
+
+            existing = self._rows_for_ids(list(latest))
+            encoded = self._encode(matrix)
+            count = len(self._alive)
+            rows: list[int] = []
+            new_positions: list[int] = []
+            for position, doc_id in enumerate(latest):
+                if doc_id in existing:
+                    rows.append(existing[doc_id])
+                else:
+                    rows.append(count + len(new_positions))
+                    new_positions.append(position)
+
+            if new_positions:
+                with open(self._vectors_path, "ab") as f:
+                    f.write(np.ascontiguousarray(encoded[new_positions]).tobytes())
+            replaced = [(p, r) for p, r in enumerate(rows) if r < count]
+            if replaced:
+                writable = np.memmap(
+                    self._vectors_path, dtype=_DTYPES[self.dtype], mode="r+", shape=(count, self.dimension)
+                )
+                for position, row in replaced:
+                    writable[row] = encoded[position]
+                writable.flush()
+                del writable
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, id, text, metadata, deleted) VALUES (?, ?, ?, ?, 0)",
+                [
+                    (row, doc_id, texts[i], json.dumps(metadatas[i], default=str))
+                    for row, (doc_id, i) in zip(rows, latest.items())
+                ],
+            )
+            self._conn.commit()
+            self._after_write(matrix, rows, count)
+
+    def _after_write(self, normalized: np.ndarray, rows: list[int], old_count: int) -> None:
+        """Remap the grown matrix and keep the IVF index in step (caller holds the lock)."""
+        self._load_matrix_only()
+        alive = np.zeros(len(self._matrix), dtype=bool)
+        alive[: len(self._alive)] = self._alive
+        alive[np.array(rows, dtype=np.int64)] = True
+        self._alive = alive
+
+        total = len(self._matrix)
+        trained_on = len(self._assign) if self._assign is not None else 0
+        if total >= self.ivf_min_vectors and (self._centroids is None or total >= 2 * trained_on):
+            self._train_ivf()
+        elif self._centroids is not None and self._assign is not None:
+            assign = np.empty(total, dtype=np.int32)
+            assign[: len(self._assign)] = self._assign[:total]
+            lists = np.argmax(_normalize(normalized) @ self._centroids.T, axis=1).astype(np.int32)
+            assign[np.array(rows, dtype=np.int64)] = lists
+            self._set_ivf(self._centroids, assign)
+            np.save(self.path / "ivf_assign.npy", assign)
+
+    def _load_matrix_only(self) -> None:
+        itemsize = np.dtype(_DTYPES[self.dtype]).itemsize
+        count = self._vectors_path.stat().st_size // (self.dimension * itemsize)
+        self._matrix = np.memmap(
+            self._vectors_path, dtype=_DTYPES[self.dtype], mode="r", shape=(count, self.dimension)
+        )
+
+    def _rows_for_ids(self, ids: list[str]) -> dict[str, int]:
+        found: dict[str, int] = {}
+        for start in range(0, len(ids), _SQL_BATCH):
+            batch = ids[start : start + _SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            found.update(
+                self._conn.execute(f"SELECT id, row FROM chunks WHERE id IN ({marks})", batch).fetchall()
+            )
+        return found
+
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        """The subset of ids stored (and not deleted)."""
+        found: set[str] = set()
+        with self._lock:
+            for start in range(0, len(ids), _SQL_BATCH):
+                batch = ids[start : start + _SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                found.update(
+                    row[0]
+                    for row in self._conn.execute(
+                        f"SELECT id FROM chunks WHERE deleted = 0 AND id IN ({marks})", batch
+                    )
+                )
+        return found
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> bool:
+        """Tombstone chunks by id (rows are reused when the same id is added again)."""
+        if not ids:
+            return False
+        with self._lock:
+            rows = self._rows_for_ids(list(ids))
+            if rows:
+                self._conn.executemany(
+                    "UPDATE chunks SET deleted = 1 WHERE row = ?", [(r,) for r in rows.values()]
+                )
+                self._conn.commit()
+                alive = self._alive.copy()
+                alive[np.array(list(rows.values()), dtype=np.int64)] = False
+                self._alive = alive
+        return True
+
+    # ------------------------------------------------------------------
+    # IVF
+    # ------------------------------------------------------------------
+
+    def _train_ivf(self, iterations: int = 10, sample_size: int = 50000) -> None:
+        """Spherical k-means over a sample of rows, then assign every row to a list."""
+        total = len(self._matrix)
+        nlist = int(min(4096, max(16, np.sqrt(total))))
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(total, size=min(total, sample_size), replace=False))
+        sample = self._decode(self._matrix[sample_rows])
+        centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+
+        assign = np.empty(total, dtype=np.int32)
+        for start in range(0, total, _SCAN_BLOCK_ROWS):
+            block = self._decode(self._matrix[start : start + _SCAN_BLOCK_ROWS])
+            assign[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        np.save(self.path / "ivf_centroids.npy", centroids)
+        np.save(self.path / "ivf_assign.npy", assign)
+        self._set_ivf(centroids, assign)
+        logger.info("Trained IVF index: %d lists over %d vectors", len(centroids), total)
+
+    def _set_ivf(self, centroids: np.ndarray, assign: np.ndarray) -> None:
+        order = np.argsort(assign, kind="stable")
+        self._centroids = centroids.astype(np.float32)
+        self._assign = assign
+        self._ivf_order = order
+        self._ivf_bounds = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _scores(self, query: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, cosine scores) of the rows scanned for query; dead rows are dropped."""
+        with self._lock:
+            matrix, alive = self._matrix, self._alive
+            centroids, order, bounds = self._centroids, self._ivf_order, self._ivf_bounds
+        if not len(alive):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if centroids is not None and order is not None and bounds is not None:
+            probe = np.argsort(centroids @ query)[::-1][: self.nprobe]
+            rows = np.sort(np.concatenate([order[bounds[p] : bounds[p + 1]] for p in probe]))
+            rows = rows[alive[rows]]
+            scores = self._decode(matrix[rows]) @ query if len(rows) else np.empty(0, np.float32)
+            return rows, scores
+
+        scores = np.empty(len(alive), dtype=np.float32)
+        for start in range(0, len(alive), _SCAN_BLOCK_ROWS):
+            block = self._decode(matrix[start : start + _SCAN_BLOCK_ROWS])
+            scores[start : start + len(block)] = block @ query
+        rows = np.flatnonzero(alive)
+        return rows, scores[rows]
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: dict | None = None,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        """Top-k (Document, cosine similarity) for a query vector.
+
+        Args:
+            embedding: Query vector.
+            k: Number of results.
+            filter: Optional Pinecone-style metadata filter, evaluated locally.
+        """
+        query = _normalize(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        rows, scores = self._scores(query)
+        if not len(rows) or k < 1:
+            return []
+
+        results: list[tuple[Document, float]] = []
+        if filter is None and len(rows) > k:
+            top = np.argpartition(scores, -k)[-k:]
+            ranked = top[np.argsort(scores[top])[::-1]]
+        else:
+            ranked = np.argsort(scores)[::-1]
+        for start in range(0, len(ranked), max(k, _SQL_BATCH)):
+            batch = ranked[start : start + max(k, _SQL_BATCH)]
+            records = self._records([int(rows[i]) for i in batch])
+            for i in batch:
+                record = records.get(int(rows[i]))
+                if record is None:
+                    continue
+                doc_id, text, metadata = record
+                if filter is not None and not match_filter(metadata, filter):
+                    continue
+                results.append(
+                    (Document(id=doc_id, page_content=text, metadata=metadata), float(scores[i]))
+                )
+                if len(results) == k:
+                    return results
+        return results
+
+    def _records(self, rows: list[int]) -> dict[int, tuple[str, str, dict]]:
+        marks = ",".join("?" * len(rows))
+        with self._lock:
+            fetched = self._conn.execute(
+                f"SELECT row, id, text, metadata FROM chunks WHERE deleted = 0 AND row IN ({marks})",
+                rows,
+            ).fetchall()
+        return {row: (doc_id, text, json.loads(meta)) for row, doc_id, text, meta in fetched}
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: dict | None = None,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        """Embed query, then similarity_search_by_vector_with_score."""
+        return self.similarity_search_by_vector_with_score(
+            self._embedding.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: dict | None = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0  # cosine similarity -> [0, 1]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        path: str | Path | None = None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        if path is None:
+            raise ValueError("LocalVectorStore.from_texts requires path")
+        store = cls(path, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
@@ -0,0 +1,147 @@
+"""Deterministic chunk ids and a local manifest of the chunks already indexed.
+
+Chunk ids are derived from the chunk text and its source (plus the
+filterable metadata), so ingesting the same document again yields the same
+ids. upsert_documents looks the ids up in the manifest and only embeds and
+upserts chunks a namespace does not have yet; re-ingesting a corpus costs
+no embedding calls and writes no duplicate vectors.
+
+Entries are keyed by the vector store they were written to (backend and
+index, see store_identity), so switching backend or index does not skip
+chunks the new store has never seen. The manifest still only records what
+this host wrote: upsert verifies a sample of skipped ids against the store
+and clears the namespace when vectors were deleted out of band (index
+rebuilt, namespace dropped).
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Metadata that distinguishes otherwise identical chunk text (same boilerplate in two
+# companies' filings must stay two chunks). Page is left out: repeated text within a
+# document is indexed once.
+CHUNK_ID_KEYS = ("source", "company", "doc_type", "doc_date")
+_SQL_BATCH = 500
+_DEFAULT_NAMESPACE = ""
+# Table of manifests created before entries were keyed by store
+_LEGACY_TABLE = "chunks"
+
+_manifest: "ChunkManifest | None" = None
+_manifest_lock = threading.Lock()
+
+
+def chunk_id(document: Document) -> str:
+    """Deterministic id of a chunk: SHA-256 of its text, source and filterable metadata."""
+    key = [document.metadata.get(k) for k in CHUNK_ID_KEYS] + [document.page_content]
+    return hashlib.sha256(json.dumps(key, default=str).encode("utf-8")).hexdigest()
+
+
+def store_identity() -> str:
+    """Identity of the configured vector store: backend plus Pinecone index or local directory."""
+    if settings.vector_backend == "local":
+        return f"local:{Path(settings.local_vector_dir).resolve()}"
+    return f"{settings.vector_backend}:{settings.pinecone_index_name}"
+
+
+class ChunkManifest:
+    """SQLite set of (namespace, chunk id) pairs already written to one vector store.
+
+    Args:
+        path: SQLite file (parent directories are created).
+        store: Identity of the vector store the entries refer to (see
+            store_identity); manifests of other stores in the same file are
+            kept apart.
+    """
+
+    def __init__(self, path: str | Path, store: str = ""):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.store = store
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # Entries without a store cannot be attributed to an index; re-ingesting rebuilds them
+        self._conn.execute(f"DROP TABLE IF EXISTS {_LEGACY_TABLE}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS indexed_chunks (store TEXT NOT NULL, namespace TEXT NOT NULL, "
+            "id TEXT NOT NULL, PRIMARY KEY (store, namespace, id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def existing(self, namespace: str | None, ids: Iterable[str]) -> set[str]:
+        """The subset of ids already recorded for namespace."""
+        ns = namespace or _DEFAULT_NAMESPACE
+        unique = list(dict.fromkeys(ids))
+        found: set[str] = set()
+        with self._lock:
+            for start in range(0, len(unique), _SQL_BATCH):
+                batch = unique[start : start + _SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                found.update(
+                    row[0]
+                    for row in self._conn.execute(
+                        f"SELECT id FROM indexed_chunks WHERE store = ? AND namespace = ? AND id IN ({marks})",
+                        [self.store, ns, *batch],
+                    )
+                )
+        return found
+
+    def add_many(self, namespace: str | None, ids: Iterable[str]) -> None:
+        """Record ids as written to namespace."""
+        ns = namespace or _DEFAULT_NAMESPACE
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO indexed_chunks (store, namespace, id) VALUES (?, ?, ?)",
+                ((self.store, ns, i) for i in ids),
+            )
+            self._conn.commit()
+
+    def clear(self, namespace: str | None = None) -> None:
+        """Forget every chunk of namespace (e.g. after the namespace was deleted from the index)."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM indexed_chunks WHERE store = ? AND namespace = ?",
+                (self.store, namespace or _DEFAULT_NAMESPACE),
+            )
+            self._conn.commit()
+
+    def count(self, namespace: str | None = None) -> int:
+        """Number of chunks recorded for namespace."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM indexed_chunks WHERE store = ? AND namespace = ?",
+                (self.store, namespace or _DEFAULT_NAMESPACE),
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_chunk_manifest() -> ChunkManifest | None:
+    """Shared manifest of the configured store at settings.chunk_manifest_path, or None when disabled (unset)."""
+    global _manifest
+    if _manifest is None and settings.chunk_manifest_path:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = ChunkManifest(settings.chunk_manifest_path, store_identity())
+    return _manifest
+
+
+def reset_chunk_manifest() -> None:
+    """Close the shared manifest (reopened on next use). Use in tests or when settings change."""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is not None:
+            _manifest.close()
+        _manifest = None
@@ -0,0 +1,105 @@
+"""Filterable chunk metadata (company, doc type, document date) set at ingestion."""
+
+import re
+from datetime import date, datetime
+from typing import Any
+
+from langchain_core.documents import Document
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_company(name: str) -> str:
+    """Canonical company key: case-folded with whitespace collapsed ("Acme  Corp" -> "acme corp")."""
+    return _SPACE_RE.sub(" ", name).strip().casefold()
+
+
+def date_key(value: date | datetime | str) -> int:
+    """Document date as a YYYYMMDD integer.
+
+    Pinecone range operators ($gte/$lte) only apply to numbers, so dates are
+    stored and compared in this form.
+
+    Raises:
+        ValueError: If a string value is not an ISO date (YYYY-MM-DD).
+    """
+    if isinstance(value, str):
+        value = date.fromisoformat(value.strip()[:10])
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def document_metadata(
+    *,
+    company: str | None = None,
+    doc_type: str | None = None,
+    doc_date: date | datetime | str | None = None,
+) -> dict[str, str | int]:
+    """Build the filterable metadata fields for a batch of documents (unset fields omitted)."""
+    metadata: dict[str, str | int] = {}
+    if company and company.strip():
+        metadata["company"] = normalize_company(company)
+    if doc_type and doc_type.strip():
+        metadata["doc_type"] = doc_type.strip().casefold()
+    if doc_date:
+        metadata["doc_date"] = date_key(doc_date)
+    return metadata
+
+
+def tag_documents(documents: list[Document], metadata: dict[str, str | int]) -> list[Document]:
+    """Merge metadata into every document in place and return them."""
+    if metadata:
+        for doc in documents:
+            doc.metadata.update(metadata)
+    return documents
+
+
+def match_filter(metadata: dict[str, Any], expression: dict[str, Any]) -> bool:
+    """Evaluate a Pinecone metadata filter expression against one chunk's metadata.
+
+    Supports field conditions ($eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, or a
+    bare value meaning $eq) combined implicitly with AND, plus $and / $or.
+    """
+    for field, condition in expression.items():
+        if field == "$and":
+            if not all(match_filter(metadata, sub) for sub in condition):
+                return False
+        elif field == "$or":
+            if not any(match_filter(metadata, sub) for sub in condition):
+                return False
+        elif not _match_condition(metadata.get(field), condition):
+            return False
+    return True
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+    for op, operand in condition.items():
+        if op == "$ne":
+            if value == operand:
+                return False
+            continue
+        if op == "$nin":
+            if value in operand:
+                return False
+            continue
+        if value is None:
+            return False
+        if op == "$eq":
+            ok = value == operand
+        elif op == "$in":
+            ok = value in operand
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return False
+            ok = {
+                "$gt": value > operand,
+                "$gte": value >= operand,
+                "$lt": value < operand,
+                "$lte": value <= operand,
+            }[op]
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if not ok:
+            return False
+    return True
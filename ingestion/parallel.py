@@ -0,0 +1,186 @@
+"""Parallel PDF ingestion: parsing fans out over a process pool, upserts follow per file.
+
+PDF text extraction is CPU-bound and holds the GIL, so files (and page
+ranges of large files) are parsed in worker processes. Page ranges are
+streamed through upsert_stream (windowed embed/upsert) in page order as they
+come back, while the pool parses a bounded number of ranges ahead.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from langchain_core.documents import Document
+
+from config.settings import settings
+from ingestion.load import count_pdf_pages, load_pdf_pages
+from ingestion.upsert import UpsertProgress, upsert_stream
+
+logger = logging.getLogger(__name__)
+
+# cgroup v2 CPU limit ("<quota> <period>" or "max <period>")
+_CGROUP_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+
+
+@dataclass
+class FileIngestResult:
+    """Outcome of ingesting one uploaded file."""
+
+    filename: str
+    documents: int = 0
+    chunk_ids: list[str] = field(default_factory=list)
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: its affinity mask, capped by the cgroup CPU quota.
+
+    os.cpu_count() reports the node's CPUs, not a container's limit.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = _CGROUP_CPU_MAX.read_text().split()
+        if quota != "max":
+            cpus = min(cpus, int(quota) // int(period))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Shared parser process pool (settings.ingest_workers processes, 0 = available_cpus()).
+
+    Workers are spawned rather than forked: the API process runs threads
+    (uvicorn, Pinecone pools) that must not be copied mid-operation. A
+    spawned worker imports only ingestion.load (the package's exports are
+    lazy), so each one stays small.
+    """
+    global _parse_pool
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ProcessPoolExecutor(
+                    max_workers=settings.ingest_workers or available_cpus(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the parser processes (call on application shutdown; recreated on next use)."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
+
+def page_ranges(page_count: int, pages_per_task: int) -> list[tuple[int, int]]:
+    """Split pages [0, page_count) into consecutive ranges of at most pages_per_task."""
+    step = max(1, pages_per_task)
+    return [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+
+def ingest_pdfs(
+    files: list[tuple[str, str | Path]],
+    *,
+    metadata: dict[str, Any] | None = None,
+    namespace: str | None = None,
+    on_progress: Callable[[str, UpsertProgress], None] | None = None,
+) -> list[FileIngestResult]:
+    """Parse PDFs in parallel and upsert their pages as they are parsed.
+
+    Files are split into page ranges of at most settings.ingest_pages_per_task
+    pages. Up to settings.ingest_parse_ahead ranges are parsed concurrently
+    ahead of the upsert, which consumes them file by file in page order, so
+    the parent process never holds more than that many parsed ranges.
+
+    Args:
+        files: (display filename, path) pairs.
+        metadata: Extra chunk metadata passed to upsert_stream.
+        namespace: Optional Pinecone namespace.
+        on_progress: Called with (filename, running totals) after each
+            upserted window.
+
+    Returns:
+        One result per file, in input order.
+
+    Raises:
+        ValueError: If a file cannot be parsed as a PDF. Windows of that file
+            upserted before the failing range stay in the index.
+    """
+    results = [FileIngestResult(filename=name) for name, _ in files]
+    if not files:
+        return results
+
+    pool = get_parse_pool()
+    tasks = [
+        (i, start, stop)
+        for i, (_, path) in enumerate(files)
+        for start, stop in page_ranges(count_pdf_pages(path), settings.ingest_pages_per_task)
+    ]
+    logger.info("Parsing %d file(s) as %d task(s)", len(files), len(tasks))
+
+    upcoming = iter(tasks)
+    in_flight: deque[tuple[int, Future]] = deque()  # (file index, parse future), in task order
+
+    def submit_ahead() -> None:
+        while len(in_flight) < max(1, settings.ingest_parse_ahead):
+            task = next(upcoming, None)
+            if task is None:
+                return
+            i, start, stop = task
+            in_flight.append((i, pool.submit(load_pdf_pages, str(files[i][1]), start, stop)))
+
+    def pages(i: int) -> Iterator[Document]:
+        while True:
+            submit_ahead()
+            if not in_flight or in_flight[0][0] != i:
+                return
+            _, future = in_flight.popleft()
+            try:
+                docs = future.result()
+            except Exception as e:
+                raise ValueError(f"Could not parse {files[i][0]}: {e}") from e
+            # Refill the pool before this range is chunked and embedded
+            submit_ahead()
+            yield from docs
+
+    try:
+        for i, result in enumerate(results):
+            _upsert_file(result, pages(i), metadata, namespace, on_progress)
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+    return results
+
+
+def _upsert_file(
+    result: FileIngestResult,
+    parsed: Iterator[Document],
+    metadata: dict[str, Any] | None,
+    namespace: str | None,
+    on_progress: Callable[[str, UpsertProgress], None] | None,
+) -> None:
+    def pages() -> Iterator[Document]:
+        for doc in parsed:
+            result.documents += 1
+            # The upload's name, not its temp path, so re-uploads get the same chunk ids
+            doc.metadata["source"] = result.filename
+            yield doc
+
+    report = None if on_progress is None else (lambda progress: on_progress(result.filename, progress))
+    result.chunk_ids = upsert_stream(pages(), metadata=metadata, namespace=namespace, on_progress=report)
+    logger.info("Ingested %s: %d page(s), %d chunk(s)", result.filename, result.documents, len(result.chunk_ids))
@@ -0,0 +1,158 @@
+"""Local content-addressed store of parent passages (full pages/sections) for indexed chunks.
+
+With the store enabled, upsert_documents keeps each page (or section of a
+long web page) here under the SHA-256 of its text and indexes only compact
+child chunks carrying a ``parent_id`` pointer and the metadata retrieval
+needs. The retriever swaps reranked winners for their parent passages.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_ID_KEY = "parent_id"
+# Child metadata kept in the vector index: filter fields, citation labels and the pointer
+INDEXED_METADATA_KEYS = frozenset(
+    {"source", "page", "page_label", "title", "company", "doc_type", "doc_date", PARENT_ID_KEY}
+)
+_SQL_BATCH = 500
+
+_parent_store: "ParentStore | None" = None
+_parent_store_lock = threading.Lock()
+
+
+class ParentStore:
+    """SQLite table of parent passages keyed by content hash (identical text is stored once).
+
+    Args:
+        path: SQLite file (parent directories are created).
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parents "
+            "(id TEXT PRIMARY KEY, text TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def put_many(self, documents: Iterable[Document]) -> list[str]:
+        """Store documents (existing ids are kept as-is) and return their ids in order."""
+        rows = [
+            (self.key(doc.page_content), doc.page_content, json.dumps(doc.metadata, default=str))
+            for doc in documents
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO parents (id, text, metadata) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+        return [row[0] for row in rows]
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, Document]:
+        """Parents by id; unknown ids are missing from the result."""
+        unique = list(dict.fromkeys(ids))
+        found: dict[str, Document] = {}
+        with self._lock:
+            for start in range(0, len(unique), _SQL_BATCH):
+                batch = unique[start : start + _SQL_BATCH]
+                marks = ",".join("?" * len(batch))
+                for parent_id, text, metadata in self._conn.execute(
+                    f"SELECT id, text, metadata FROM parents WHERE id IN ({marks})", batch
+                ):
+                    found[parent_id] = Document(
+                        id=parent_id, page_content=text, metadata=json.loads(metadata)
+                    )
+        return found
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM parents").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_parent_store() -> ParentStore | None:
+    """Shared parent store at settings.parent_store_path, or None when disabled (unset)."""
+    global _parent_store
+    if _parent_store is None and settings.parent_store_path:
+        with _parent_store_lock:
+            if _parent_store is None:
+                _parent_store = ParentStore(settings.parent_store_path)
+    return _parent_store
+
+
+def reset_parent_store() -> None:
+    """Close the shared parent store (reopened on next use). Use in tests or when settings change."""
+    global _parent_store
+    with _parent_store_lock:
+        if _parent_store is not None:
+            _parent_store.close()
+        _parent_store = None
+
+
+def split_parents(documents: list[Document], max_chars: int) -> list[Document]:
+    """Parent passages: each loaded page, with pages longer than max_chars split into sections."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=max_chars, chunk_overlap=0)
+    return splitter.split_documents(documents)
+
+
+def child_metadata(metadata: dict[str, Any], parent_id: str) -> dict[str, Any]:
+    """Compact index metadata for a child chunk (the parent keeps the full metadata)."""
+    compact = {k: v for k, v in metadata.items() if k in INDEXED_METADATA_KEYS}
+    compact[PARENT_ID_KEY] = parent_id
+    return compact
+
+
+def expand_to_parents(documents: list[Document], store: ParentStore) -> list[Document]:
+    """Replace chunks by their parent passages, keeping rank order.
+
+    A parent is returned once, at its best chunk's position; its metadata is
+    the parent's merged with the chunk's (scores, pointer), and the matched
+    chunk text is kept as metadata["matched_chunk"]. Chunks without a stored
+    parent are returned unchanged.
+    """
+    parent_ids = [doc.metadata.get(PARENT_ID_KEY) for doc in documents]
+    parents = store.get_many(pid for pid in parent_ids if pid)
+    if not parents:
+        return documents
+
+    expanded: list[Document] = []
+    seen: set[str] = set()
+    for doc, parent_id in zip(documents, parent_ids):
+        parent = parents.get(parent_id) if parent_id else None
+        if parent is None:
+            expanded.append(doc)
+            continue
+        if parent_id in seen:
+            continue
+        seen.add(parent_id)
+        expanded.append(
+            Document(
+                id=doc.id,
+                page_content=parent.page_content,
+                metadata={**parent.metadata, **doc.metadata, "matched_chunk": doc.page_content},
+            )
+        )
+    return expanded
@@ -0,0 +1,196 @@
+"""Staged embed/upsert pipeline for ingestion.
+
+Embedding a batch and upserting it are both network-bound, so running them
+back to back leaves one side idle. run_pipeline overlaps them:
+
+    producer --(embed queue)--> N embed workers --(write queue)--> M write workers
+
+The producer (the calling thread) cuts chunks into embedding batches;
+embed workers keep up to N embedding requests in flight; write workers
+split embedded batches into upsert batches and write them concurrently.
+Both queues are bounded, so a slow stage blocks the one feeding it instead
+of buffering the whole document, and throughput is set by the slowest
+stage rather than the sum of all of them. Batch sizes, request pacing and
+retries of each request kind are governed by a BatchController
+(ingestion.throttle).
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.documents import Document
+
+from ingestion.throttle import BatchController
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+_POLL_SECONDS = 0.05
+# Estimated JSON bytes per vector component in an upsert request
+_BYTES_PER_FLOAT = 12
+
+EmbedFn = Callable[[list[str]], list[list[float]]]
+WriteFn = Callable[[list[str], list[Document], list[list[float]]], None]
+
+
+@dataclass
+class StageStats:
+    """Work done by one pipeline stage."""
+
+    name: str
+    workers: int
+    items: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Items per second the stage sustains with all workers busy (its capacity)."""
+        return self.items * self.workers / self.busy_seconds if self.busy_seconds else 0.0
+
+
+def run_pipeline(
+    ids: Sequence[str],
+    chunks: Sequence[Document],
+    embed: EmbedFn,
+    write: WriteFn,
+    *,
+    embed_control: BatchController,
+    write_control: BatchController,
+    embed_workers: int,
+    write_workers: int,
+    queue_size: int,
+) -> list[StageStats]:
+    """Embed chunks and write them with overlapping, bounded stages.
+
+    Args:
+        ids: Vector ids, one per chunk.
+        chunks: Chunks to embed and write.
+        embed: Embeds a list of texts (one request).
+        write: Writes (ids, chunks, vectors) for one upsert batch.
+        embed_control: Sizes (by text bytes), paces and retries embedding requests.
+        write_control: Sizes (by record bytes), paces and retries write calls.
+        embed_workers: Embedding requests in flight.
+        write_workers: Concurrent write calls.
+        queue_size: Capacity (in batches) of each queue between stages.
+
+    Returns:
+        Stats for the produce, embed and write stages.
+
+    Raises:
+        Exception: The first error a stage could not retry; the other stages stop.
+    """
+    embed_workers, write_workers = max(1, embed_workers), max(1, write_workers)
+    produce_stats = StageStats("produce", 1)
+    embed_stats = StageStats("embed", embed_workers)
+    write_stats = StageStats("write", write_workers)
+    embed_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    write_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    stats_lock = threading.Lock()
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    def put(q: queue.Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def record(stats: StageStats, items: int, started: float) -> None:
+        with stats_lock:
+            stats.items += items
+            stats.batches += 1
+            stats.busy_seconds += time.perf_counter() - started
+
+    def worker(step: Callable[[Any], None], source: queue.Queue) -> None:
+        try:
+            while (item := get(source)) is not _DONE:
+                step(item)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    def embed_step(item: tuple[list[str], list[Document]]) -> None:
+        batch_ids, batch = item
+        started = time.perf_counter()
+        vectors = embed_control.call(lambda docs: embed([doc.page_content for doc in docs]), batch)
+        record(embed_stats, len(batch), started)
+        put(write_queue, (batch_ids, batch, vectors))
+
+    def write_rows(rows: list[tuple[str, Document, list[float]]]) -> None:
+        write([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+
+    def write_step(item: tuple[list[str], list[Document], list[list[float]]]) -> None:
+        rows = list(zip(*item))
+        sizes = [_record_bytes(doc, vector) for _, doc, vector in rows]
+        start = 0
+        while start < len(rows):
+            count = write_control.next_batch_len(sizes, start)
+            started = time.perf_counter()
+            write_control.call(write_rows, rows[start : start + count])
+            record(write_stats, count, started)
+            start += count
+
+    embedders = [
+        threading.Thread(target=worker, args=(embed_step, embed_queue), name=f"embed-{i}", daemon=True)
+        for i in range(embed_workers)
+    ]
+    writers = [
+        threading.Thread(target=worker, args=(write_step, write_queue), name=f"write-{i}", daemon=True)
+        for i in range(write_workers)
+    ]
+    for thread in embedders + writers:
+        thread.start()
+    try:
+        sizes = [len(doc.page_content.encode("utf-8")) for doc in chunks]
+        start = 0
+        while start < len(chunks):
+            started = time.perf_counter()
+            count = embed_control.next_batch_len(sizes, start)
+            item = (list(ids[start : start + count]), list(chunks[start : start + count]))
+            if not put(embed_queue, item):
+                break
+            record(produce_stats, count, started)
+            start += count
+    finally:
+        for _ in embedders:
+            put(embed_queue, _DONE)
+        for thread in embedders:
+            thread.join()
+        for _ in writers:
+            put(write_queue, _DONE)
+        for thread in writers:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+    stages = [produce_stats, embed_stats, write_stats]
+    logger.info(
+        "Pipeline wrote %d chunk(s): %s",
+        write_stats.items,
+        ", ".join(f"{s.name} {s.throughput:.0f}/s" for s in stages),
+    )
+    return stages
+
+
+def _record_bytes(doc: Document, vector: Sequence[float]) -> int:
+    """Estimated request bytes of one upsert record (text, metadata, vector)."""
+    metadata = json.dumps(doc.metadata, default=str)
+    return len(doc.page_content.encode("utf-8")) + len(metadata) + len(vector) * _BYTES_PER_FLOAT
@@ -0,0 +1,396 @@
+"""Local BM25 sparse index, built at upsert time and fused with dense retrieval.
+
+Each namespace is a directory of immutable segments, one per upsert call:
+
+    <sparse_index_dir>/<namespace>/seg-000001/
+        terms.json        sorted vocabulary (term -> row in offsets)
+        offsets.npy       int64 [V+1], postings range of each term
+        postings_doc.npy  int32, segment-local doc ids grouped by term
+        postings_tf.npy   float32, term frequencies aligned with postings_doc
+        doc_len.npy       int32 [N], tokens per chunk
+        docs.jsonl        one {"id", "text", "metadata"} record per chunk
+        doc_offsets.npy   int64 [N+1], byte offsets of records in docs.jsonl
+
+Arrays are opened with ``mmap_mode="r"`` and records are sliced out of a
+memory map, so a loaded index costs little resident memory. IDF and average
+length are computed across all segments, so scores match a single index.
+Once there are more than settings.sparse_max_segments, the smallest segments
+are merged (size-tiered, so a chunk is rewritten a logarithmic number of
+times rather than on every compaction). Merging concatenates postings and
+records segment by segment without loading them into memory.
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import shutil
+import threading
+from collections import Counter
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+_DEFAULT_NAMESPACE = "__default__"
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens (keeps tickers, years and figures like "2024" intact)."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _Segment:
+    """One immutable, memory-mapped segment.
+
+    refs counts the searches reading it; a segment merged away (retired)
+    is closed once the last of them finishes (see SparseIndex).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.refs = 0
+        self.retired = False
+        with open(path / "terms.json", encoding="utf-8") as f:
+            self.terms: dict[str, int] = {t: i for i, t in enumerate(json.load(f))}
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self.postings_doc = np.load(path / "postings_doc.npy", mmap_mode="r")
+        self.postings_tf = np.load(path / "postings_tf.npy", mmap_mode="r")
+        self.doc_len = np.load(path / "doc_len.npy", mmap_mode="r")
+        self.doc_offsets = np.load(path / "doc_offsets.npy", mmap_mode="r")
+        self._docs_file = open(path / "docs.jsonl", "rb")
+        self._docs = (
+            mmap.mmap(self._docs_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.num_docs
+            else b""
+        )
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_len)
+
+    def postings(self, term: str) -> tuple[np.ndarray, np.ndarray] | None:
+        row = self.terms.get(term)
+        if row is None:
+            return None
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self.postings_doc[start:end], self.postings_tf[start:end]
+
+    def record(self, doc: int) -> dict[str, Any]:
+        start, end = int(self.doc_offsets[doc]), int(self.doc_offsets[doc + 1])
+        return json.loads(self._docs[start:end])
+
+    def close(self) -> None:
+        if isinstance(self._docs, mmap.mmap):
+            self._docs.close()
+        self._docs_file.close()
+
+
+def _write_segment(path: Path, records: list[dict[str, Any]]) -> None:
+    """Write records as a segment directory (via a temp dir, then an atomic rename)."""
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    counts = [Counter(tokenize(r["text"])) for r in records]
+    vocabulary = sorted({t for c in counts for t in c})
+    term_ids = {t: i for i, t in enumerate(vocabulary)}
+    postings: list[list[tuple[int, int]]] = [[] for _ in vocabulary]
+    for doc, c in enumerate(counts):
+        for term, tf in c.items():
+            postings[term_ids[term]].append((doc, tf))
+
+    offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in postings])
+    flat = [pair for p in postings for pair in p]
+    np.save(tmp / "offsets.npy", offsets)
+    np.save(tmp / "postings_doc.npy", np.array([d for d, _ in flat], dtype=np.int32))
+    np.save(tmp / "postings_tf.npy", np.array([tf for _, tf in flat], dtype=np.float32))
+    np.save(tmp / "doc_len.npy", np.array([sum(c.values()) for c in counts], dtype=np.int32))
+    with open(tmp / "terms.json", "w", encoding="utf-8") as f:
+        json.dump(vocabulary, f)
+
+    doc_offsets = [0]
+    with open(tmp / "docs.jsonl", "wb") as f:
+        for r in records:
+            line = (json.dumps(r, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            f.write(line)
+            doc_offsets.append(doc_offsets[-1] + len(line))
+    np.save(tmp / "doc_offsets.npy", np.array(doc_offsets, dtype=np.int64))
+
+    os.replace(tmp, path)
+
+
+def _output_array(path: Path, dtype: type, length: int) -> np.ndarray:
+    """Writable .npy memory map of length items (an empty array is saved directly)."""
+    if not length:
+        np.save(path, np.zeros(0, dtype=dtype))
+        return np.zeros(0, dtype=dtype)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(length,))
+
+
+def _merge_segments(path: Path, segments: Sequence[_Segment]) -> None:
+    """Write segments as one segment, streaming postings and records through memory maps."""
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    vocabulary = sorted(set().union(*(s.terms for s in segments)))
+    doc_bases = np.cumsum([0] + [s.num_docs for s in segments])
+    postings_doc = _output_array(
+        tmp / "postings_doc.npy", np.int32, sum(len(s.postings_doc) for s in segments)
+    )
+    postings_tf = _output_array(tmp / "postings_tf.npy", np.float32, len(postings_doc))
+    offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    position = 0
+    for row, term in enumerate(vocabulary):
+        for base, segment in zip(doc_bases, segments):
+            hit = segment.postings(term)
+            if hit is None:
+                continue
+            docs, tf = hit
+            postings_doc[position : position + len(docs)] = docs + base
+            postings_tf[position : position + len(docs)] = tf
+            position += len(docs)
+        offsets[row + 1] = position
+    np.save(tmp / "offsets.npy", offsets)
+    with open(tmp / "terms.json", "w", encoding="utf-8") as f:
+        json.dump(vocabulary, f)
+
+    doc_len = _output_array(tmp / "doc_len.npy", np.int32, int(doc_bases[-1]))
+    doc_offsets = _output_array(tmp / "doc_offsets.npy", np.int64, int(doc_bases[-1]) + 1)
+    byte_base = 0
+    with open(tmp / "docs.jsonl", "wb") as out:
+        for base, segment in zip(doc_bases, segments):
+            doc_len[base : base + segment.num_docs] = segment.doc_len
+            doc_offsets[base + 1 : base + segment.num_docs + 1] = segment.doc_offsets[1:] + byte_base
+            with open(segment.path / "docs.jsonl", "rb") as f:
+                shutil.copyfileobj(f, out)
+            byte_base += int(segment.doc_offsets[-1])
+    for array in (postings_doc, postings_tf, doc_len, doc_offsets):
+        if isinstance(array, np.memmap):
+            array.flush()
+    del postings_doc, postings_tf, doc_len, doc_offsets
+
+    os.replace(tmp, path)
+
+
+class SparseIndex:
+    """BM25 index over the chunks of one namespace.
+
+    Thread-safe: writers take the lock and swap in a new segment list;
+    readers search whichever list was current when they started, holding a
+    reference on its segments so compaction closes merged-away segments
+    only after the searches still reading them finish.
+    """
+
+    def __init__(self, path: str | Path, k1: float = 1.2, b: float = 0.75):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        # Guards segment reference counts and the list swap in _compact
+        self._refs_lock = threading.Lock()
+        self._segments: list[_Segment] = self._open_segments()
+
+    def _open_segments(self) -> list[_Segment]:
+        if not self.path.is_dir():
+            return []
+        return [
+            _Segment(p)
+            for p in sorted(self.path.glob("seg-*"))
+            if p.is_dir() and not p.name.endswith(".tmp")
+        ]
+
+    def __len__(self) -> int:
+        return sum(s.num_docs for s in self._segments)
+
+    @property
+    def num_segments(self) -> int:
+        return len(self._segments)
+
+    def add(self, ids: Sequence[str], documents: Sequence[Document]) -> None:
+        """Append chunks (with their vector store ids) as a new segment."""
+        records = [
+            {"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}
+            for doc_id, doc in zip(ids, documents)
+        ]
+        if not records:
+            return
+        with self._lock:
+            next_id = int(self._segments[-1].path.name.split("-")[1]) + 1 if self._segments else 1
+            segment_path = self.path / f"seg-{next_id:06d}"
+            _write_segment(segment_path, records)
+            self._segments = [*self._segments, _Segment(segment_path)]
+            if len(self._segments) > settings.sparse_max_segments:
+                self._compact()
+
+    def _compact(self) -> None:
+        """Merge the smallest segments, leaving settings.sparse_max_segments // 2 + 1 (caller holds the lock).
+
+        Large segments are only rewritten once enough similar-sized ones
+        have accumulated next to them, so repeated small adds (one per
+        upsert window) do not rewrite the whole namespace every time.
+        """
+        segments = self._segments
+        count = max(2, len(segments) - settings.sparse_max_segments // 2)
+        merged = set(sorted(segments, key=lambda s: s.num_docs)[:count])
+        old = [s for s in segments if s in merged]
+        next_id = int(segments[-1].path.name.split("-")[1]) + 1
+        merged_path = self.path / f"seg-{next_id:06d}"
+        _merge_segments(merged_path, old)
+        replacement = _Segment(merged_path)
+        with self._refs_lock:
+            self._segments = [*(s for s in segments if s not in merged), replacement]
+            for segment in old:
+                segment.retired = True
+            idle = [s for s in old if s.refs == 0]
+        # Segments still being searched are closed by the last search (_release)
+        for segment in idle:
+            segment.close()
+        for segment in old:
+            shutil.rmtree(segment.path, ignore_errors=True)
+        logger.info(
+            "Merged %d sparse segments (%d chunks)", len(old), sum(s.num_docs for s in old)
+        )
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        predicate: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> list[tuple[Document, float]]:
+        """Top-k chunks by BM25 score.
+
+        Args:
+            query: Search query string.
+            k: Maximum number of results.
+            predicate: Optional metadata test; non-matching chunks are skipped.
+
+        Returns:
+            (Document, score) pairs, best first. Documents carry their vector
+            store id so they can be matched with dense results.
+        """
+        segments = self._acquire()
+        try:
+            return self._search(segments, query, k, predicate)
+        finally:
+            self._release(segments)
+
+    def _acquire(self) -> list[_Segment]:
+        """Take a reference on the current segments (released by _release)."""
+        with self._refs_lock:
+            segments = self._segments
+            for segment in segments:
+                segment.refs += 1
+        return segments
+
+    def _release(self, segments: list[_Segment]) -> None:
+        with self._refs_lock:
+            for segment in segments:
+                segment.refs -= 1
+            idle = [s for s in segments if s.retired and s.refs == 0]
+        for segment in idle:
+            segment.close()
+
+    def _search(
+        self,
+        segments: list[_Segment],
+        query: str,
+        k: int,
+        predicate: Callable[[dict[str, Any]], bool] | None,
+    ) -> list[tuple[Document, float]]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        total_docs = sum(s.num_docs for s in segments)
+        if not terms or not total_docs or k < 1:
+            return []
+
+        avgdl = sum(float(np.sum(s.doc_len, dtype=np.int64)) for s in segments) / total_docs
+        df = {t: 0 for t in terms}
+        for segment in segments:
+            for t in terms:
+                row = segment.terms.get(t)
+                if row is not None:
+                    df[t] += int(segment.offsets[row + 1] - segment.offsets[row])
+        idf = {
+            t: float(np.log1p((total_docs - n + 0.5) / (n + 0.5))) for t, n in df.items() if n
+        }
+        if not idf:
+            return []
+
+        candidates: list[tuple[float, int, int]] = []  # (score, segment, doc)
+        for seg_no, segment in enumerate(segments):
+            scores = np.zeros(segment.num_docs, dtype=np.float32)
+            norm = self.k1 * (1.0 - self.b + self.b * np.asarray(segment.doc_len) / avgdl)
+            for t, weight in idf.items():
+                hit = segment.postings(t)
+                if hit is None:
+                    continue
+                docs, tf = hit
+                scores[docs] += weight * tf * (self.k1 + 1.0) / (tf + norm[docs])
+            matched = np.flatnonzero(scores)
+            if predicate is None and len(matched) > k:
+                matched = matched[np.argpartition(scores[matched], -k)[-k:]]
+            candidates.extend((float(scores[d]), seg_no, int(d)) for d in matched)
+
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        results: list[tuple[Document, float]] = []
+        for score, seg_no, doc in candidates:
+            record = segments[seg_no].record(doc)
+            if predicate is not None and not predicate(record["metadata"]):
+                continue
+            results.append(
+                (
+                    Document(id=record["id"], page_content=record["text"], metadata=record["metadata"]),
+                    score,
+                )
+            )
+            if len(results) == k:
+                break
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+
+
+# Open indexes per namespace (loaded lazily, shared by upsert and retrieval)
+_sparse_indexes: dict[str, SparseIndex] = {}
+_sparse_lock = threading.Lock()
+
+
+def get_sparse_index(namespace: str | None = None) -> SparseIndex | None:
+    """Return the namespace's sparse index, or None when settings.sparse_index_dir is unset."""
+    if not settings.sparse_index_dir:
+        return None
+    key = namespace or _DEFAULT_NAMESPACE
+    index = _sparse_indexes.get(key)
+    if index is None:
+        with _sparse_lock:
+            index = _sparse_indexes.get(key)
+            if index is None:
+                index = SparseIndex(
+                    Path(settings.sparse_index_dir) / key,
+                    k1=settings.bm25_k1,
+                    b=settings.bm25_b,
+                )
+                _sparse_indexes[key] = index
+    return index
+
+
+def reset_sparse_indexes() -> None:
+    """Close and forget all open sparse indexes (useful for tests)."""
+    with _sparse_lock:
+        for index in _sparse_indexes.values():
+            index.close()
+        _sparse_indexes.clear()
@@ -0,0 +1,232 @@
+"""Adaptive batch sizing, rate limiting and per-batch retries for ingestion requests.
+
+Fixed batch sizes either overflow provider request limits (long chunks) or
+waste requests (short ones), and one rate-limit error used to abort a whole
+ingest. A BatchController per pipeline stage (see ingestion.pipeline):
+
+- cuts batches by item count *and* payload bytes,
+- shrinks batches when requests get slow, rate-limited or too large, and
+  grows them back while requests stay fast,
+- paces requests with a token bucket that honours Retry-After and slows
+  down after rate-limit responses, recovering gradually,
+- retries only the batch that failed (splitting it when it was too large).
+"""
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable, Sequence
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RATE_LIMITED = 429
+_TOO_LARGE = 413
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 30.0
+
+
+def error_status(error: BaseException) -> int | None:
+    """HTTP status of a provider error (Pinecone, httpx/requests style), if any."""
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("status", "status_code"):
+            status = getattr(source, attr, None)
+            if isinstance(status, int):
+                return status
+    return None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds to wait from a Retry-After header on the error, if present."""
+    for source in (error, getattr(error, "response", None)):
+        headers = getattr(source, "headers", None)
+        if not headers:
+            continue
+        for key, value in dict(headers).items():
+            if key.lower() == "retry-after":
+                try:
+                    return max(0.0, float(value))
+                except (TypeError, ValueError):
+                    return None
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors and connection failures are worth retrying."""
+    status = error_status(error)
+    if status is not None:
+        return status == _RATE_LIMITED or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+class TokenBucket:
+    """Request pacing shared by a stage's workers.
+
+    Args:
+        rate: Requests per second (0 = unlimited, only pauses apply).
+        burst: Requests allowed back to back. Default: one second's worth.
+        clock: Time source (monotonic seconds). Overridable for tests.
+        sleep: Sleep function. Overridable for tests.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.max_rate = max(0.0, rate)
+        self.rate = self.max_rate
+        self.burst = burst if burst is not None else max(1.0, self.max_rate)
+        self._tokens = self.burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait = self._paused_until - now
+                if wait <= 0 and self.rate <= 0:
+                    return
+                if wait <= 0:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request for seconds (e.g. a Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def slow_down(self) -> None:
+        """Halve the rate after a rate-limit response (no-op when unlimited)."""
+        with self._lock:
+            if self.max_rate > 0:
+                self.rate = max(self.max_rate / 64, self.rate / 2)
+
+    def recover(self) -> None:
+        """Step the rate back toward its configured maximum after a success."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class BatchController:
+    """Batch sizing, pacing and retries for one kind of request.
+
+    Args:
+        name: Stage name for logs.
+        max_items: Upper bound on items per request.
+        max_bytes: Upper bound on estimated payload bytes per request (0 = no cap).
+        target_seconds: Request latency above which batches shrink (None = ignore latency).
+        rate: Requests per second for a private token bucket (0 = unlimited).
+        limiter: Token bucket shared with other controllers (overrides rate).
+        max_retries: Retries per failed batch before the error is raised.
+        clock: Time source (monotonic seconds). Overridable for tests.
+        sleep: Sleep function. Overridable for tests.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_items: int,
+        max_bytes: int = 0,
+        target_seconds: float | None = None,
+        rate: float = 0.0,
+        limiter: TokenBucket | None = None,
+        max_retries: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.name = name
+        self.max_items = max(1, max_items)
+        self.max_bytes = max_bytes
+        self.target_seconds = target_seconds
+        self.max_retries = max_retries
+        self.size = self.max_items
+        self.limiter = limiter or TokenBucket(rate, clock=clock, sleep=sleep)
+        self.retries = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def next_batch_len(self, sizes: Sequence[int], start: int) -> int:
+        """Items from sizes[start:] that fit the current item cap and the byte cap (at least 1)."""
+        limit = min(self.size, len(sizes) - start)
+        if not self.max_bytes:
+            return limit
+        total = 0
+        for count in range(limit):
+            total += sizes[start + count]
+            if count and total > self.max_bytes:
+                return count
+        return limit
+
+    def shrink(self) -> None:
+        with self._lock:
+            self.size = max(1, self.size // 2)
+
+    def _observe(self, seconds: float) -> None:
+        with self._lock:
+            if self.target_seconds is not None and seconds > self.target_seconds:
+                self.size = max(1, self.size // 2)
+            elif self.size < self.max_items:
+                self.size = min(self.max_items, self.size + max(1, self.size // 4))
+
+    def call(self, fn: Callable[[list[T]], Any], batch: list[T]) -> Any:
+        """Send batch through fn, pacing and retrying it until it succeeds.
+
+        A too-large (413) batch is split in two and each half sent on its own;
+        list results of the halves are concatenated.
+
+        Raises:
+            Exception: A non-retryable error, or the last error once retries run out.
+        """
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            started = self._clock()
+            try:
+                result = fn(batch)
+            except Exception as e:
+                status = error_status(e)
+                if status == _TOO_LARGE and len(batch) > 1:
+                    self.shrink()
+                    middle = len(batch) // 2
+                    logger.warning("%s request too large; splitting %d items", self.name, len(batch))
+                    first, second = self.call(fn, batch[:middle]), self.call(fn, batch[middle:])
+                    return first + second if isinstance(first, list) else None
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                wait = retry_after(e)
+                if status == _RATE_LIMITED:
+                    self.shrink()
+                    self.limiter.slow_down()
+                if wait is None:
+                    wait = min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** (attempt - 1))
+                    wait *= 0.5 + random.random() / 2
+                logger.warning(
+                    "%s request failed (%s); retrying %d item(s) in %.1fs (attempt %d/%d)",
+                    self.name, status or type(e).__name__, len(batch), wait, attempt, self.max_retries,
+                )
+                self.limiter.pause(wait)
+                continue
+            self._observe(self._clock() - started)
+            self.limiter.recover()
+            return result
@@ -1,76 +1,296 @@
 """Document chunking and vector store upsert."""
 
+import asyncio
 import logging
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, replace
+from pathlib import Path
 from typing import Any
 
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
 from langchain_pinecone import PineconeVectorStore, PineconeEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from pinecone import Pinecone, ServerlessSpec
+from pinecone import Pinecone, PineconeAsyncio, ServerlessSpec
 
 from config.settings import settings
+from ingestion.embedding_cache import CachedEmbeddings, get_embedding_cache, reset_embedding_cache
+from ingestion.local_store import LocalVectorStore
+from ingestion.manifest import chunk_id, get_chunk_manifest, reset_chunk_manifest
+from ingestion.metadata import tag_documents
+from ingestion.parents import (
+    ParentStore,
+    child_metadata,
+    get_parent_store,
+    reset_parent_store,
+    split_parents,
+)
+from ingestion.pipeline import WriteFn, run_pipeline
+from ingestion.throttle import BatchController, TokenBucket
+from ingestion.sparse import get_sparse_index, reset_sparse_indexes
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_CHUNK_SIZE = 512
 DEFAULT_CHUNK_OVERLAP = 50
+# Metadata field holding chunk text in Pinecone records (PineconeVectorStore's text_key)
+PINECONE_TEXT_KEY = "text"
 
 # Cached instances (reused across calls to avoid expensive model load and connection setup)
 _embedding_model: PineconeEmbeddings | None = None
 _pinecone_index: Any = None
-_vector_store: PineconeVectorStore | None = None
+_client_lock = threading.RLock()
+# Async clients hold aiohttp sessions bound to the event loop that created them
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[Any, Any]] = (
+    weakref.WeakKeyDictionary()
+)
+# Per-namespace write counters, bumped by every upsert (result caches compare against them)
+_namespace_versions: dict[str | None, int] = {}
+_versions_lock = threading.Lock()
+# Request pacing shared by all ingests in this process ("embed", "upsert")
+_rate_limiters: dict[str, TokenBucket] = {}
+
+
+@dataclass
+class NamespaceStats:
+    """Per-namespace vector store pool counters."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class UpsertProgress:
+    """Running totals reported by upsert_stream after each window."""
+
+    window: int
+    pages: int
+    chunks: int
+
+
+class VectorStorePool:
+    """Thread-safe, LRU-bounded pool of per-namespace vector stores.
+
+    With the Pinecone backend all stores share one embedding model and one
+    index connection; a store is only a thin namespace-scoped wrapper, so
+    evicting one is cheap. With the local backend each store maps its
+    namespace's directory (see ingestion.local_store) and holds a SQLite
+    connection, which is closed when the store is evicted or the pool cleared.
+
+    Args:
+        maxsize: Maximum number of namespaces kept in the pool.
+    """
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._stores: OrderedDict[str | None, VectorStore] = OrderedDict()
+        self._stats: dict[str | None, NamespaceStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str | None = None) -> VectorStore:
+        """Return the store for namespace, creating it on first use.
+
+        The store is built outside the lock (opening a local store reads its
+        files from disk), so lookups for other namespaces are not held up.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(namespace, NamespaceStats())
+            store = self._stores.get(namespace)
+            if store is not None:
+                self._stores.move_to_end(namespace)
+                stats.hits += 1
+                return store
+            stats.misses += 1
+
+        created = _create_vector_store(namespace)
+        evicted: list[VectorStore] = []
+        with self._lock:
+            store = self._stores.get(namespace)
+            if store is None:
+                store = self._stores[namespace] = created
+                while len(self._stores) > self.maxsize:
+                    name, old = self._stores.popitem(last=False)
+                    self._stats.setdefault(name, NamespaceStats()).evictions += 1
+                    evicted.append(old)
+                    logger.debug("Evicted vector store for namespace %r", name)
+            else:
+                # Another thread created it first; keep theirs
+                self._stores.move_to_end(namespace)
+                evicted.append(created)
+        for old in evicted:
+            _close_store(old)
+        return store
+
+    def stats(self) -> dict[str | None, NamespaceStats]:
+        """Snapshot of per-namespace hit/miss/eviction counters."""
+        with self._lock:
+            return {ns: replace(st) for ns, st in self._stats.items()}
+
+    def clear(self) -> None:
+        """Close and drop all pooled stores, and reset counters."""
+        with self._lock:
+            stores = list(self._stores.values())
+            self._stores.clear()
+            self._stats.clear()
+        for store in stores:
+            _close_store(store)
+
+    def __len__(self) -> int:
+        return len(self._stores)
+
+
+def _close_store(store: VectorStore) -> None:
+    """Close a store that holds resources (LocalVectorStore); Pinecone stores have none."""
+    close = getattr(store, "close", None)
+    if close is not None:
+        close()
+
+
+def _create_vector_store(namespace: str | None) -> VectorStore:
+    """Build the namespace's store for settings.vector_backend."""
+    backend = settings.vector_backend
+    if backend == "local":
+        return LocalVectorStore(
+            Path(settings.local_vector_dir) / (namespace or "__default__"),
+            _get_document_embeddings(),
+            dtype=settings.local_vector_dtype,
+            ivf_min_vectors=settings.local_ivf_min_vectors,
+            nprobe=settings.local_ivf_nprobe,
+        )
+    if backend != "pinecone":
+        raise ValueError(f"Unknown vector backend: {backend!r} (use 'pinecone' or 'local')")
+    store_kwargs: dict[str, Any] = {
+        "embedding": _get_document_embeddings(),
+        "index": _get_pinecone_index(),
+        "text_key": PINECONE_TEXT_KEY,
+    }
+    if namespace is not None:
+        store_kwargs["namespace"] = namespace
+    return PineconeVectorStore(**store_kwargs)
+
+
+_vector_store_pool = VectorStorePool(maxsize=settings.vector_store_pool_size)
+
 
 def _get_embedding_model() -> PineconeEmbeddings:
     """Lazy-load and cache the embedding model (avoids ~10–30s load per call)."""
     global _embedding_model
     if _embedding_model is None:
-        _embedding_model = PineconeEmbeddings(
-            model=settings.embedding_model,
-            pinecone_api_key=settings.pinecone_api_key,
-        )
+        with _client_lock:
+            if _embedding_model is None:
+                _embedding_model = PineconeEmbeddings(
+                    model=settings.embedding_model,
+                    pinecone_api_key=settings.pinecone_api_key,
+                )
     return _embedding_model
 
 
+def _get_document_embeddings() -> Embeddings:
+    """Embedding model for vector stores: passages go through the ingestion embedding cache."""
+    cache = get_embedding_cache()
+    if cache is None:
+        return _get_embedding_model()
+    return CachedEmbeddings(
+        _get_embedding_model(), cache, settings.embedding_model, settings.embedding_dimensions
+    )
+
+
 def _get_pinecone_index():
     """Lazy-load and cache the Pinecone index (reuses connection, pool_threads for parallel upserts)."""
     global _pinecone_index
     if _pinecone_index is None:
-        pc = Pinecone(
-            api_key=settings.pinecone_api_key,
-            pool_threads=settings.pinecone_pool_threads,
-        )
+        with _client_lock:
+            if _pinecone_index is None:
+                pc = Pinecone(
+                    api_key=settings.pinecone_api_key,
+                    pool_threads=settings.pinecone_pool_threads,
+                )
 
-        index_name = settings.pinecone_index_name
-        #create the Index
-        if index_name not in pc.list_indexes().names():
-            pc.create_index(name=index_name,
-                            dimension=settings.embedding_dimensions,
-                            metric="cosine",
-                            spec=ServerlessSpec(cloud="aws", region="us-east-1")
-                            )
-        _pinecone_index = pc.Index(name=index_name)
+                index_name = settings.pinecone_index_name
+                #create the Index
+                if index_name not in pc.list_indexes().names():
+                    pc.create_index(name=index_name,
+                                    dimension=settings.embedding_dimensions,
+                                    metric="cosine",
+                                    spec=ServerlessSpec(cloud="aws", region="us-east-1")
+                                    )
+                _pinecone_index = pc.Index(name=index_name)
     return _pinecone_index
 
-def get_vector_store(namespace:str = None) -> PineconeVectorStore:
-    global _vector_store
-    if _vector_store is None:
-        model = _get_embedding_model()
-        index = _get_pinecone_index()
 
-        store_kwargs: dict[str, Any] = {"embedding": model, "index": index}
-        if namespace is not None:
-            store_kwargs["namespace"] = namespace
-        _vector_store = PineconeVectorStore(**store_kwargs)
+async def get_async_clients() -> tuple[PineconeAsyncio, Any]:
+    """Return the shared (PineconeAsyncio, IndexAsyncio) pair for the running event loop.
+
+    Both reuse one aiohttp connection pool per loop, so concurrent async
+    retrievals share connections instead of opening a session per call.
+    The first call resolves the index host with the sync client (a blocking
+    describe_index request), so it runs in a worker thread, not on the loop.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.get(loop)
+    if clients is None:
+        index = await asyncio.to_thread(_get_pinecone_index)
+        # Another coroutine may have created the clients while this one awaited
+        clients = _async_clients.get(loop)
+        if clients is None:
+            client = PineconeAsyncio(api_key=settings.pinecone_api_key)
+            clients = (client, client.IndexAsyncio(host=index.config.host))
+            _async_clients[loop] = clients
+    return clients
+
+
+async def aclose_async_clients() -> None:
+    """Close the running loop's async Pinecone clients (call on application shutdown)."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), None)
+    if clients is not None:
+        client, index = clients
+        await index.close()
+        await client.close()
 
-    return _vector_store
 
+def get_vector_store(namespace: str | None = None) -> VectorStore:
+    """Return the pooled vector store for namespace (None = index default namespace).
+
+    A PineconeVectorStore, or a LocalVectorStore when settings.vector_backend is "local".
+    """
+    return _vector_store_pool.get(namespace)
+
+
+def get_vector_store_stats() -> dict[str | None, NamespaceStats]:
+    """Per-namespace hit/miss/eviction counters of the vector store pool."""
+    return _vector_store_pool.stats()
+
+
+def namespace_version(namespace: str | None = None) -> int:
+    """Number of upserts written to namespace by this process (0 before the first)."""
+    with _versions_lock:
+        return _namespace_versions.get(namespace, 0)
+
+
+def _bump_namespace_version(namespace: str | None) -> None:
+    with _versions_lock:
+        _namespace_versions[namespace] = _namespace_versions.get(namespace, 0) + 1
 
 
 def reset_upsert_cache() -> None:
-    """Clear cached model and index. Use in tests or when settings change."""
+    """Clear cached model, index, pooled stores, sparse indexes and local ingestion stores. Use in tests or when settings change."""
     global _embedding_model, _pinecone_index
-    _embedding_model = None
-    _pinecone_index = None
+    _vector_store_pool.clear()
+    reset_sparse_indexes()
+    reset_parent_store()
+    reset_chunk_manifest()
+    reset_embedding_cache()
+    with _client_lock:
+        _embedding_model = None
+        _pinecone_index = None
+        _rate_limiters.clear()
 
 
 def upsert_documents(
@@ -81,23 +301,36 @@ def upsert_documents(
     namespace: str | None = None,
     batch_size: int | None = None,
     embedding_chunk_size: int | None = None,
+    metadata: dict[str, Any] | None = None,
 ) -> list[str]:
     """Chunk documents and upsert them into Pinecone.
 
-    Documents are split with RecursiveCharacterTextSplitter, embedded via
-    HuggingFace (batched), and stored in the configured Pinecone index.
+    Documents are split with RecursiveCharacterTextSplitter, then embedded
+    and stored in the configured index by overlapping pipeline stages
+    (ingestion.pipeline: concurrent embedding requests feeding concurrent
+    upserts through bounded queues).
     Embedding model and Pinecone client are cached for reuse across calls.
+    With the parent store enabled (ingestion.parents), full pages are kept
+    locally and only compact child chunks pointing at them are indexed.
+    The chunks are also added to the namespace's local BM25 index
+    (ingestion.sparse) for hybrid retrieval, and the namespace's version
+    (namespace_version) is bumped so cached retrieval results are invalidated.
+    Chunk ids are content hashes (ingestion.manifest); chunks the namespace
+    already holds are skipped, so re-ingesting a document embeds nothing.
 
     Args:
         documents: LangChain Documents to chunk and upsert.
         chunk_size: Max characters per chunk. Default 512.
         chunk_overlap: Overlap between chunks. Default 50.
         namespace: Optional Pinecone namespace. Defaults to index default.
-        batch_size: Pinecone upsert batch size. Default from settings (64).
-        embedding_chunk_size: Docs per embedding batch. Default 500.
+        batch_size: Max vectors per upsert request. Default from settings (64).
+        embedding_chunk_size: Max texts per embedding request. Default from settings (64).
+        metadata: Extra metadata merged into every chunk, e.g. from
+            ingestion.metadata.document_metadata (company, doc_type, doc_date)
+            so retrieval can filter on it.
 
     Returns:
-        List of Pinecone document IDs for the upserted chunks.
+        Deterministic IDs of the chunks, including ones that were already indexed.
 
     Raises:
         ValueError: If documents list is empty.
@@ -106,7 +339,7 @@ def upsert_documents(
         raise ValueError("Documents list cannot be empty.")
 
     batch_size = batch_size or settings.upsert_batch_size
-    embedding_chunk_size = embedding_chunk_size or 500
+    embedding_chunk_size = embedding_chunk_size or settings.embedding_batch_size
 
     logger.info(
         "Upserting %d document(s) with chunk_size=%d, overlap=%d, batch=%d",
@@ -117,19 +350,251 @@ def upsert_documents(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
     )
-    chunks = text_splitter.split_documents(documents)
+    chunks = _split_chunks(documents, text_splitter, metadata or {}, get_parent_store())
     logger.info("Split into %d chunk(s)", len(chunks))
 
-    storage = get_vector_store()
+    storage = get_vector_store(namespace=namespace)
+    ids, written = _write_chunks(storage, chunks, namespace, _batch_controllers(embedding_chunk_size, batch_size))
+    logger.info("Indexed %d chunk(s)", len(ids))
+    if ids and not written:
+        _warn_all_skipped(len(ids), namespace)
+    return ids
+
+
+def upsert_stream(
+    documents: Iterable[Document],
+    *,
+    window_size: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    namespace: str | None = None,
+    batch_size: int | None = None,
+    embedding_chunk_size: int | None = None,
+    metadata: dict[str, Any] | None = None,
+    on_progress: Callable[[UpsertProgress], None] | None = None,
+) -> list[str]:
+    """Chunk, embed and upsert a stream of documents in fixed-size windows.
+
+    Pages are pulled from documents one at a time (e.g. from
+    ingestion.load.iter_documents) and split as they arrive; every
+    window_size chunks are embedded, upserted and added to the sparse index
+    before more pages are read. Peak memory is one window plus one page,
+    whatever the document length. Chunking, metadata and the parent store
+    work exactly as in upsert_documents.
+
+    Args:
+        documents: Documents (pages) to chunk and upsert, consumed lazily.
+        window_size: Chunks per embed/upsert window. Default from settings (256).
+        chunk_size: Max characters per chunk. Default 512.
+        chunk_overlap: Overlap between chunks. Default 50.
+        namespace: Optional Pinecone namespace. Defaults to index default.
+        batch_size: Max vectors per upsert request. Default from settings (64).
+        embedding_chunk_size: Max texts per embedding request. Default from settings (64).
+        metadata: Extra metadata merged into every chunk.
+        on_progress: Called with running totals after each window is written.
 
-    ids = storage.add_documents(
-        documents=chunks,
-        batch_size=batch_size,
-        embedding_chunk_size=embedding_chunk_size,
+    Returns:
+        IDs of the stream's chunks, upserted or already indexed (empty if the
+        stream had no text).
+    """
+    window_size = max(1, window_size or settings.upsert_window_chunks)
+    batch_size = batch_size or settings.upsert_batch_size
+    embedding_chunk_size = embedding_chunk_size or settings.embedding_batch_size
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
     )
+    parent_store = get_parent_store()
+    storage = get_vector_store(namespace=namespace)
+    # Shared by all windows, so batch sizes learned on one carry over to the next
+    controllers = _batch_controllers(embedding_chunk_size, batch_size)
 
-    logger.info("Upserted %d chunk(s) to Pinecone", len(ids))
+    ids: list[str] = []
+    written = 0
+    pending: list[Document] = []
+    progress = UpsertProgress(window=0, pages=0, chunks=0)
+
+    def flush(window: list[Document]) -> None:
+        nonlocal written
+        window_ids, window_written = _write_chunks(storage, window, namespace, controllers)
+        ids.extend(window_ids)
+        written += window_written
+        progress.window += 1
+        progress.chunks += len(window)
+        logger.info(
+            "Window %d: upserted %d chunk(s) (%d page(s), %d chunk(s) so far)",
+            progress.window, len(window), progress.pages, progress.chunks,
+        )
+        if on_progress is not None:
+            on_progress(replace(progress))
+
+    for document in documents:
+        progress.pages += 1
+        pending.extend(_split_chunks([document], text_splitter, metadata or {}, parent_store))
+        while len(pending) >= window_size:
+            window, pending = pending[:window_size], pending[window_size:]
+            flush(window)
+    if pending:
+        flush(pending)
+    if ids and not written:
+        _warn_all_skipped(len(ids), namespace)
     return ids
 
 
+def _warn_all_skipped(count: int, namespace: str | None) -> None:
+    logger.warning(
+        "All %d chunk(s) were already indexed in namespace %r according to the chunk manifest; "
+        "nothing was written. If the index was rebuilt or emptied, clear the manifest "
+        "(get_chunk_manifest().clear(namespace)) and ingest again.",
+        count, namespace,
+    )
+
+def _split_chunks(
+    documents: list[Document],
+    text_splitter: RecursiveCharacterTextSplitter,
+    metadata: dict[str, Any],
+    parent_store: ParentStore | None,
+) -> list[Document]:
+    """Tagged chunks of documents; with a parent store, compact children of stored parents."""
+    if parent_store is None:
+        return tag_documents(text_splitter.split_documents(documents), metadata)
+    parents = tag_documents(split_parents(documents, settings.parent_max_chars), metadata)
+    chunks = []
+    for parent, parent_id in zip(parents, parent_store.put_many(parents)):
+        for chunk in text_splitter.split_documents([parent]):
+            chunk.metadata = child_metadata(chunk.metadata, parent_id)
+            chunks.append(chunk)
+    logger.debug("Stored %d parent passage(s)", len(parents))
+    return chunks
+
+
+def _get_rate_limiter(kind: str) -> TokenBucket:
+    """Process-wide token bucket for "embed" or "upsert" requests."""
+    with _client_lock:
+        limiter = _rate_limiters.get(kind)
+        if limiter is None:
+            rate = settings.embedding_rate_limit if kind == "embed" else settings.upsert_rate_limit
+            limiter = _rate_limiters[kind] = TokenBucket(rate)
+        return limiter
+
+
+def _batch_controllers(
+    embedding_batch_size: int, batch_size: int
+) -> tuple[BatchController, BatchController]:
+    """Adaptive (embed, upsert) controllers capped at the given batch sizes."""
+    embed = BatchController(
+        "embed",
+        max_items=embedding_batch_size,
+        max_bytes=settings.embedding_max_request_bytes,
+        target_seconds=settings.ingest_target_latency_seconds,
+        limiter=_get_rate_limiter("embed"),
+        max_retries=settings.ingest_max_retries,
+    )
+    upsert = BatchController(
+        "upsert",
+        max_items=batch_size,
+        max_bytes=settings.upsert_max_request_bytes,
+        target_seconds=settings.ingest_target_latency_seconds,
+        limiter=_get_rate_limiter("upsert"),
+        max_retries=settings.ingest_max_retries,
+    )
+    return embed, upsert
+
+
+def _write_chunks(
+    storage: VectorStore,
+    chunks: list[Document],
+    namespace: str | None,
+    controllers: tuple[BatchController, BatchController],
+) -> tuple[list[str], int]:
+    """Embed and upsert the chunks namespace does not have yet.
+
+    Ids are content hashes (ingestion.manifest.chunk_id). Chunks already in
+    the namespace's manifest, or repeated within chunks, are skipped; the new
+    ones go through the staged embed/upsert pipeline (ingestion.pipeline),
+    are added to the sparse index and recorded, and the namespace version is
+    bumped.
+
+    Returns:
+        A (chunk_ids, written) tuple: ids of all chunks in order (repeats
+        collapsed), and the number of chunks actually embedded and upserted
+        (0 when all of them were already indexed).
+    """
+    unique: dict[str, Document] = {}
+    for chunk in chunks:
+        unique.setdefault(chunk_id(chunk), chunk)
+    manifest = get_chunk_manifest()
+    existing = manifest.existing(namespace, unique) if manifest is not None else set()
+    if existing and not _manifest_matches_store(storage, namespace, existing):
+        logger.warning(
+            "Chunk manifest lists vectors namespace %r no longer holds; clearing it and re-ingesting",
+            namespace,
+        )
+        manifest.clear(namespace)
+        existing = set()
+    new_ids = [i for i in unique if i not in existing]
+    if len(new_ids) < len(chunks):
+        logger.info(
+            "Skipping %d already indexed or repeated chunk(s)", len(chunks) - len(new_ids)
+        )
+    if not new_ids:
+        return list(unique), 0
+
+    new_chunks = [unique[i] for i in new_ids]
+    run_pipeline(
+        new_ids,
+        new_chunks,
+        storage.embeddings.embed_documents,
+        _vector_writer(storage, namespace),
+        embed_control=controllers[0],
+        write_control=controllers[1],
+        embed_workers=settings.embedding_concurrency,
+        write_workers=settings.pinecone_pool_threads,
+        queue_size=settings.ingest_queue_batches,
+    )
+    if manifest is not None:
+        manifest.add_many(namespace, new_ids)
+    sparse_index = get_sparse_index(namespace)
+    if sparse_index is not None:
+        try:
+            sparse_index.add(new_ids, new_chunks)
+        except OSError as e:
+            # Chunks are already in Pinecone; hybrid retrieval just misses them lexically
+            logger.warning("Sparse index update failed: %s", e)
+    _bump_namespace_version(namespace)
+    return list(unique), len(new_ids)
+
+
+def _manifest_matches_store(storage: VectorStore, namespace: str | None, ids: set[str]) -> bool:
+    """Whether a sample of ids the manifest lists as indexed are really in storage."""
+    sample = sorted(ids)[: settings.chunk_manifest_verify_sample]
+    if not sample:
+        return True
+    if isinstance(storage, LocalVectorStore):
+        found = storage.existing_ids(sample)
+    else:
+        found = set(storage.index.fetch(ids=sample, namespace=namespace).vectors)
+    return len(found) == len(sample)
+
+
+def _vector_writer(storage: VectorStore, namespace: str | None) -> WriteFn:
+    """Write function storing precomputed vectors in storage (one upsert request per call)."""
+    if isinstance(storage, LocalVectorStore):
+        def write_local(ids: list[str], chunks: list[Document], vectors: list[list[float]]) -> None:
+            storage.add_vectors(ids, [c.page_content for c in chunks], [c.metadata for c in chunks], vectors)
+
+        return write_local
+
+    index = storage.index
+
+    def write_pinecone(ids: list[str], chunks: list[Document], vectors: list[list[float]]) -> None:
+        # Same record layout as PineconeVectorStore.add_texts: chunk text under the text key
+        index.upsert(
+            vectors=[
+                (i, v, {**c.metadata, PINECONE_TEXT_KEY: c.page_content})
+                for i, c, v in zip(ids, chunks, vectors)
+            ],
+            namespace=namespace,
+        )
 
+    return write_pinecone
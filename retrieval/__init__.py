@@ -1,15 +1,45 @@
 """Retrieval module for RAG document search and reranking."""
 
+from retrieval.cascade import cascade_stats
+from retrieval.dedup import dedup_stats
+from retrieval.filters import MetadataFilter
+from retrieval.metrics import registry as metrics_registry
 from retrieval.retriever import (
+    aretrieve_many,
+    aretrieve_with_rerank,
+    aretriever,
+    arerank,
+    get_query_embedding_cache,
+    get_rerank_dispatcher,
+    get_rerank_score_cache,
+    get_result_cache,
     retriever,
     retrieve_with_rerank,
+    retrieve_many,
     rerank,
+    rerank_many,
     reset_retriever_cache,
+    warm_up,
 )
 
 __all__ = [
+    "MetadataFilter",
+    "aretrieve_many",
+    "aretrieve_with_rerank",
+    "aretriever",
+    "arerank",
+    "cascade_stats",
+    "dedup_stats",
+    "get_query_embedding_cache",
+    "get_rerank_dispatcher",
+    "get_rerank_score_cache",
+    "get_result_cache",
+    "metrics_registry",
     "retriever",
     "retrieve_with_rerank",
+    "retrieve_many",
     "rerank",
+    "rerank_many",
     "reset_retriever_cache",
+    "warm_up",
 ]
@@ -0,0 +1,176 @@
+"""Dynamic micro-batching of reranker calls across threads."""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+ScoreFn = Callable[[list[tuple[str, str]]], list[float]]
+
+
+@dataclass
+class DispatcherStats:
+    """Batch-size and queue-latency counters for a RerankDispatcher."""
+
+    batches: int = 0
+    requests: int = 0
+    pairs: int = 0
+    max_batch_pairs: int = 0
+    total_queue_seconds: float = 0.0
+    max_queue_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def mean_batch_pairs(self) -> float:
+        return self.pairs / self.batches if self.batches else 0.0
+
+    @property
+    def mean_requests_per_batch(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+    @property
+    def mean_queue_ms(self) -> float:
+        return 1000 * self.total_queue_seconds / self.requests if self.requests else 0.0
+
+    def record(self, pairs: int, queue_seconds: list[float]) -> None:
+        with self._lock:
+            self.batches += 1
+            self.requests += len(queue_seconds)
+            self.pairs += pairs
+            self.max_batch_pairs = max(self.max_batch_pairs, pairs)
+            self.total_queue_seconds += sum(queue_seconds)
+            self.max_queue_seconds = max(self.max_queue_seconds, *queue_seconds)
+
+
+@dataclass
+class _Request:
+    pairs: list[tuple[str, str]]
+    future: Future
+    enqueued_at: float
+
+
+class RerankDispatcher:
+    """Gather rerank requests from many threads and score them in shared batches.
+
+    A single worker thread takes the first pending request, then keeps
+    collecting requests until max_batch_size pairs are queued or max_wait_ms
+    has passed, runs one forward pass and hands each caller its slice of the
+    scores. Requests larger than max_batch_size are scored on their own.
+    The wait only applies while callers are concurrent (something else is
+    queued, or the previous batch served several requests); a lone caller
+    is scored immediately.
+
+    Args:
+        score_fn: Scores a list of (query, passage) pairs in one call.
+        max_batch_size: Maximum pairs per forward pass.
+        max_wait_ms: Maximum time to hold the first request while gathering more.
+    """
+
+    def __init__(self, score_fn: ScoreFn, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self._score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self.stats = DispatcherStats()
+        self._queue: queue.Queue[_Request | None] = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._concurrent = False
+
+    def submit(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """Score pairs, sharing a forward pass with concurrent callers. Blocks until done.
+
+        Raises:
+            RuntimeError: If the dispatcher is closed.
+        """
+        if not pairs:
+            return []
+        future: Future = Future()
+        # Checked and enqueued under the lock, so no request lands behind close()'s sentinel
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RerankDispatcher is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="rerank-dispatcher", daemon=True
+                )
+                self._worker.start()
+            self._queue.put(_Request(list(pairs), future, time.perf_counter()))
+        return future.result()
+
+    def close(self) -> None:
+        """Stop the worker thread after pending requests are served."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            self._worker = None
+            if worker is not None:
+                self._queue.put(None)
+        if worker is not None:
+            worker.join()
+        # Only reachable if the worker died; never leave a caller blocked
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and not request.future.done():
+                request.future.set_exception(RuntimeError("RerankDispatcher is closed"))
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            n_pairs = len(first.pairs)
+            wait = self.max_wait_seconds if self._concurrent or not self._queue.empty() else 0.0
+            deadline = time.perf_counter() + wait
+            stop = False
+            while n_pairs < self.max_batch_size:
+                try:
+                    # A zero timeout still takes requests that are already queued
+                    request = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                if n_pairs + len(request.pairs) > self.max_batch_size:
+                    # Does not fit: score the current batch, then start the next with it
+                    self._execute(batch, n_pairs)
+                    batch, n_pairs = [request], len(request.pairs)
+                    deadline = time.perf_counter() + self.max_wait_seconds
+                    continue
+                batch.append(request)
+                n_pairs += len(request.pairs)
+            self._execute(batch, n_pairs)
+            if stop:
+                return
+
+    def _execute(self, batch: list[_Request], n_pairs: int) -> None:
+        self._concurrent = len(batch) > 1
+        started = time.perf_counter()
+        pairs = [p for request in batch for p in request.pairs]
+        try:
+            scores = self._score_fn(pairs)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        self.stats.record(n_pairs, [started - r.enqueued_at for r in batch])
+        offset = 0
+        for request in batch:
+            request.future.set_result(scores[offset : offset + len(request.pairs)])
+            offset += len(request.pairs)
+        logger.debug("Scored %d pairs for %d request(s) in one batch", n_pairs, len(batch))
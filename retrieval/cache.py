@@ -0,0 +1,452 @@
+"""Bounded caches for the retrieval path (query embeddings, reranker scores, results)."""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss/eviction counters for a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """Thread-safe LRU cache with optional per-entry TTL.
+
+    Args:
+        maxsize: Maximum number of entries. Least recently used entries are evicted.
+        ttl_seconds: Entry lifetime in seconds. None means entries never expire.
+        clock: Time source (monotonic seconds). Overridable for tests.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value or None (counts a hit or miss)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl_seconds is not None and self._clock() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insert or refresh an entry, evicting the least recently used if full."""
+        with self._lock:
+            self._data[key] = (value, self._clock())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache keys: casefold and collapse whitespace."""
+    return " ".join(query.split()).casefold()
+
+
+def text_hash(*parts: str) -> str:
+    """Stable SHA-256 hex digest of one or more strings (used for cache keys)."""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+class QueryEmbeddingCache:
+    """Query-embedding cache keyed by (embedding_model, normalized query).
+
+    An in-memory LRU tier with TTL sits in front of an optional SQLite tier so
+    that embeddings survive restarts. Vectors are stored on disk as float32 blobs.
+    Writes to the disk tier delete expired rows and evict the least recently
+    used ones beyond max_disk_entries, so the file stays bounded.
+
+    Args:
+        maxsize: Maximum in-memory entries.
+        ttl_seconds: Entry lifetime (applies to both tiers). None disables expiry.
+        path: Optional SQLite file for the on-disk tier.
+        max_disk_entries: Row cap for the on-disk tier. None leaves it unbounded.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_seconds: float | None = None,
+        path: str | Path | None = None,
+        max_disk_entries: int | None = None,
+    ):
+        if max_disk_entries is not None and max_disk_entries < 1:
+            raise ValueError("max_disk_entries must be at least 1")
+        self._memory = LRUCache(maxsize, ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.disk_evictions = 0
+        self.path = Path(path) if path else None
+        self._disk_lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.disk_hits = 0
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(query_embeddings)")}
+            if columns and "used_at" not in columns:
+                # Files written before the disk tier was bounded; it is only a cache
+                self._conn.execute("DROP TABLE query_embeddings")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, "
+                "vector BLOB NOT NULL, created_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS query_embeddings_used_at ON query_embeddings (used_at)"
+            )
+            self._conn.commit()
+
+    @property
+    def stats(self) -> CacheStats:
+        """In-memory tier counters (memory misses served from disk are in disk_hits)."""
+        return self._memory.stats
+
+    @staticmethod
+    def key(model: str, query: str) -> str:
+        return text_hash(model, normalize_query(query))
+
+    def _disk_get(self, key: str) -> list[float] | None:
+        if self._conn is None:
+            return None
+        now = time.time()
+        with self._disk_lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            blob, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM query_embeddings WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE query_embeddings SET used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return array("f", blob).tolist()
+
+    def _disk_put_many(self, items: list[tuple[str, list[float]]]) -> None:
+        if self._conn is None or not items:
+            return
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now, now) for key, vector in items]
+        with self._disk_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            if self.ttl_seconds is not None:
+                self._conn.execute(
+                    "DELETE FROM query_embeddings WHERE created_at < ?", (now - self.ttl_seconds,)
+                )
+            if self.max_disk_entries is not None:
+                count = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+                excess = count - self.max_disk_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM query_embeddings WHERE key IN "
+                        "(SELECT key FROM query_embeddings ORDER BY used_at LIMIT ?)",
+                        (excess,),
+                    )
+                    self.disk_evictions += excess
+            self._conn.commit()
+
+    def get_many(self, model: str, queries: Sequence[str]) -> list[list[float] | None]:
+        """Look up embeddings for queries; None marks a miss in both tiers."""
+        results: list[list[float] | None] = []
+        for query in queries:
+            key = self.key(model, query)
+            vector = self._memory.get(key)
+            if vector is None:
+                vector = self._disk_get(key)
+                if vector is not None:
+                    self._memory.put(key, vector)
+                    self.disk_hits += 1
+            results.append(vector)
+        return results
+
+    def put_many(
+        self,
+        model: str,
+        queries: Sequence[str],
+        vectors: Sequence[list[float]],
+    ) -> None:
+        """Store embeddings for queries in both tiers."""
+        items = [(self.key(model, q), list(v)) for q, v in zip(queries, vectors)]
+        for key, vector in items:
+            self._memory.put(key, vector)
+        self._disk_put_many(items)
+
+    def clear(self) -> None:
+        """Drop the in-memory tier (the on-disk tier is left intact)."""
+        self._memory.clear()
+        self.disk_hits = 0
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._disk_lock:
+                self._conn.close()
+            self._conn = None
+
+
+class RerankScoreCache:
+    """Cross-encoder score cache keyed by (scorer, query hash, chunk content hash).
+
+    Stores normalized scores in a size-bounded LRU so repeated (query, chunk)
+    pairs skip the model. The scorer string must identify everything that
+    changes a score (model, backend and precision, max length), so scores
+    from one reranker configuration are never served to another.
+
+    Args:
+        maxsize: Maximum number of cached scores.
+    """
+
+    def __init__(self, maxsize: int):
+        self._memory = LRUCache(maxsize)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._memory.stats
+
+    @staticmethod
+    def key(scorer: str, query: str, passage: str) -> tuple[str, str, str]:
+        return (scorer, text_hash(query), text_hash(passage))
+
+    def get_many(self, scorer: str, pairs: Sequence[tuple[str, str]]) -> list[float | None]:
+        """Look up scores for (query, passage) pairs; None marks a miss."""
+        return [self._memory.get(self.key(scorer, q, p)) for q, p in pairs]
+
+    def put_many(
+        self,
+        scorer: str,
+        pairs: Sequence[tuple[str, str]],
+        scores: Sequence[float],
+    ) -> None:
+        """Store scores for (query, passage) pairs."""
+        for (q, p), score in zip(pairs, scores):
+            self._memory.put(self.key(scorer, q, p), float(score))
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+
+# Numbers and figures (2023, Q3, $16.6, 10-K) and capitalized words (companies, tickers)
+_SIGNATURE_RE = re.compile(r"[$€£]?\w*\d[\w.,%-]*|\b[A-Z][\w&'.-]*")
+# Capitalized only because they open a question
+_SIGNATURE_STOPWORDS = frozenset(
+    "what which who whom whose when where why how is are was were do does did can could "
+    "should would will the a an in on of for and or compare list show give tell summarize "
+    "describe explain".split()
+)
+
+
+def query_signature(query: str) -> frozenset[str]:
+    """Numbers and entity names of a query, which a semantic cache hit must share.
+
+    Queries that differ only in a year or a company ("Apple revenue 2023" vs
+    "Apple revenue 2022") embed almost identically but ask for different facts.
+    """
+    tokens = (t.lower().rstrip(".,'") for t in _SIGNATURE_RE.findall(query))
+    return frozenset(t.removesuffix("'s") for t in tokens if t and t not in _SIGNATURE_STOPWORDS)
+
+
+@dataclass
+class _ResultEntry:
+    scope: tuple[str | None, Hashable]
+    vector: np.ndarray
+    documents: list[Document]
+    version: int
+    stored_at: float
+
+
+class SemanticResultCache:
+    """Final retrieval results looked up by query-embedding nearest neighbour.
+
+    A query hits when a cached query in the same scope (namespace plus the
+    other result-affecting arguments) has cosine similarity >= threshold with
+    it, so paraphrases of one question share a single search and rerank.
+    Callers put the query's signature (query_signature) in the scope key so
+    near-identical queries about different years or companies never share a
+    result. Each entry records its namespace's version when it was computed;
+    entries of a namespace that has been written to since are dropped on
+    lookup. Versions are per process: writes made by another process or
+    replica are only picked up when the entries expire (ttl_seconds).
+
+    Args:
+        maxsize: Maximum cached results, LRU-evicted across all scopes.
+        threshold: Minimum cosine similarity for a hit.
+        version: Current write version of a namespace
+            (ingestion.upsert.namespace_version).
+        ttl_seconds: Entry lifetime in seconds. None means entries never expire.
+        clock: Time source (monotonic seconds). Overridable for tests.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        threshold: float,
+        version: Callable[[str | None], int],
+        ttl_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._version = version
+        self._clock = clock
+        self._entries: OrderedDict[int, _ResultEntry] = OrderedDict()
+        self._scopes: dict[tuple[str | None, Hashable], dict[int, None]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def version(self, namespace: str | None) -> int:
+        """Namespace version to pass to put() (read it before computing the result)."""
+        return self._version(namespace)
+
+    def get(
+        self,
+        namespace: str | None,
+        key: Hashable,
+        vector: Sequence[float],
+    ) -> list[Document] | None:
+        """Copies of the nearest cached result in scope, or None (counts a hit or miss)."""
+        query = _unit(vector)
+        scope = (namespace, key)
+        current = self._version(namespace)
+        with self._lock:
+            live: list[tuple[int, _ResultEntry]] = []
+            now = self._clock()
+            for entry_id in list(self._scopes.get(scope, ())):
+                entry = self._entries[entry_id]
+                if entry.version != current:
+                    self._remove(entry_id)
+                    self.stats.invalidations += 1
+                elif self.ttl_seconds is not None and now - entry.stored_at > self.ttl_seconds:
+                    self._remove(entry_id)
+                    self.stats.expirations += 1
+                elif len(entry.vector) == len(query):
+                    live.append((entry_id, entry))
+            if live:
+                similarities = np.stack([e.vector for _, e in live]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = live[best]
+                    self._entries.move_to_end(entry_id)
+                    self.stats.hits += 1
+                    return _copy_documents(entry.documents)
+            self.stats.misses += 1
+            return None
+
+    def put(
+        self,
+        namespace: str | None,
+        key: Hashable,
+        vector: Sequence[float],
+        documents: list[Document],
+        version: int,
+    ) -> None:
+        """Cache a result computed at version (skipped if the namespace has changed since)."""
+        if version != self._version(namespace):
+            return
+        scope = (namespace, key)
+        entry = _ResultEntry(scope, _unit(vector), _copy_documents(documents), version, self._clock())
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._scopes.setdefault(scope, {})[entry_id] = None
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def invalidate(self, namespace: str | None) -> None:
+        """Drop every cached result of namespace."""
+        with self._lock:
+            for entry_id in [i for i, e in self._entries.items() if e.scope[0] == namespace]:
+                self._remove(entry_id)
+                self.stats.invalidations += 1
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        ids = self._scopes[entry.scope]
+        del ids[entry_id]
+        if not ids:
+            del self._scopes[entry.scope]
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    values = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(values))
+    return values / norm if norm else values
+
+
+def _copy_documents(documents: list[Document]) -> list[Document]:
+    """Callers annotate result metadata in place, so the cache never shares documents."""
+    return [doc.model_copy(deep=True) for doc in documents]
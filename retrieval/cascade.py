@@ -0,0 +1,123 @@
+"""Reranker cascade: a cheap first-pass scorer in front of the cross-encoder."""
+
+import re
+import threading
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+from config import settings
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+@dataclass
+class CascadeStats:
+    """Counters showing how often each cascade stage short-circuits."""
+
+    calls: int = 0
+    skipped: int = 0  # cross-encoder skipped: top-k vector scores clearly separated
+    reranked: int = 0  # cross-encoder ran on the surviving candidates
+    candidates_in: int = 0
+    candidates_pruned: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def skip_rate(self) -> float:
+        return self.skipped / self.calls if self.calls else 0.0
+
+    @property
+    def prune_rate(self) -> float:
+        return self.candidates_pruned / self.candidates_in if self.candidates_in else 0.0
+
+    def record(self, candidates: int, pruned: int, skipped: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.candidates_in += candidates
+            self.candidates_pruned += pruned
+            if skipped:
+                self.skipped += 1
+            else:
+                self.reranked += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = self.skipped = self.reranked = 0
+            self.candidates_in = self.candidates_pruned = 0
+
+
+cascade_stats = CascadeStats()
+
+
+def _terms(text: str) -> set[str]:
+    return {t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 2 or t.isdigit()}
+
+
+def lexical_overlap(query: str, text: str) -> float:
+    """Fraction of query terms that appear in text (0.0-1.0)."""
+    query_terms = _terms(query)
+    if not query_terms:
+        return 0.0
+    return len(query_terms & _terms(text)) / len(query_terms)
+
+
+def cheap_score(query: str, doc: Document) -> float:
+    """First-pass score: vector similarity plus weighted lexical overlap."""
+    vector_score = float(doc.metadata.get("vector_score", 0.0))
+    return vector_score + settings.rerank_cascade_lexical_weight * lexical_overlap(
+        query, doc.page_content
+    )
+
+
+def apply_cascade(
+    query: str,
+    documents: list[Document],
+    k: int,
+) -> tuple[list[Document] | None, list[Document]]:
+    """Run the cheap stages of the cascade.
+
+    Stage 1 skips the cross-encoder entirely when the k-th and (k+1)-th vector
+    scores are separated by at least settings.rerank_cascade_skip_margin; the
+    top k by vector score are then final and marked metadata["rerank_skipped"]
+    (they carry no rerank_score). Stage 1 never applies when a positive
+    settings.reranker_threshold is set (vector scores cannot be held to it) or
+    when a candidate has no vector score (sparse-only hits are not comparable).
+    Stage 2 ranks candidates by
+    cheap_score and drops those trailing the best by more than
+    settings.rerank_cascade_prune_margin, keeping at most
+    settings.rerank_cascade_max_candidates (never fewer than k).
+
+    Args:
+        query: Search query string.
+        documents: Vector-search candidates (with metadata["vector_score"]).
+        k: Number of documents the caller will keep after reranking.
+
+    Returns:
+        (final, to_rerank): final is the result list when stage 1 short-circuits
+        (else None); to_rerank holds the candidates for the cross-encoder.
+    """
+    can_skip = settings.reranker_threshold <= 0 and all(
+        "vector_score" in d.metadata for d in documents
+    )
+    if can_skip and 0 < k < len(documents):
+        by_vector = sorted(documents, key=lambda d: d.metadata["vector_score"], reverse=True)
+        gap = by_vector[k - 1].metadata["vector_score"] - by_vector[k].metadata["vector_score"]
+        if gap >= settings.rerank_cascade_skip_margin:
+            cascade_stats.record(len(documents), len(documents) - k, skipped=True)
+            final = by_vector[:k]
+            for doc in final:
+                doc.metadata["rerank_skipped"] = True
+            return final, []
+
+    scored = sorted(
+        ((cheap_score(query, d), d) for d in documents), key=lambda x: x[0], reverse=True
+    )
+    keep_max = max(k, settings.rerank_cascade_max_candidates)
+    best = scored[0][0] if scored else 0.0
+    survivors = [
+        d
+        for i, (score, d) in enumerate(scored)
+        if i < keep_max and (i < k or best - score <= settings.rerank_cascade_prune_margin)
+    ]
+    cascade_stats.record(len(documents), len(documents) - len(survivors), skipped=False)
+    return None, survivors
@@ -0,0 +1,85 @@
+"""Near-duplicate collapsing of retrieval candidates before reranking."""
+
+import re
+import threading
+import zlib
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+_WORD_RE = re.compile(r"\w+")
+SHINGLE_SIZE = 3
+
+
+@dataclass
+class DedupStats:
+    """Counters for the dedup stage."""
+
+    calls: int = 0
+    candidates_in: int = 0
+    dropped: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def drop_rate(self) -> float:
+        return self.dropped / self.candidates_in if self.candidates_in else 0.0
+
+    def record(self, candidates: int, dropped: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.candidates_in += candidates
+            self.dropped += dropped
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = self.candidates_in = self.dropped = 0
+
+
+dedup_stats = DedupStats()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> frozenset[int]:
+    """Hashed word n-grams of text, ignoring case, punctuation and whitespace layout.
+
+    PDF and HTML renderings of the same filing differ mostly in layout, so
+    their shingle sets overlap almost completely.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return frozenset([zlib.crc32(" ".join(words).encode("utf-8"))]) if words else frozenset()
+    return frozenset(
+        zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    )
+
+
+def jaccard(a: frozenset[int], b: frozenset[int]) -> float:
+    """Jaccard similarity of two shingle sets (1.0 for two empty sets)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def collapse_near_duplicates(documents: list[Document], threshold: float) -> list[Document]:
+    """Drop candidates whose shingle Jaccard similarity to an earlier one is >= threshold.
+
+    Candidates arrive ordered by vector score, so the first copy (the best
+    match) is kept and later near-copies are dropped.
+
+    Args:
+        documents: Candidates from vector search, best first.
+        threshold: Similarity (0-1) at or above which two chunks are duplicates.
+
+    Returns:
+        The de-duplicated candidates in their original order.
+    """
+    kept: list[Document] = []
+    kept_shingles: list[frozenset[int]] = []
+    for doc in documents:
+        doc_shingles = shingles(doc.page_content)
+        if any(jaccard(doc_shingles, other) >= threshold for other in kept_shingles):
+            continue
+        kept.append(doc)
+        kept_shingles.append(doc_shingles)
+    dedup_stats.record(len(documents), len(documents) - len(kept))
+    return kept
@@ -0,0 +1,69 @@
+"""Metadata filters pushed down to the vector store as server-side Pinecone filters."""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from ingestion.metadata import date_key, match_filter, normalize_company
+
+
+@dataclass(frozen=True)
+class MetadataFilter:
+    """Restrict vector search to chunks whose metadata matches every set field.
+
+    Frozen (hashable) so batched chain inputs can be grouped by filter; it
+    is also part of the retrieval cache keys. Dates are normalized to
+    ``date`` on construction, so "2024-01-01" and date(2024, 1, 1) make the
+    same filter. Fields match the metadata written by
+    ingestion.metadata.document_metadata; source matches the loader's
+    ``source`` (file path or URL) exactly.
+
+    Raises:
+        ValueError: If a date string is not an ISO date (YYYY-MM-DD).
+    """
+
+    company: str | None = None
+    source: str | None = None
+    doc_type: str | None = None
+    date_from: date | str | None = None
+    date_to: date | str | None = None
+
+    def __post_init__(self) -> None:
+        for name in ("date_from", "date_to"):
+            value = getattr(self, name)
+            if value:
+                key = date_key(value)
+                object.__setattr__(self, name, date(key // 10000, key // 100 % 100, key % 100))
+
+    @classmethod
+    def coerce(cls, value: "MetadataFilter | dict[str, Any] | None") -> "MetadataFilter | None":
+        """Accept a MetadataFilter, a dict of its fields (chain input) or None."""
+        if value is None or isinstance(value, MetadataFilter):
+            return value
+        if isinstance(value, dict):
+            return cls(**value)
+        raise TypeError(f"filter must be a MetadataFilter or dict, got {type(value).__name__}")
+
+    def to_pinecone(self) -> dict[str, Any] | None:
+        """Pinecone filter expression (fields ANDed), or None when nothing is set."""
+        clauses: dict[str, Any] = {}
+        if self.company:
+            clauses["company"] = {"$eq": normalize_company(self.company)}
+        if self.source:
+            clauses["source"] = {"$eq": self.source}
+        if self.doc_type:
+            clauses["doc_type"] = {"$eq": self.doc_type.strip().casefold()}
+        date_range: dict[str, int] = {}
+        if self.date_from:
+            date_range["$gte"] = date_key(self.date_from)
+        if self.date_to:
+            date_range["$lte"] = date_key(self.date_to)
+        if date_range:
+            clauses["doc_date"] = date_range
+        return clauses or None
+
+    def matches(self, metadata: dict[str, Any]) -> bool:
+        """Evaluate the filter locally (same semantics as to_pinecone), e.g. for the BM25 index."""
+        expression = self.to_pinecone()
+        return expression is None or match_filter(metadata, expression)
+
@@ -0,0 +1,65 @@
+"""Hybrid retrieval: local BM25 hits fused with dense candidates by reciprocal rank fusion."""
+
+from langchain_core.documents import Document
+
+import retrieval.metrics as metrics
+from ingestion.sparse import get_sparse_index
+from retrieval.cache import text_hash
+from retrieval.filters import MetadataFilter
+
+
+def sparse_search(
+    query: str,
+    k: int,
+    namespace: str | None = None,
+    metadata_filter: MetadataFilter | None = None,
+) -> list[Document]:
+    """Top-k chunks from the namespace's local BM25 index ([] when it is empty or disabled).
+
+    Results carry metadata["bm25_score"]; the metadata filter is applied locally
+    with the same semantics as the Pinecone filter.
+    """
+    index = get_sparse_index(namespace)
+    if index is None or not len(index):
+        return []
+    predicate = metadata_filter.matches if metadata_filter else None
+    with metrics.timed("sparse_search"):
+        results = index.search(query, k, predicate=predicate)
+    docs = []
+    for doc, score in results:
+        doc.metadata["bm25_score"] = round(score, 4)
+        docs.append(doc)
+    return docs
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[Document]],
+    k: int,
+    rrf_k: int = 60,
+) -> list[Document]:
+    """Fuse ranked lists: each document scores sum(1 / (rrf_k + rank)) over the lists it is in.
+
+    Documents are matched by content, so a chunk found by both searches is kept
+    once (the first list's copy) with the metadata of both, e.g. vector_score
+    and bm25_score.
+
+    Args:
+        rankings: Ranked document lists, best first (dense list first).
+        k: Maximum number of fused documents.
+        rrf_k: Rank damping constant (60 in the original RRF paper).
+
+    Returns:
+        Up to k documents ordered by fused score; ties keep input order.
+    """
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = text_hash(doc.page_content)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            if key in docs:
+                docs[key].metadata = {**doc.metadata, **docs[key].metadata}
+            else:
+                docs[key] = doc
+    ranked = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+    return [docs[key] for key in ranked]
@@ -0,0 +1,226 @@
+"""Retrieval instrumentation: per-stage timings and counts sent to pluggable sinks.
+
+Two sinks are installed by default:
+
+- ``registry``: in-process histograms/counters, rendered in Prometheus text
+  format by the API's ``/metrics`` endpoint.
+- ``MlflowSpanSink``: sets attributes on the active MLflow span (only when
+  mlflow is loaded and a span is active, e.g. inside an autologged crew run).
+"""
+
+import bisect
+import logging
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class MetricsSink(Protocol):
+    """Receives metric observations from the retrieval path."""
+
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None: ...
+
+    def inc(self, name: str, value: float, labels: dict[str, str]) -> None: ...
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """In-process histograms and counters with Prometheus text rendering."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help: dict[str, tuple[str, str]] = {}  # name -> (type, help)
+        self._buckets: dict[str, tuple[float, ...]] = {}
+        self._histograms: dict[tuple[str, Labels], _Histogram] = {}
+        self._counters: dict[tuple[str, Labels], float] = {}
+
+    def histogram(self, name: str, help: str, buckets: tuple[float, ...]) -> None:
+        """Declare a histogram metric."""
+        self._help[name] = ("histogram", help)
+        self._buckets[name] = buckets
+
+    def counter(self, name: str, help: str) -> None:
+        """Declare a counter metric (name should end in _total)."""
+        self._help[name] = ("counter", help)
+
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = _Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            hist.observe(value)
+
+    def inc(self, name: str, value: float, labels: dict[str, str]) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def histogram_snapshot(self, name: str, **labels: str) -> tuple[int, float]:
+        """(count, sum) of a histogram series; (0, 0.0) if never observed."""
+        with self._lock:
+            hist = self._histograms.get((name, tuple(sorted(labels.items()))))
+            return (hist.count, hist.sum) if hist else (0, 0.0)
+
+    def counter_value(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0.0)
+
+    def render_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format (0.0.4)."""
+        lines: list[str] = []
+        with self._lock:
+            names = sorted({n for n, _ in self._histograms} | {n for n, _ in self._counters})
+            for name in names:
+                kind, help = self._help.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for (series, labels), hist in sorted(self._histograms.items()):
+                    if series != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*hist.buckets, float("inf")), hist.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{name}_bucket{_fmt(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_fmt(labels)} {hist.sum:.6g}")
+                    lines.append(f"{name}_count{_fmt(labels)} {hist.count}")
+                for (series, labels), value in sorted(self._counters.items()):
+                    if series == name:
+                        lines.append(f"{name}{_fmt(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _fmt(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class MlflowSpanSink:
+    """Adds observations as attributes of the active MLflow span, if any.
+
+    Attributes accumulate within a span: a counter ("<name>.<labels>") holds
+    its running total, and an observed series holds the sum of its values
+    plus "<name>.<labels>.count", so repeated stages (several retrievals in
+    one agent step) add up instead of overwriting each other.
+
+    mlflow is only used when the application has already imported it, so the
+    retrieval path never pays its import cost.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def _span(self) -> Any:
+        mlflow = sys.modules.get("mlflow")
+        if mlflow is None:
+            return None
+        try:
+            return mlflow.get_current_active_span()
+        except Exception:
+            return None
+
+    def observe(self, name: str, value: float, labels: dict[str, str]) -> None:
+        span = self._span()
+        if span is not None:
+            key = ".".join([name, *labels.values()])
+            with self._lock:
+                self._add(span, key, value)
+                self._add(span, f"{key}.count", 1)
+
+    def inc(self, name: str, value: float, labels: dict[str, str]) -> None:
+        span = self._span()
+        if span is not None:
+            with self._lock:
+                self._add(span, ".".join([name, *labels.values()]), value)
+
+    @staticmethod
+    def _add(span: Any, key: str, value: float) -> None:
+        current = span.get_attribute(key)
+        total = current + value if isinstance(current, (int, float)) else value
+        span.set_attribute(key, total)
+
+
+registry = MetricsRegistry()
+registry.histogram(
+    "retrieval_stage_seconds", "Retrieval stage duration in seconds.", LATENCY_BUCKETS
+)
+registry.histogram(
+    "retrieval_candidates", "Candidates per query after each retrieval stage.", COUNT_BUCKETS
+)
+registry.histogram("reranker_batch_pairs", "Pairs per reranker forward pass.", BATCH_BUCKETS)
+registry.counter(
+    "retrieval_threshold_dropped_total", "Vector matches dropped by retriever_threshold."
+)
+registry.counter("retrieval_dedup_dropped_total", "Near-duplicate candidates dropped.")
+
+_sinks: list[MetricsSink] = [registry, MlflowSpanSink()]
+_sinks_lock = threading.Lock()
+
+
+def add_sink(sink: MetricsSink) -> None:
+    """Register an additional metrics sink."""
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink: MetricsSink) -> None:
+    with _sinks_lock:
+        _sinks.remove(sink)
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Send a histogram observation to every sink (sink errors are logged, not raised)."""
+    for sink in list(_sinks):
+        try:
+            sink.observe(name, value, labels)
+        except Exception as e:
+            logger.debug("Metrics sink %r failed: %s", sink, e)
+
+
+def inc(name: str, value: float = 1, **labels: str) -> None:
+    """Increment a counter in every sink."""
+    for sink in list(_sinks):
+        try:
+            sink.inc(name, value, labels)
+        except Exception as e:
+            logger.debug("Metrics sink %r failed: %s", sink, e)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record the duration of a retrieval stage as retrieval_stage_seconds{stage=...}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("retrieval_stage_seconds", time.perf_counter() - started, stage=stage)
@@ -0,0 +1,208 @@
+"""Token-budget context packing for retrieved chunks handed to an LLM agent."""
+
+import logging
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"')\]])\s+")
+_MIN_OVERLAP = 20
+_ELLIPSIS = "..."
+
+
+@dataclass
+class PackedChunk:
+    """One entry of packed context: a chunk, or adjacent chunks of one page merged."""
+
+    document: Document
+    text: str
+    weight: float
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(model: str) -> TokenCounter:
+    """Token counter for the agents' LLM (litellm picks the model's tokenizer).
+
+    Falls back to ~4 characters per token when litellm is not installed.
+    """
+    try:
+        from litellm import token_counter
+    except ImportError:
+        logger.debug("litellm not installed; estimating tokens from characters")
+        return _estimate_tokens
+
+    def count(text: str) -> int:
+        if not text:
+            return 0
+        try:
+            return token_counter(model=model, text=text)
+        except Exception as e:
+            logger.debug("Token counting failed for %s: %s", model, e)
+            return _estimate_tokens(text)
+
+    return count
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def pack_context(
+    documents: list[Document],
+    budget_tokens: int,
+    count_tokens: TokenCounter,
+    format_header: Callable[[int, Document], str],
+    separator: str = "\n---\n",
+) -> str:
+    """Fit reranked chunks into a token budget, giving higher-scored chunks more room.
+
+    Chunks from the same source and page are merged first (overlapping
+    chunk boundaries are stitched together), so a page costs one header. The
+    remaining budget is split in proportion to each entry's rerank score
+    (vector scores if the list was not reranked, see rerank_skipped; rank
+    when documents lack a common score); room a short entry does not use is
+    handed to the others. Entries that still do not fit are trimmed at the
+    last sentence boundary within their share.
+
+    Args:
+        documents: Retrieved documents, best first.
+        budget_tokens: Token budget for the whole returned string.
+        count_tokens: Token counter for the target model (see get_token_counter).
+        format_header: Builds an entry's header line(s) from (1-based index, document).
+        separator: Placed between entries.
+
+    Returns:
+        The packed context; entries keep the input (rank) order.
+    """
+    chunks = merge_adjacent_chunks(documents)
+    headers = [format_header(i, chunk.document) for i, chunk in enumerate(chunks, 1)]
+    overhead = sum(count_tokens(h + "\n") for h in headers)
+    overhead += count_tokens(separator) * max(0, len(chunks) - 1)
+    allowances = _allocate(
+        [count_tokens(chunk.text) for chunk in chunks],
+        [chunk.weight for chunk in chunks],
+        max(0, budget_tokens - overhead),
+    )
+
+    entries = []
+    for header, chunk, allowance in zip(headers, chunks, allowances):
+        text = trim_to_tokens(chunk.text, allowance, count_tokens)
+        if text:
+            entries.append(f"{header}\n{text}")
+    return separator.join(entries)
+
+
+def merge_adjacent_chunks(documents: list[Document]) -> list[PackedChunk]:
+    """Merge chunks that share a source and page into one entry at the best chunk's rank."""
+    merged: dict[tuple[str, object], PackedChunk] = {}
+    chunks: list[PackedChunk] = []
+    score_key = _score_key(documents)
+    for rank, doc in enumerate(documents):
+        weight = _weight(doc, rank, score_key)
+        page = doc.metadata.get("page", doc.metadata.get("page_label"))
+        key = (str(doc.metadata.get("source", "")), page)
+        if page is None or key not in merged:
+            chunk = PackedChunk(doc, doc.page_content.strip(), weight)
+            chunks.append(chunk)
+            if page is not None:
+                merged[key] = chunk
+            continue
+        chunk = merged[key]
+        chunk.text = _stitch(chunk.text, doc.page_content.strip())
+        chunk.weight = max(chunk.weight, weight)
+    return chunks
+
+
+def _score_key(documents: list[Document]) -> str | None:
+    """Metadata score every document has: rerank_score, else vector_score (never a mix of the two)."""
+    for key in ("rerank_score", "vector_score"):
+        if all(key in doc.metadata for doc in documents):
+            return key
+    return None
+
+
+def _weight(doc: Document, rank: int, score_key: str | None) -> float:
+    """The list's common score, else decaying by rank; never zero."""
+    score = doc.metadata[score_key] if score_key else 1.0 / (rank + 1)
+    return max(float(score), 0.01)
+
+
+def _stitch(first: str, second: str) -> str:
+    """Join two chunks of one page, dropping the splitter's overlap if they are adjacent."""
+    if second in first:
+        return first
+    if first in second:
+        return second
+    for left, right in ((first, second), (second, first)):
+        overlap = _overlap(left, right)
+        if overlap >= _MIN_OVERLAP:
+            return left + right[overlap:]
+    return f"{first}\n{second}"
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of left that is a prefix of right."""
+    for size in range(min(len(left), len(right)), _MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _allocate(needs: list[int], weights: list[float], budget: int) -> list[int]:
+    """Split budget by weight; entries needing less than their share free it for the rest."""
+    allowances = [0] * len(needs)
+    open_ = set(range(len(needs)))
+    remaining = budget
+    while open_:
+        total = sum(weights[i] for i in open_)
+        satisfied = {i for i in open_ if needs[i] <= remaining * weights[i] / total}
+        if not satisfied:
+            for i in open_:
+                allowances[i] = int(remaining * weights[i] / total)
+            break
+        for i in satisfied:
+            allowances[i] = needs[i]
+            remaining -= needs[i]
+        open_ -= satisfied
+    return allowances
+
+
+def trim_to_tokens(text: str, max_tokens: int, count_tokens: TokenCounter) -> str:
+    """Longest prefix of whole sentences within max_tokens ("..." marks a cut).
+
+    When not even the first sentence fits, falls back to whole words.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(" " + _ELLIPSIS)
+    if budget <= 0:
+        return ""
+
+    kept = _longest_prefix(_split_sentences(text), budget, count_tokens, sep=" ")
+    if not kept:
+        kept = _longest_prefix(text.split(), budget, count_tokens, sep=" ")
+    return f"{kept} {_ELLIPSIS}" if kept else ""
+
+
+def _split_sentences(text: str) -> list[str]:
+    return [s for s in _SENTENCE_END_RE.split(text) if s.strip()]
+
+
+def _longest_prefix(parts: list[str], budget: int, count_tokens: TokenCounter, sep: str) -> str:
+    """Join parts while the running token count stays within budget."""
+    kept: list[str] = []
+    used = 0
+    for part in parts:
+        cost = count_tokens(part + sep)
+        if used + cost > budget:
+            break
+        kept.append(part)
+        used += cost
+    return sep.join(kept).strip()
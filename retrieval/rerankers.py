@@ -0,0 +1,350 @@
+"""Pluggable reranker backends: quantized ONNX Runtime export, inference and parity check.
+
+The default backend is FlagEmbedding's torch FlagReranker (see retrieval.retriever).
+This module adds an int8 dynamically quantized ONNX Runtime backend for CPU-only
+pods. Export the model once, then set RERANKER_BACKEND=onnx:
+
+    python -m retrieval.rerankers export --output models/reranker-onnx
+    python -m retrieval.rerankers parity --model-dir models/reranker-onnx
+
+Serving requires the optional ``onnx`` extra (onnxruntime). Export also needs the
+onnx package (``pip install onnx``), plus torch and transformers, which
+FlagEmbedding already installs; it is a one-off build step, so onnx is kept out
+of the extra the API image installs.
+"""
+
+import argparse
+import logging
+import math
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+from config import settings
+from retrieval.cache import LRUCache, text_hash
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model_quantized.onnx"
+ONNX_FP32_MODEL_FILE = "model.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+DEFAULT_MAX_LENGTH = 512
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_TOKEN_CACHE_SIZE = 8192
+
+# Representative (query, passage) pairs for the parity check
+PARITY_PAIRS: list[tuple[str, str]] = [
+    ("Tesla revenue 2024", "Total revenues were $97.7 billion in 2024, up 1% year over year."),
+    ("Tesla revenue 2024", "Our board of directors is divided into three classes."),
+    ("Tesla competitors", "We face competition from established automakers and new EV entrants."),
+    ("Tesla competitors", "Cash and cash equivalents increased to $16.1 billion."),
+    ("strategic risks", "Supply chain disruptions could adversely affect our production ramp."),
+    ("strategic risks", "The annual meeting of stockholders will be held virtually."),
+    ("EBITDA margin", "Adjusted EBITDA margin was 16.5% compared to 19.1% in the prior year."),
+    ("EBITDA margin", "Dogs are loyal companions."),
+]
+
+
+class RerankerBackend(Protocol):
+    """Interface shared by reranker backends (matches FlagReranker.compute_score)."""
+
+    def compute_score(
+        self, sentence_pairs: list[tuple[str, str]], normalize: bool = False, **kwargs: Any
+    ) -> float | list[float]: ...
+
+
+def bucket_by_length(lengths: Sequence[int], batch_size: int) -> list[list[int]]:
+    """Group indices into batches of similar length (sorted ascending).
+
+    Each forward pass pads to its longest pair, so sorting before batching
+    keeps short chunks from being padded to the length of the longest one.
+    Callers restore the original order from the returned indices.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def _sigmoid(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-x))
+
+
+class OnnxReranker:
+    """Cross-encoder reranker running an exported (optionally quantized) ONNX model.
+
+    Args:
+        model_dir: Directory produced by export_onnx (model + tokenizer.json).
+        max_length: Max tokens per (query, passage) pair; longer pairs are truncated.
+        batch_size: Pairs per ONNX Runtime call.
+        intra_op_threads: ONNX Runtime intra-op threads (0 lets the runtime decide).
+        token_cache_size: Tokenized texts kept in an LRU so repeat chunks are not
+            re-tokenized.
+    """
+
+    def __init__(
+        self,
+        model_dir: str | Path,
+        *,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        intra_op_threads: int = 0,
+        token_cache_size: int = DEFAULT_TOKEN_CACHE_SIZE,
+    ):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The onnx reranker backend requires onnxruntime and tokenizers. "
+                "Install with: pip install 'stratagent[onnx]'"
+            ) from e
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / ONNX_MODEL_FILE
+        if not model_path.exists():
+            model_path = model_dir / ONNX_FP32_MODEL_FILE
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"No ONNX reranker found in {model_dir}. "
+                "Run: python -m retrieval.rerankers export --output " + str(model_dir)
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self._session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        # Truncation is applied when query and passage are joined (post_process)
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.no_padding()
+        self._pad_id = self._tokenizer.token_to_id("<pad>") or 0
+        self._token_cache = LRUCache(token_cache_size)
+        self.max_length = max_length
+        self.batch_size = batch_size
+        logger.info("Loaded ONNX reranker from %s", model_path)
+
+    def _encode(self, text: str) -> Any:
+        """Tokenize text without special tokens, reusing cached encodings."""
+        key = text_hash(text)
+        encoding = self._token_cache.get(key)
+        if encoding is None:
+            encoding = self._tokenizer.encode(text, add_special_tokens=False)
+            self._token_cache.put(key, encoding)
+        return encoding
+
+    def count_tokens(self, text: str) -> int:
+        """Token count of text (cached), used for length bucketing."""
+        return len(self._encode(text))
+
+    def _logits(self, pairs: list[tuple[str, str]]) -> list[float]:
+        import numpy as np
+
+        # post_process copies its inputs, so cached encodings are never mutated
+        encodings = [
+            self._tokenizer.post_process(self._encode(q), self._encode(p), add_special_tokens=True)
+            for q, p in pairs
+        ]
+        width = max(len(e.ids) for e in encodings)
+        input_ids = np.full((len(encodings), width), self._pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), width), dtype=np.int64)
+        token_type_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, e in enumerate(encodings):
+            input_ids[row, : len(e.ids)] = e.ids
+            attention_mask[row, : len(e.ids)] = 1
+            token_type_ids[row, : len(e.ids)] = e.type_ids
+        feeds: dict[str, Any] = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = token_type_ids
+        (logits,) = self._session.run(["logits"], feeds)
+        return logits.reshape(len(pairs), -1)[:, 0].tolist()
+
+    def compute_score(
+        self,
+        sentence_pairs: list[tuple[str, str]],
+        normalize: bool = False,
+        batch_size: int | None = None,
+        max_length: int | None = None,
+    ) -> float | list[float]:
+        """Score pairs (same contract as FlagReranker: float for one pair, list otherwise).
+
+        max_length is fixed when the model is loaded; the argument is accepted
+        for FlagReranker compatibility and otherwise ignored.
+        """
+        if max_length is not None and max_length != self.max_length:
+            logger.debug("Ignoring max_length=%d (loaded with %d)", max_length, self.max_length)
+        if isinstance(sentence_pairs, tuple):
+            sentence_pairs = [sentence_pairs]
+        batch_size = batch_size or self.batch_size
+        scores: list[float] = []
+        for i in range(0, len(sentence_pairs), batch_size):
+            scores.extend(self._logits(list(sentence_pairs[i : i + batch_size])))
+        if normalize:
+            scores = [_sigmoid(s) for s in scores]
+        return scores[0] if len(scores) == 1 else scores
+
+
+def export_onnx(
+    model_name: str,
+    output_dir: str | Path,
+    *,
+    quantize: bool = True,
+    keep_fp32: bool = False,
+    opset: int = 17,
+) -> Path:
+    """Export a Hugging Face cross-encoder to ONNX and dynamically quantize it to int8.
+
+    Args:
+        model_name: Hugging Face model id (e.g. BAAI/bge-reranker-v2-m3).
+        output_dir: Directory to write the model and tokenizer into.
+        quantize: Apply int8 dynamic weight quantization.
+        keep_fp32: Keep the fp32 ONNX model next to the quantized one.
+        opset: ONNX opset version.
+
+    Returns:
+        Path of the model file the onnx backend will load.
+    """
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    try:
+        import onnx  # noqa: F401  (used by the torch exporter and quantize_dynamic)
+    except ImportError as e:
+        raise ImportError(
+            "Exporting the onnx reranker requires the onnx package. Install with: pip install onnx"
+        ) from e
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_dir / ONNX_FP32_MODEL_FILE
+
+    logger.info("Exporting %s to ONNX in %s", model_name, output_dir)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    dummy = tokenizer(["query"], ["passage"], return_tensors="pt")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(str(output_dir))
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = output_dir / ONNX_MODEL_FILE
+    logger.info("Quantizing to int8: %s", quantized_path)
+    quantize_dynamic(str(fp32_path), str(quantized_path), weight_type=QuantType.QInt8)
+    if not keep_fp32:
+        fp32_path.unlink(missing_ok=True)
+        for data_file in output_dir.glob(f"{ONNX_FP32_MODEL_FILE}*.data"):
+            data_file.unlink()
+    return quantized_path
+
+
+@dataclass
+class ParityReport:
+    """Score agreement between a reference and a candidate reranker."""
+
+    max_abs_diff: float
+    mean_abs_diff: float
+    spearman: float
+
+    def ok(self, tolerance: float) -> bool:
+        return self.max_abs_diff <= tolerance
+
+
+def _ranks(values: Sequence[float]) -> list[float]:
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    for rank, i in enumerate(order):
+        ranks[i] = float(rank)
+    return ranks
+
+
+def _spearman(a: Sequence[float], b: Sequence[float]) -> float:
+    n = len(a)
+    if n < 2:
+        return 1.0
+    ra, rb = _ranks(a), _ranks(b)
+    d2 = sum((x - y) ** 2 for x, y in zip(ra, rb))
+    return 1 - 6 * d2 / (n * (n * n - 1))
+
+
+def _as_list(scores: float | list[float]) -> list[float]:
+    return [scores] if isinstance(scores, (int, float)) else list(scores)
+
+
+def check_parity(
+    reference: RerankerBackend,
+    candidate: RerankerBackend,
+    pairs: Sequence[tuple[str, str]] = PARITY_PAIRS,
+) -> ParityReport:
+    """Compare normalized scores of two rerankers on the same pairs."""
+    ref = _as_list(reference.compute_score(list(pairs), normalize=True))
+    cand = _as_list(candidate.compute_score(list(pairs), normalize=True))
+    diffs = [abs(x - y) for x, y in zip(ref, cand)]
+    return ParityReport(
+        max_abs_diff=max(diffs),
+        mean_abs_diff=sum(diffs) / len(diffs),
+        spearman=_spearman(ref, cand),
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI: export/quantize the reranker to ONNX, or check parity with the torch model."""
+    parser = argparse.ArgumentParser(prog="python -m retrieval.rerankers")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Export and quantize the reranker to ONNX")
+    export.add_argument("--model", default=settings.reranker_model)
+    export.add_argument("--output", default=settings.reranker_onnx_dir)
+    export.add_argument("--no-quantize", action="store_true")
+    export.add_argument("--keep-fp32", action="store_true")
+
+    parity = sub.add_parser("parity", help="Compare ONNX scores against the torch model")
+    parity.add_argument("--model", default=settings.reranker_model)
+    parity.add_argument("--model-dir", default=settings.reranker_onnx_dir)
+    parity.add_argument("--tolerance", type=float, default=0.05)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.command == "export":
+        path = export_onnx(
+            args.model, args.output, quantize=not args.no_quantize, keep_fp32=args.keep_fp32
+        )
+        print(f"Wrote {path}")
+        return 0
+
+    from FlagEmbedding import FlagReranker
+
+    report = check_parity(
+        FlagReranker(args.model, use_fp16=False),
+        OnnxReranker(args.model_dir),
+    )
+    print(
+        f"max_abs_diff={report.max_abs_diff:.4f} "
+        f"mean_abs_diff={report.mean_abs_diff:.4f} spearman={report.spearman:.4f}"
+    )
+    return 0 if report.ok(args.tolerance) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,71 +1,515 @@
 """RAG retriever with vector search and optional reranking."""
 
+import asyncio
 import logging
 import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 from FlagEmbedding import FlagReranker
 from langchain_core.documents import Document
-from langchain_core.runnables import chain
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_pinecone import PineconeEmbeddings
 
 from config import settings
 from ingestion import get_vector_store
+from ingestion.embedding_cache import CachedEmbeddings
+from ingestion.parents import expand_to_parents, get_parent_store
+from ingestion.upsert import get_async_clients, namespace_version
+import retrieval.metrics as metrics
+from retrieval.batching import RerankDispatcher
+from retrieval.cache import QueryEmbeddingCache, RerankScoreCache, SemanticResultCache, query_signature
+from retrieval.cascade import apply_cascade, cascade_stats
+from retrieval.dedup import collapse_near_duplicates, dedup_stats
+from retrieval.filters import MetadataFilter
+from retrieval.hybrid import reciprocal_rank_fusion, sparse_search
+from retrieval.rerankers import OnnxReranker, RerankerBackend, bucket_by_length
 
 logger = logging.getLogger(__name__)
 
 # Lazy-loaded reranker (avoids expensive model load at import time)
-_reranker: FlagReranker | None = None
+_reranker: RerankerBackend | None = None
 _reranker_lock = threading.Lock()
 
-def _get_reranker() -> FlagReranker:
+# Lazy-built query-embedding cache (None when disabled via settings)
+_query_cache: QueryEmbeddingCache | None = None
+_query_cache_lock = threading.Lock()
+
+# Lazy-built reranker score cache (None when disabled via settings)
+_score_cache: RerankScoreCache | None = None
+_score_cache_lock = threading.Lock()
+
+# Lazy-built semantic result cache (None when disabled via settings)
+_result_cache: SemanticResultCache | None = None
+_result_cache_lock = threading.Lock()
+
+# Lazy-started micro-batching dispatcher shared by all threads (None when disabled)
+_dispatcher: RerankDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+def _get_reranker() -> RerankerBackend:
     global _reranker
     if _reranker is None:
         with _reranker_lock:
             if _reranker is None:  # double-checked locking
-                _reranker = FlagReranker(settings.reranker_model, use_fp16=False)
+                _reranker = _load_reranker(settings.reranker_backend)
     return _reranker
 
 
+def _load_reranker(backend: str) -> RerankerBackend:
+    """Internal: build the reranker for the configured backend ("flag" or "onnx")."""
+    if backend == "flag":
+        return FlagReranker(settings.reranker_model, use_fp16=False)
+    if backend == "onnx":
+        return OnnxReranker(
+            settings.reranker_onnx_dir,
+            max_length=settings.reranker_max_length,
+            batch_size=settings.reranker_batch_size,
+            intra_op_threads=settings.reranker_onnx_threads,
+        )
+    raise ValueError(f"Unknown reranker backend: {backend!r}. Supported: flag, onnx")
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache | None:
+    """Return the shared query-embedding cache, or None if disabled in settings."""
+    global _query_cache
+    if _query_cache is None and settings.query_embedding_cache_size > 0:
+        with _query_cache_lock:
+            if _query_cache is None:
+                _query_cache = QueryEmbeddingCache(
+                    maxsize=settings.query_embedding_cache_size,
+                    ttl_seconds=settings.query_embedding_cache_ttl_seconds,
+                    path=settings.query_embedding_cache_path,
+                    max_disk_entries=settings.query_embedding_cache_max_disk_entries,
+                )
+    return _query_cache
+
+
+def get_rerank_score_cache() -> RerankScoreCache | None:
+    """Return the shared reranker score cache, or None if disabled in settings."""
+    global _score_cache
+    if _score_cache is None and settings.rerank_score_cache_size > 0:
+        with _score_cache_lock:
+            if _score_cache is None:
+                _score_cache = RerankScoreCache(maxsize=settings.rerank_score_cache_size)
+    return _score_cache
+
+
+def get_result_cache() -> SemanticResultCache | None:
+    """Return the shared semantic result cache, or None if disabled in settings."""
+    global _result_cache
+    if _result_cache is None and settings.result_cache_size > 0:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = SemanticResultCache(
+                    maxsize=settings.result_cache_size,
+                    threshold=settings.result_cache_similarity,
+                    version=namespace_version,
+                    ttl_seconds=settings.result_cache_ttl_seconds,
+                )
+    return _result_cache
+
+
+def get_rerank_dispatcher() -> RerankDispatcher | None:
+    """Return the shared reranker dispatcher, or None if micro-batching is disabled."""
+    global _dispatcher
+    if _dispatcher is None and settings.reranker_dispatch_enabled:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = RerankDispatcher(
+                    _run_reranker,
+                    max_batch_size=settings.reranker_dispatch_max_batch_size,
+                    max_wait_ms=settings.reranker_dispatch_max_wait_ms,
+                )
+    return _dispatcher
+
+
 def reset_retriever_cache() -> None:
-    global _reranker
+    global _reranker, _query_cache, _score_cache, _result_cache, _dispatcher
     with _reranker_lock:
         _reranker = None
+    with _query_cache_lock:
+        if _query_cache is not None:
+            _query_cache.close()
+        _query_cache = None
+    with _score_cache_lock:
+        _score_cache = None
+    with _result_cache_lock:
+        _result_cache = None
+    with _dispatcher_lock:
+        if _dispatcher is not None:
+            _dispatcher.close()
+        _dispatcher = None
+    cascade_stats.reset()
+    dedup_stats.reset()
+
+
+def warm_up() -> None:
+    """Preload the reranker, embedding client and vector index.
+
+    Runs one dummy cross-encoder inference so weights are resident and
+    kernels are warm before the first real rerank. Called at API startup.
+    """
+    store = get_vector_store()  # the local backend maps its files here
+    if settings.vector_backend == "pinecone":
+        store.index.describe_index_stats()  # opens the index connection
+    _run_reranker([("warm up", "warm up")])
+    logger.info("Retriever warm-up complete")
 
 
 def _vector_search(
     query: str,
     k: int,
     namespace: str | None = None,
+    metadata_filter: MetadataFilter | None = None,
 ) -> list[Document]:
     """Internal: perform vector similarity search."""
     store = get_vector_store(namespace=namespace)
-    results = store.similarity_search_with_score(query, k=k)
-    candidates = [doc for doc, score in results if score >= settings.retriever_threshold]  # cosine threshold
+    vector = _embed_queries(store, [query])[0]
+    with metrics.timed("vector_search"):
+        results = store.similarity_search_by_vector_with_score(
+            vector, k=k, **_filter_kwargs(metadata_filter)
+        )
+    return _apply_threshold(results)
+
+
+def _filter_kwargs(metadata_filter: MetadataFilter | None) -> dict[str, Any]:
+    """Internal: server-side Pinecone filter kwarg, omitted when unfiltered."""
+    expression = metadata_filter.to_pinecone() if metadata_filter else None
+    return {"filter": expression} if expression else {}
+
+
+def _apply_threshold(results: list[tuple[Document, float]]) -> list[Document]:
+    """Internal: keep matches above the cosine threshold, recording their vector score."""
+    candidates = []
+    for doc, score in results:
+        if score >= settings.retriever_threshold:  # cosine threshold
+            doc.metadata["vector_score"] = round(float(score), 4)
+            candidates.append(doc)
+    metrics.inc("retrieval_threshold_dropped_total", len(results) - len(candidates))
+    metrics.observe("retrieval_candidates", len(candidates), stage="vector_search")
     return candidates
 
 
-def _unpack_retriever_input(input: str | dict) -> tuple[str, int | None, str | None]:
+def _embed_queries(store: Any, queries: list[str]) -> list[list[float]]:
+    """Internal: embed queries, serving repeats from the query-embedding cache."""
+    cache = get_query_embedding_cache()
+    if cache is None:
+        return _embed_uncached(store, queries)
+
+    vectors = cache.get_many(settings.embedding_model, queries)
+    missing = list(dict.fromkeys(q for q, v in zip(queries, vectors) if v is None))
+    if missing:
+        fresh = dict(zip(missing, _embed_uncached(store, missing)))
+        cache.put_many(settings.embedding_model, missing, list(fresh.values()))
+        vectors = [v if v is not None else fresh[q] for q, v in zip(queries, vectors)]
+    return vectors
+
+
+def _query_embeddings(store: Any) -> Any:
+    """Internal: the store's embedding model, unwrapped from the ingestion passage cache."""
+    embeddings = store.embeddings
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.embeddings
+    return embeddings
+
+
+def _embed_uncached(store: Any, queries: list[str]) -> list[list[float]]:
+    """Internal: embed all queries in a single request (query input_type, not passage)."""
+    embeddings = _query_embeddings(store)
+    with metrics.timed("embed"):
+        if isinstance(embeddings, PineconeEmbeddings):
+            response = embeddings._embed_texts(
+                texts=queries,
+                model=embeddings.model,
+                parameters=embeddings.query_params,
+            )
+            return [r["values"] for r in response]
+        return [embeddings.embed_query(q) for q in queries]
+
+
+def _vector_search_many(
+    queries: list[str],
+    k: int,
+    namespace: str | None = None,
+    metadata_filter: MetadataFilter | None = None,
+) -> list[list[Document]]:
+    """Internal: one embedding call for all queries, then concurrent Pinecone queries."""
+    store = get_vector_store(namespace=namespace)
+    return _search_vectors(store, _embed_queries(store, queries), k, metadata_filter)
+
+
+def _search_vectors(
+    store: Any,
+    vectors: list[list[float]],
+    k: int,
+    metadata_filter: MetadataFilter | None = None,
+) -> list[list[Document]]:
+    """Internal: concurrent store queries for already-embedded queries."""
+    filter_kwargs = _filter_kwargs(metadata_filter)
+
+    def _query(vector: list[float]) -> list[Document]:
+        with metrics.timed("vector_search"):
+            results = store.similarity_search_by_vector_with_score(vector, k=k, **filter_kwargs)
+        return _apply_threshold(results)
+
+    if len(vectors) == 1:
+        return [_query(vectors[0])]
+    workers = max(1, min(len(vectors), settings.pinecone_pool_threads))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_query, vectors))
+
+
+async def _aembed_queries(store: Any, queries: list[str]) -> list[list[float]]:
+    """Internal: async _embed_queries (same cache, shared async Pinecone client)."""
+    cache = get_query_embedding_cache()
+    if cache is None:
+        return await _aembed_uncached(store, queries)
+
+    vectors = cache.get_many(settings.embedding_model, queries)
+    missing = list(dict.fromkeys(q for q, v in zip(queries, vectors) if v is None))
+    if missing:
+        fresh = dict(zip(missing, await _aembed_uncached(store, missing)))
+        cache.put_many(settings.embedding_model, missing, list(fresh.values()))
+        vectors = [v if v is not None else fresh[q] for q, v in zip(queries, vectors)]
+    return vectors
+
+
+async def _aembed_uncached(store: Any, queries: list[str]) -> list[list[float]]:
+    """Internal: embed all queries in one async request (query input_type)."""
+    if settings.vector_backend == "local":
+        # The shared async clients resolve (and may create) the Pinecone index;
+        # a local deployment embeds through the sync client off the event loop
+        return await asyncio.to_thread(_embed_uncached, store, queries)
+    embeddings = _query_embeddings(store)
+    with metrics.timed("embed"):
+        if isinstance(embeddings, PineconeEmbeddings):
+            client, _ = await get_async_clients()
+            response = await client.inference.embed(
+                model=embeddings.model,
+                inputs=queries,
+                parameters=embeddings.query_params,
+            )
+            return [r["values"] for r in response]
+        return list(await asyncio.gather(*(embeddings.aembed_query(q) for q in queries)))
+
+
+async def _aquery(
+    index: Any,
+    vector: list[float],
+    k: int,
+    namespace: str | None,
+    filter_kwargs: dict[str, Any] | None = None,
+) -> list[tuple[Document, float]]:
+    """Internal: async Pinecone query, converted like PineconeVectorStore does."""
+    with metrics.timed("vector_search"):
+        response = await index.query(
+            vector=vector,
+            top_k=k,
+            include_metadata=True,
+            namespace=namespace,
+            **(filter_kwargs or {}),
+        )
+    results = []
+    for match in response["matches"]:
+        metadata = dict(match["metadata"] or {})
+        text = metadata.pop("text", None)
+        if text is None:
+            logger.warning("Found document with no `text` key. Skipping.")
+            continue
+        results.append(
+            (Document(id=match.get("id"), page_content=text, metadata=metadata), match["score"])
+        )
+    return results
+
+
+async def _avector_search_many(
+    queries: list[str],
+    k: int,
+    namespace: str | None = None,
+    metadata_filter: MetadataFilter | None = None,
+) -> list[list[Document]]:
+    """Internal: one async embedding call, then concurrent async Pinecone queries."""
+    if settings.vector_backend == "local":
+        # In-process search has no I/O to overlap; keep it off the event loop
+        return await asyncio.to_thread(_vector_search_many, queries, k, namespace, metadata_filter)
+    store = get_vector_store(namespace=namespace)
+    vectors = await _aembed_queries(store, queries)
+    return await _asearch_vectors(store, vectors, k, namespace, metadata_filter)
+
+
+async def _asearch_vectors(
+    store: Any,
+    vectors: list[list[float]],
+    k: int,
+    namespace: str | None = None,
+    metadata_filter: MetadataFilter | None = None,
+) -> list[list[Document]]:
+    """Internal: async _search_vectors (concurrent queries on the shared async client)."""
+    if settings.vector_backend == "local":
+        return await asyncio.to_thread(_search_vectors, store, vectors, k, metadata_filter)
+    _, index = await get_async_clients()
+    filter_kwargs = _filter_kwargs(metadata_filter)
+    results = await asyncio.gather(
+        *(_aquery(index, v, k, namespace, filter_kwargs) for v in vectors)
+    )
+    return [_apply_threshold(r) for r in results]
+
+
+class _BatchedChain(RunnableLambda):
+    """RunnableLambda whose ``batch``/``abatch`` route through batched implementations."""
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        batch_func: Callable[[list[Any]], list[Any]],
+        afunc: Callable[..., Any] | None = None,
+        abatch_func: Callable[[list[Any]], Any] | None = None,
+    ):
+        super().__init__(func, afunc=afunc)
+        self._batch_func = batch_func
+        self._abatch_func = abatch_func
+
+    def batch(
+        self,
+        inputs: list[Any],
+        config: RunnableConfig | list[RunnableConfig] | None = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> list[Any]:
+        if not inputs:
+            return []
+        if return_exceptions:
+            # Per-input error isolation needs the default one-call-per-input path
+            return super().batch(inputs, config, return_exceptions=True, **kwargs)
+        return self._batch_func(list(inputs))
+
+    async def abatch(
+        self,
+        inputs: list[Any],
+        config: RunnableConfig | list[RunnableConfig] | None = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> list[Any]:
+        if not inputs:
+            return []
+        if return_exceptions or self._abatch_func is None:
+            return await super().abatch(
+                inputs, config, return_exceptions=return_exceptions, **kwargs
+            )
+        return await self._abatch_func(list(inputs))
+
+
+def _batched(
+    batch_func: Callable[[list[Any]], list[Any]],
+    *,
+    afunc: Callable[..., Any] | None = None,
+    abatch_func: Callable[[list[Any]], Any] | None = None,
+) -> Callable[..., _BatchedChain]:
+    """Decorator: like ``@chain``, but with batched ``.batch()``/``.abatch()`` and an async path."""
+
+    def _wrap(func: Callable[..., Any]) -> _BatchedChain:
+        return _BatchedChain(func, batch_func, afunc=afunc, abatch_func=abatch_func)
+
+    return _wrap
+
+
+def _group_inputs(
+    inputs: list[Any],
+    unpack: Callable[[Any], tuple],
+) -> dict[tuple, list[tuple[int, str]]]:
+    """Group chain inputs by their non-query arguments, keeping original positions."""
+    groups: dict[tuple, list[tuple[int, str]]] = {}
+    for i, item in enumerate(inputs):
+        query, *rest = unpack(item)
+        groups.setdefault(tuple(rest), []).append((i, query))
+    return groups
+
+
+def _retriever_batch(inputs: list[Any]) -> list[list[Document]]:
+    """Batched retriever: one embedding call and concurrent searches per argument group."""
+    results: list[list[Document]] = [[] for _ in inputs]
+    groups = _group_inputs(inputs, _unpack_retriever_input)
+    for (k, namespace, metadata_filter), items in groups.items():
+        queries = [q for _, q in items]
+        if any(not q or not q.strip() for q in queries):
+            raise ValueError("Query cannot be empty")
+        k_val = _validate_k(k)
+        found = _vector_search_many(queries, k_val, namespace, metadata_filter)
+        for (i, _), docs in zip(items, found):
+            results[i] = docs
+    return results
+
+
+def _unpack_retriever_input(
+    input: str | dict,
+) -> tuple[str, int | None, str | None, MetadataFilter | None]:
     """Unpack chain input: dict from invoke or string for direct call."""
     if isinstance(input, dict):
         return (
             input.get("query", ""),
             input.get("k"),
             input.get("namespace"),
+            MetadataFilter.coerce(input.get("filter")),
         )
-    return (str(input), None, None)
+    return (str(input), None, None, None)
+
+
+async def _aretriever_input(input: str | dict) -> list[Document]:
+    query, k, namespace, metadata_filter = _unpack_retriever_input(input)
+    return await aretriever(query, k=k, namespace=namespace, filter=metadata_filter)
+
+
+async def _aretriever_batch(inputs: list[Any]) -> list[list[Document]]:
+    """Async batched retriever: concurrent argument groups on the shared async client."""
+    results: list[list[Document]] = [[] for _ in inputs]
+    groups = list(_group_inputs(inputs, _unpack_retriever_input).items())
+
+    async def _run(
+        k: int | None,
+        namespace: str | None,
+        metadata_filter: MetadataFilter | None,
+        queries: list[str],
+    ):
+        if any(not q or not q.strip() for q in queries):
+            raise ValueError("Query cannot be empty")
+        return await _avector_search_many(queries, _validate_k(k), namespace, metadata_filter)
 
+    outputs = await asyncio.gather(
+        *(_run(k, ns, mf, [q for _, q in items]) for (k, ns, mf), items in groups)
+    )
+    for (_, items), docs_per_query in zip(groups, outputs):
+        for (i, _), docs in zip(items, docs_per_query):
+            results[i] = docs
+    return results
 
-@chain
+
+def _validate_k(k: int | None) -> int:
+    """Internal: default k from settings and check its range."""
+    k_val = k if k is not None else settings.retrieval_top_k
+    if k_val < 1 or k_val > 1000:
+        raise ValueError("k must be between 1 and 1000")
+    return k_val
+
+
+@_batched(_retriever_batch, afunc=_aretriever_input, abatch_func=_aretriever_batch)
 def retriever(
     query: str,
     k: int | None = None,
     namespace: str | None = None,
+    filter: MetadataFilter | dict | None = None,
 ) -> list[Document]:
     """Retrieve documents via vector similarity search (no reranking).
 
     Args:
-        query: Search query string (or dict with query, k, namespace when invoked).
+        query: Search query string (or dict with query, k, namespace, filter when invoked).
         k: Number of documents to return. Defaults to settings.retrieval_top_k.
         namespace: Optional Pinecone namespace. Must match ingestion namespace.
+        filter: Optional MetadataFilter (or dict of its fields), applied
+            server-side by Pinecone before top-k selection.
 
     Returns:
         List of Documents ordered by similarity.
@@ -73,14 +517,33 @@ def retriever(
     Raises:
         ValueError: If query is empty or k is invalid.
     """
-    query, k, namespace = _unpack_retriever_input(query)
+    query, k, namespace, metadata_filter = _unpack_retriever_input(query)
     if not query or not query.strip():
         raise ValueError("Query cannot be empty")
-    k_val = k if k is not None else settings.retrieval_top_k
-    if k_val < 1 or k_val > 1000:
-        raise ValueError("k must be between 1 and 1000")
+    k_val = _validate_k(k)
 
-    docs = _vector_search(query, k_val, namespace)
+    docs = _vector_search(query, k_val, namespace, metadata_filter)
+    logger.debug("Retrieved %d documents for query (k=%d)", len(docs), k_val)
+    return docs
+
+
+async def aretriever(
+    query: str,
+    k: int | None = None,
+    namespace: str | None = None,
+    filter: MetadataFilter | dict | None = None,
+) -> list[Document]:
+    """Async retriever: vector similarity search on the shared async Pinecone client.
+
+    Same arguments, defaults and errors as retriever. Also reachable as
+    ``retriever.ainvoke`` / ``retriever.abatch``.
+    """
+    if not query or not query.strip():
+        raise ValueError("Query cannot be empty")
+    k_val = _validate_k(k)
+    (docs,) = await _avector_search_many(
+        [query], k_val, namespace, MetadataFilter.coerce(filter)
+    )
     logger.debug("Retrieved %d documents for query (k=%d)", len(docs), k_val)
     return docs
 
@@ -109,13 +572,98 @@ def rerank(
     k = min(k, len(documents))
 
     pairs = [(query, d.page_content) for d in documents]
+    with metrics.timed("rerank"):
+        scores = _compute_scores(pairs)
+
+    top_docs = _select_top(documents, scores, k)
+    logger.debug("Reranked %d documents to top %d", len(documents), k)
+    return top_docs
+
+
+async def arerank(
+    query: str,
+    documents: list[Document],
+    k: int | None = None,
+) -> list[Document]:
+    """Async rerank: runs the cross-encoder in a worker thread (see rerank)."""
+    return await asyncio.to_thread(rerank, query, documents, k)
+
+
+def _compute_scores(pairs: list[tuple[str, str]]) -> list[float]:
+    """Internal: score (query, passage) pairs, sending only cache misses to the model."""
+    cache = get_rerank_score_cache()
+    if cache is None:
+        return _score_uncached(pairs)
+
+    scorer = _reranker_identity()
+    scores = cache.get_many(scorer, pairs)
+    missing = list(dict.fromkeys(p for p, s in zip(pairs, scores) if s is None))
+    if missing:
+        fresh = dict(zip(missing, _score_uncached(missing)))
+        cache.put_many(scorer, missing, list(fresh.values()))
+        scores = [s if s is not None else fresh[p] for p, s in zip(pairs, scores)]
+    return scores
+
+
+def _reranker_identity() -> str:
+    """Internal: score cache namespace (model, backend/precision and max length change scores)."""
+    backend = settings.reranker_backend
+    if backend == "onnx":
+        backend = f"onnx:{settings.reranker_onnx_dir}"
+    return f"{settings.reranker_model}|{backend}|{settings.reranker_max_length}"
+
+
+def _score_uncached(pairs: list[tuple[str, str]]) -> list[float]:
+    """Internal: score pairs via the shared dispatcher, or directly when it is disabled."""
+    dispatcher = get_rerank_dispatcher()
+    if dispatcher is None:
+        return _run_reranker(pairs)
+    return dispatcher.submit(pairs)
+
+
+def _run_reranker(pairs: list[tuple[str, str]]) -> list[float]:
+    """Internal: score (query, passage) pairs with the cross-encoder.
+
+    Inputs larger than settings.reranker_batch_size are sorted by length and
+    scored in buckets so each forward pass pads to a similar length; scores
+    are returned in the original pair order.
+    """
     reranker_model = _get_reranker()
-    scores = reranker_model.compute_score(pairs, normalize=True)
+    batch_size = max(1, settings.reranker_batch_size)
+    if len(pairs) <= batch_size:
+        buckets = [list(range(len(pairs)))]
+    else:
+        lengths = [_pair_length(reranker_model, q, p) for q, p in pairs]
+        buckets = bucket_by_length(lengths, batch_size)
 
-    # FlagReranker returns float for single pair, list for multiple
-    if isinstance(scores, (int, float)):
-        scores = [scores]
+    scores = [0.0] * len(pairs)
+    for bucket in buckets:
+        metrics.observe("reranker_batch_pairs", len(bucket))
+        with metrics.timed("rerank_forward"):
+            bucket_scores = reranker_model.compute_score(
+                [pairs[i] for i in bucket],
+                normalize=True,
+                batch_size=batch_size,
+                max_length=settings.reranker_max_length,
+            )
+        # FlagReranker returns float for single pair, list for multiple
+        if isinstance(bucket_scores, (int, float)):
+            bucket_scores = [bucket_scores]
+        for i, score in zip(bucket, bucket_scores):
+            scores[i] = score
+    return scores
 
+
+def _pair_length(reranker_model: RerankerBackend, query: str, passage: str) -> int:
+    """Internal: pair length for bucketing (cached token count if the backend has one)."""
+    count_tokens = getattr(reranker_model, "count_tokens", None)
+    if count_tokens is not None:
+        return count_tokens(query) + count_tokens(passage)
+    return len(query) + len(passage)
+
+
+def _select_top(documents: list[Document], scores: list[float], k: int) -> list[Document]:
+    """Internal: order documents by score and keep the top k above the threshold."""
     docs_with_scores = list(zip(documents, scores))
     reranked = sorted(docs_with_scores, key=lambda x: x[1], reverse=True)
     top_docs = []
@@ -124,14 +672,50 @@ def rerank(
         if score > settings.reranker_threshold:
             doc.metadata["rerank_score"] = round(score, 4)
             top_docs.append(doc)
-
-    logger.debug("Reranked %d documents to top %d", len(documents), k)
     return top_docs
 
 
+def rerank_many(
+    queries: list[str],
+    documents: list[list[Document]],
+    k: int | None = None,
+) -> list[list[Document]]:
+    """Rerank several candidate lists with a single cross-encoder batch.
+
+    Args:
+        queries: Search query strings.
+        documents: One candidate list per query (same order as queries).
+        k: Number of top documents to return per query. Defaults to settings.rerank_top_k.
+
+    Returns:
+        One list of top-k documents per query, ordered by reranker score.
+    """
+    if len(queries) != len(documents):
+        raise ValueError("queries and documents must have the same length")
+    if any(not q or not q.strip() for q in queries):
+        raise ValueError("Query cannot be empty")
+
+    k = k if k is not None else settings.rerank_top_k
+    pairs = [(q, d.page_content) for q, docs in zip(queries, documents) for d in docs]
+    if not pairs:
+        return [[] for _ in queries]
+    with metrics.timed("rerank"):
+        scores = _compute_scores(pairs)
+
+    results: list[list[Document]] = []
+    offset = 0
+    for docs in documents:
+        doc_scores = scores[offset : offset + len(docs)]
+        offset += len(docs)
+        results.append(_select_top(docs, doc_scores, min(k, len(docs))))
+
+    logger.debug("Reranked %d pairs across %d queries", len(pairs), len(queries))
+    return results
+
+
 def _unpack_rerank_input(
     input: str | dict,
-) -> tuple[str, int | None, int | None, str | None]:
+) -> tuple[str, int | None, int | None, str | None, MetadataFilter | None]:
     """Unpack chain input for retrieve_with_rerank."""
     if isinstance(input, dict):
         return (
@@ -139,20 +723,313 @@ def _unpack_rerank_input(
             input.get("retrieval_k"),
             input.get("rerank_k"),
             input.get("namespace"),
+            MetadataFilter.coerce(input.get("filter")),
         )
-    return (str(input), None, None, None)
+    return (str(input), None, None, None, None)
+
+
+def _retrieve_with_rerank_batch(inputs: list[Any]) -> list[list[Document]]:
+    """Batched retrieve_with_rerank: delegates each argument group to retrieve_many."""
+    results: list[list[Document]] = [[] for _ in inputs]
+    groups = _group_inputs(inputs, _unpack_rerank_input)
+    for (retrieval_k, rerank_k, namespace, metadata_filter), items in groups.items():
+        docs_per_query = retrieve_many(
+            [q for _, q in items],
+            retrieval_k=retrieval_k,
+            rerank_k=rerank_k,
+            namespace=namespace,
+            filter=metadata_filter,
+        )
+        for (i, _), docs in zip(items, docs_per_query):
+            results[i] = docs
+    return results
+
+
+def retrieve_many(
+    queries: Sequence[str],
+    retrieval_k: int | None = None,
+    rerank_k: int | None = None,
+    namespace: str | None = None,
+    filter: MetadataFilter | dict | None = None,
+) -> list[list[Document]]:
+    """Retrieve and rerank documents for several queries at once.
 
+    Batched form of retrieve_with_rerank: all queries are embedded in one
+    request, the Pinecone queries run concurrently, and every (query, chunk)
+    pair is scored in a single cross-encoder batch.
 
-@chain
+    Args:
+        queries: Search query strings.
+        retrieval_k: Number of candidates per query from vector search. Defaults to
+            settings.retrieval_top_k.
+        rerank_k: Number of final documents per query after reranking. Defaults to
+            settings.rerank_top_k.
+        namespace: Optional Pinecone namespace.
+        filter: Optional MetadataFilter (or dict of its fields) applied to
+            every query's vector search.
+
+    Returns:
+        One list of top rerank_k documents per query, in the order of queries.
+
+    Raises:
+        ValueError: If any query is empty.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    if any(not q or not q.strip() for q in queries):
+        raise ValueError("Query cannot be empty")
+
+    k_retrieval = retrieval_k if retrieval_k is not None else settings.retrieval_top_k
+    with metrics.timed("total"):
+        metadata_filter = MetadataFilter.coerce(filter)
+        store = get_vector_store(namespace=namespace)
+        vectors = _embed_queries(store, queries)
+        cache = get_result_cache()
+        if cache is None:
+            return _retrieve_uncached(
+                queries, store, vectors, k_retrieval, rerank_k, namespace, metadata_filter
+            )
+
+        keys = [_result_cache_key(query, k_retrieval, rerank_k, metadata_filter) for query in queries]
+        version = cache.version(namespace)
+        results = [cache.get(namespace, key, vector) for key, vector in zip(keys, vectors)]
+        pending = [i for i, docs in enumerate(results) if docs is None]
+        if pending:
+            fresh = _retrieve_uncached(
+                [queries[i] for i in pending], store, [vectors[i] for i in pending],
+                k_retrieval, rerank_k, namespace, metadata_filter,
+            )
+            for i, docs in zip(pending, fresh):
+                cache.put(namespace, keys[i], vectors[i], docs, version)
+                results[i] = docs
+        return results
+
+
+def _retrieve_uncached(
+    queries: list[str],
+    store: Any,
+    vectors: list[list[float]],
+    k_retrieval: int,
+    rerank_k: int | None,
+    namespace: str | None,
+    metadata_filter: MetadataFilter | None,
+) -> list[list[Document]]:
+    """Internal: vector search, sparse fusion and reranking for embedded queries."""
+    candidates = _search_vectors(store, vectors, k_retrieval, metadata_filter)
+    candidates = _fuse_sparse(queries, candidates, k_retrieval, namespace, metadata_filter)
+    logger.debug(
+        "Retrieved %d candidates for %d queries (k=%d)",
+        sum(len(c) for c in candidates), len(queries), k_retrieval,
+    )
+    return [_expand_parents(docs) for docs in _rerank_candidates(queries, candidates, rerank_k)]
+
+
+def _expand_parents(documents: list[Document]) -> list[Document]:
+    """Internal: swap reranked chunks for their parent passages when the parent store is on."""
+    store = get_parent_store()
+    if store is None or not documents:
+        return documents
+    with metrics.timed("expand_parents"):
+        return expand_to_parents(documents, store)
+
+
+def _result_cache_key(
+    query: str,
+    k_retrieval: int,
+    rerank_k: int | None,
+    metadata_filter: MetadataFilter | None,
+) -> tuple[frozenset[str], int, int, MetadataFilter | None]:
+    """Internal: result cache scope within a namespace (query numbers/entities and arguments that change the result)."""
+    return (
+        query_signature(query),
+        k_retrieval,
+        rerank_k if rerank_k is not None else settings.rerank_top_k,
+        metadata_filter,
+    )
+
+
+def _fuse_sparse(
+    queries: list[str],
+    candidates: list[list[Document]],
+    k: int,
+    namespace: str | None,
+    metadata_filter: MetadataFilter | None,
+) -> list[list[Document]]:
+    """Internal: fuse each query's dense candidates with local BM25 hits (RRF) when hybrid is on."""
+    if not settings.hybrid_enabled:
+        return candidates
+    fused = []
+    for query, dense in zip(queries, candidates):
+        sparse = sparse_search(query, k, namespace, metadata_filter)
+        fused.append(reciprocal_rank_fusion([dense, sparse], k, settings.rrf_k) if sparse else dense)
+        metrics.observe("retrieval_candidates", len(fused[-1]), stage="hybrid")
+    return fused
+
+
+def _dedup(candidates: list[Document]) -> list[Document]:
+    """Internal: collapse near-duplicate candidates when enabled in settings."""
+    if not settings.dedup_enabled or len(candidates) < 2:
+        return candidates
+    kept = collapse_near_duplicates(candidates, settings.dedup_similarity_threshold)
+    metrics.inc("retrieval_dedup_dropped_total", len(candidates) - len(kept))
+    metrics.observe("retrieval_candidates", len(kept), stage="dedup")
+    return kept
+
+
+def _rerank_candidates(
+    queries: list[str],
+    candidates: list[list[Document]],
+    rerank_k: int | None,
+) -> list[list[Document]]:
+    """Internal: dedup and cascade (when enabled), then one cross-encoder batch."""
+    candidates = [_dedup(docs) for docs in candidates]
+    if not settings.rerank_cascade_enabled:
+        return rerank_many(queries, candidates, k=rerank_k)
+
+    k_rerank = rerank_k if rerank_k is not None else settings.rerank_top_k
+    results: list[list[Document]] = [[] for _ in queries]
+    pending: list[int] = []
+    for i, (query, docs) in enumerate(zip(queries, candidates)):
+        if not docs:
+            continue
+        final, candidates[i] = apply_cascade(query, docs, k_rerank)
+        if final is not None:
+            results[i] = final
+        else:
+            pending.append(i)
+    reranked = rerank_many(
+        [queries[i] for i in pending], [candidates[i] for i in pending], k=rerank_k
+    )
+    for i, docs in zip(pending, reranked):
+        results[i] = docs
+    return results
+
+
+async def aretrieve_many(
+    queries: Sequence[str],
+    retrieval_k: int | None = None,
+    rerank_k: int | None = None,
+    namespace: str | None = None,
+    filter: MetadataFilter | dict | None = None,
+) -> list[list[Document]]:
+    """Async retrieve_many: async embedding and Pinecone queries, reranking in a thread."""
+    queries = list(queries)
+    if not queries:
+        return []
+    if any(not q or not q.strip() for q in queries):
+        raise ValueError("Query cannot be empty")
+
+    k_retrieval = retrieval_k if retrieval_k is not None else settings.retrieval_top_k
+    with metrics.timed("total"):
+        metadata_filter = MetadataFilter.coerce(filter)
+        store = get_vector_store(namespace=namespace)
+        vectors = await _aembed_queries(store, queries)
+        cache = get_result_cache()
+        if cache is None:
+            return await _aretrieve_uncached(
+                queries, store, vectors, k_retrieval, rerank_k, namespace, metadata_filter
+            )
+
+        keys = [_result_cache_key(query, k_retrieval, rerank_k, metadata_filter) for query in queries]
+        version = cache.version(namespace)
+        results = [cache.get(namespace, key, vector) for key, vector in zip(keys, vectors)]
+        pending = [i for i, docs in enumerate(results) if docs is None]
+        if pending:
+            fresh = await _aretrieve_uncached(
+                [queries[i] for i in pending], store, [vectors[i] for i in pending],
+                k_retrieval, rerank_k, namespace, metadata_filter,
+            )
+            for i, docs in zip(pending, fresh):
+                cache.put(namespace, keys[i], vectors[i], docs, version)
+                results[i] = docs
+        return results
+
+
+async def _aretrieve_uncached(
+    queries: list[str],
+    store: Any,
+    vectors: list[list[float]],
+    k_retrieval: int,
+    rerank_k: int | None,
+    namespace: str | None,
+    metadata_filter: MetadataFilter | None,
+) -> list[list[Document]]:
+    """Internal: async _retrieve_uncached (sparse fusion and reranking in threads)."""
+    candidates = await _asearch_vectors(store, vectors, k_retrieval, namespace, metadata_filter)
+    if settings.hybrid_enabled:
+        candidates = await asyncio.to_thread(
+            _fuse_sparse, queries, candidates, k_retrieval, namespace, metadata_filter
+        )
+    results = await asyncio.to_thread(_rerank_candidates, queries, candidates, rerank_k)
+    return await asyncio.to_thread(lambda: [_expand_parents(docs) for docs in results])
+
+
+async def aretrieve_with_rerank(
+    query: str,
+    retrieval_k: int | None = None,
+    rerank_k: int | None = None,
+    namespace: str | None = None,
+    filter: MetadataFilter | dict | None = None,
+) -> list[Document]:
+    """Async retrieve_with_rerank (same arguments and result).
+
+    Vector search runs on the shared async Pinecone client; the cross-encoder
+    runs in a worker thread so the event loop is never blocked. Also reachable
+    as ``retrieve_with_rerank.ainvoke`` / ``retrieve_with_rerank.abatch``.
+    """
+    (docs,) = await aretrieve_many(
+        [query], retrieval_k=retrieval_k, rerank_k=rerank_k, namespace=namespace, filter=filter
+    )
+    return docs
+
+
+async def _aretrieve_with_rerank_input(input: str | dict) -> list[Document]:
+    query, retrieval_k, rerank_k, namespace, metadata_filter = _unpack_rerank_input(input)
+    return await aretrieve_with_rerank(
+        query,
+        retrieval_k=retrieval_k,
+        rerank_k=rerank_k,
+        namespace=namespace,
+        filter=metadata_filter,
+    )
+
+
+async def _aretrieve_with_rerank_batch(inputs: list[Any]) -> list[list[Document]]:
+    """Async batched retrieve_with_rerank: argument groups run concurrently."""
+    results: list[list[Document]] = [[] for _ in inputs]
+    groups = list(_group_inputs(inputs, _unpack_rerank_input).items())
+    outputs = await asyncio.gather(
+        *(
+            aretrieve_many(
+                [q for _, q in items], retrieval_k=rk, rerank_k=kk, namespace=ns, filter=mf
+            )
+            for (rk, kk, ns, mf), items in groups
+        )
+    )
+    for (_, items), docs_per_query in zip(groups, outputs):
+        for (i, _), docs in zip(items, docs_per_query):
+            results[i] = docs
+    return results
+
+
+@_batched(
+    _retrieve_with_rerank_batch,
+    afunc=_aretrieve_with_rerank_input,
+    abatch_func=_aretrieve_with_rerank_batch,
+)
 def retrieve_with_rerank(
     query: str,
     retrieval_k: int | None = None,
     rerank_k: int | None = None,
     namespace: str | None = None,
+    filter: MetadataFilter | dict | None = None,
 ) -> list[Document]:
     """Retrieve documents via vector search, then rerank for relevance.
 
     Two-stage RAG pipeline: (1) vector similarity search for candidates,
+    fused by reciprocal rank fusion with local BM25 hits when
+    settings.hybrid_enabled (exact terms such as tickers or "EBITDA 2024"),
     (2) cross-encoder reranking for final ordering.
 
     Args:
@@ -162,18 +1039,67 @@ def retrieve_with_rerank(
         rerank_k: Number of final documents after reranking. Defaults to
             settings.rerank_top_k.
         namespace: Optional Pinecone namespace.
+        filter: Optional MetadataFilter (or dict of its fields, e.g.
+            {"company": "Tesla", "date_from": "2024-01-01"}) applied server-side
+            by Pinecone, so candidates and rerank work stay within scope.
 
     Returns:
-        Top rerank_k documents ordered by reranker score.
+        Top rerank_k documents ordered by reranker score; with the parent store
+        enabled each is expanded to its full parent passage (chunks sharing a
+        parent are returned once, so there may be fewer). A query whose
+        embedding is close enough to an earlier one in the same namespace (see
+        settings.result_cache_similarity) is answered from the semantic result
+        cache without vector search or reranking.
     """
-    query, retrieval_k, rerank_k, namespace = _unpack_rerank_input(query)
+    query, retrieval_k, rerank_k, namespace, metadata_filter = _unpack_rerank_input(query)
     if not query or not query.strip():
         raise ValueError("Query cannot be empty")
 
     k_retrieval = retrieval_k if retrieval_k is not None else settings.retrieval_top_k
-    candidates = _vector_search(query, k_retrieval, namespace)
+    with metrics.timed("total"):
+        store = get_vector_store(namespace=namespace)
+        vector = _embed_queries(store, [query])[0]
+        cache = get_result_cache()
+        if cache is None:
+            return _retrieve_one(
+                query, store, vector, k_retrieval, rerank_k, namespace, metadata_filter
+            )
+
+        key = _result_cache_key(query, k_retrieval, rerank_k, metadata_filter)
+        version = cache.version(namespace)
+        cached = cache.get(namespace, key, vector)
+        if cached is not None:
+            logger.debug("Served query from the semantic result cache")
+            return cached
+        docs = _retrieve_one(
+            query, store, vector, k_retrieval, rerank_k, namespace, metadata_filter
+        )
+        cache.put(namespace, key, vector, docs, version)
+        return docs
+
+
+def _retrieve_one(
+    query: str,
+    store: Any,
+    vector: list[float],
+    k_retrieval: int,
+    rerank_k: int | None,
+    namespace: str | None,
+    metadata_filter: MetadataFilter | None,
+) -> list[Document]:
+    """Internal: the uncached retrieve_with_rerank pipeline for an embedded query."""
+    (candidates,) = _search_vectors(store, [vector], k_retrieval, metadata_filter)
+    (candidates,) = _fuse_sparse([query], [candidates], k_retrieval, namespace, metadata_filter)
     if not candidates:
         logger.debug("No candidates retrieved for query")
         return []
 
-    return rerank(query, candidates, k=rerank_k)
+    candidates = _dedup(candidates)
+    if settings.rerank_cascade_enabled:
+        k_rerank = rerank_k if rerank_k is not None else settings.rerank_top_k
+        final, candidates = apply_cascade(query, candidates, k_rerank)
+        if final is not None:
+            logger.debug("Cascade skipped cross-encoder (clear vector score margin)")
+            return _expand_parents(final)
+
+    return _expand_parents(rerank(query, candidates, k=rerank_k))
@@ -39,3 +39,28 @@ def sample_documents() -> list[Document]:
             metadata={"source": "mammal-pets-doc"},
         ),
     ]
+
+
+# Settings that default to files under <project>/data/ (vectors, BM25 index, parents,
+# manifest, passage embedding cache), mapped to their per-test location
+_DATA_PATHS = {
+    "local_vector_dir": "vectors",
+    "sparse_index_dir": "sparse-index",
+    "parent_store_path": "parents.sqlite",
+    "chunk_manifest_path": "chunk-manifest.sqlite",
+    "ingest_embedding_cache_path": "embedding-cache.sqlite",
+}
+
+
+@pytest.fixture(autouse=True)
+def _isolated_data_dir(tmp_path, monkeypatch):
+    """Point every data/ setting at a per-test directory and reset the stores built from them."""
+    from config import settings
+    from ingestion.upsert import reset_upsert_cache
+
+    data_dir = tmp_path / "data"
+    for name, relative in _DATA_PATHS.items():
+        monkeypatch.setattr(settings, name, str(data_dir / relative))
+    reset_upsert_cache()
+    yield
+    reset_upsert_cache()
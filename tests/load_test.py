@@ -5,7 +5,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from ingestion import load_documents
+from ingestion import iter_documents, load_documents
 from langchain_core.documents import Document
 
 FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
@@ -35,6 +35,17 @@ class TestLoadPDF:
         assert "Annual Report 2024" in docs[0].page_content
 
 
+    def test_iter_documents_yields_pages_lazily(self, sample_pdf_path):
+        pages = iter_documents(sample_pdf_path)
+        first = next(pages)
+        assert "Annual Report 2024" in first.page_content
+        assert [d.metadata["page"] for d in pages] == [1]
+
+    def test_iter_documents_validates_before_iterating(self):
+        with pytest.raises(FileNotFoundError, match="File not found"):
+            iter_documents(FIXTURES_DIR / "nonexistent.pdf")
+
+
 class TestLoadWeb:
     """Web URL loading tests (mocked to avoid network)."""
 
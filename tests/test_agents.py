@@ -215,6 +215,56 @@ class TestRetrievalTool:
         assert "Dogs are great companions" in result
         assert "Source: mammal-pets-doc" in result
 
+    @patch("agents.tools.retrieval_tool.get_token_counter")
+    @patch("agents.tools.retrieval_tool.retrieve_with_rerank")
+    def test_results_are_packed_into_token_budget(
+        self, mock_retrieve: MagicMock, mock_counter: MagicMock
+    ) -> None:
+        mock_retrieve.invoke.return_value = [
+            Document(
+                page_content="Revenue grew 12% in 2024. Margins fell. Guidance was raised.",
+                metadata={"source": "10k.pdf", "rerank_score": 0.9},
+            ),
+        ]
+        mock_counter.return_value = lambda text: len(text.split())
+
+        with patch.object(settings, "retrieval_context_token_budget", 14):
+            result = RetrievalTool()._run(query="revenue")
+
+        mock_counter.assert_called_once_with(settings.llm_model)
+        assert result.endswith("Revenue grew 12% in 2024. Margins fell. ...")
+        assert "Source: 10k.pdf" in result
+
+    @patch("agents.tools.retrieval_tool.retrieve_with_rerank")
+    def test_company_scope_is_pushed_down_as_filter(
+        self, mock_retrieve: MagicMock, sample_documents: list[Document]
+    ) -> None:
+        mock_retrieve.invoke.return_value = sample_documents
+
+        tool = RetrievalTool(company="Acme Corp")
+        tool._run(query="revenue")
+
+        mock_retrieve.invoke.assert_called_once_with(
+            {
+                "query": "revenue",
+                "retrieval_k": settings.retrieval_top_k,
+                "rerank_k": settings.rerank_top_k,
+                "filter": {"company": "Acme Corp"},
+            }
+        )
+
+    @patch("agents.tools.retrieval_tool.retrieve_with_rerank")
+    def test_company_scope_falls_back_to_unfiltered(
+        self, mock_retrieve: MagicMock, sample_documents: list[Document]
+    ) -> None:
+        mock_retrieve.invoke.side_effect = [[], sample_documents]
+
+        tool = RetrievalTool(company="Acme Corp")
+        result = tool._run(query="revenue")
+
+        assert "filter" not in mock_retrieve.invoke.call_args_list[1].args[0]
+        assert "Dogs are great companions" in result
+
     @patch("agents.tools.retrieval_tool.retrieve_with_rerank")
     def test_empty_results_returns_message(self, mock_retrieve: MagicMock) -> None:
         mock_retrieve.invoke.return_value = []
@@ -582,3 +632,24 @@ class TestStratAgentCrew:
         # Process.sequential is an enum; check it was passed
         assert call_kwargs["process"] is not None
 
+    @patch("agents.crew.create_synthesis_task")
+    @patch("agents.crew.create_critic_task")
+    @patch("agents.crew.create_research_task")
+    @patch("agents.crew.Crew")
+    def test_run_scopes_retrieval_tool_to_company(
+        self,
+        mock_crew_cls: MagicMock,
+        mock_create_research_task: MagicMock,
+        mock_create_critic_task: MagicMock,
+        mock_create_synthesis_task: MagicMock,
+    ) -> None:
+        mock_result = MagicMock()
+        mock_result.pydantic = _make_sample_brief()
+        mock_crew_cls.return_value.kickoff.return_value = mock_result
+
+        crew = StratAgentCrew()
+        crew.run(company="TestCo", question="What are the risks?")
+
+        retrieval_tools = [t for t in crew.research_agent.tools if isinstance(t, RetrievalTool)]
+        assert [t.company for t in retrieval_tools] == ["TestCo"]
+
@@ -1,5 +1,7 @@
 """API tests."""
 
+import hashlib
+import json
 from io import BytesIO
 from unittest.mock import patch
 
@@ -10,7 +12,10 @@ from agents.schemas import (
     StrategicBrief,
     SWOTAnalysis,
 )
-from api.main import app
+from api.main import _background_tasks, _warm_up, app
+from config import settings
+from ingestion.parallel import FileIngestResult
+from ingestion.upsert import UpsertProgress
 
 client = TestClient(app)
 
@@ -22,6 +27,38 @@ def test_health_check() -> None:
     assert response.json() == {"status": "ok"}
 
 
+def test_ready_reports_warming_until_warm() -> None:
+    """Test /ready returns 503 before warm-up has completed."""
+    app.state.ready = False
+    app.state.warmup_error = None
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "warming"}
+
+
+async def test_warm_up_marks_app_ready() -> None:
+    """Test successful warm-up flips /ready to 200."""
+    app.state.ready = False
+    app.state.warmup_error = None
+    with patch("api.main.warm_up") as mock_warm_up:
+        await _warm_up(app)
+    mock_warm_up.assert_called_once()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+
+
+async def test_warm_up_failure_keeps_app_not_ready() -> None:
+    """Test failed warm-up is reported by /ready."""
+    app.state.ready = False
+    app.state.warmup_error = None
+    with patch("api.main.warm_up", side_effect=RuntimeError("model download failed")):
+        await _warm_up(app)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "failed", "error": "model download failed"}
+
+
 def test_analyse_validates_request_body() -> None:
     """Test /analysis/analyze-test requires company and question."""
     response = client.post("/analysis/analyze-test", json={})
@@ -79,11 +116,8 @@ def test_ingest_upload_rejects_unsupported_type() -> None:
 
 def test_ingest_upload_accepts_pdf() -> None:
     """Test /ingest/upload accepts PDF and returns chunk info (mocked)."""
-    mock_docs = [type("Doc", (), {"page_content": "test", "metadata": {}})()]
-    with (
-        patch("api.main.load_documents", return_value=mock_docs),
-        patch("api.main.upsert_documents", return_value=["id1", "id2"]),
-    ):
+    result = FileIngestResult(filename="report.pdf", documents=1, chunk_ids=["id1", "id2"])
+    with patch("api.main.ingest_pdfs", return_value=[result]) as mock_ingest:
         response = client.post(
             "/ingest/upload",
             files=[("files", ("report.pdf", BytesIO(b"%PDF-1.4 fake"), "application/pdf"))],
@@ -96,6 +130,108 @@ def test_ingest_upload_accepts_pdf() -> None:
     assert data["files"][0]["filename"] == "report.pdf"
     assert data["files"][0]["documents"] == 1
     assert data["files"][0]["chunks"] == 2
+    assert data["files"][0]["sha256"] == hashlib.sha256(b"%PDF-1.4 fake").hexdigest()
+    ((filename, path),) = mock_ingest.call_args.args[0]
+    assert filename == "report.pdf"
+    assert not path.exists()  # temp file removed after ingestion
+
+
+def test_ingest_upload_reports_unparseable_pdf() -> None:
+    """Test /ingest/upload returns 400 when a file cannot be parsed."""
+    with patch("api.main.ingest_pdfs", side_effect=ValueError("Could not parse bad.pdf")):
+        response = client.post(
+            "/ingest/upload",
+            files=[("files", ("bad.pdf", BytesIO(b"%PDF-1.4 truncated"), "application/pdf"))],
+        )
+    assert response.status_code == 400
+    assert "bad.pdf" in response.json()["detail"]
+
+
+def test_ingest_upload_rejects_files_without_pdf_header() -> None:
+    """Test /ingest/upload rejects a .pdf whose content is not a PDF before ingesting."""
+    with patch("api.main.ingest_pdfs") as mock_ingest:
+        response = client.post(
+            "/ingest/upload",
+            files=[("files", ("fake.pdf", BytesIO(b"<html>not a pdf</html>"), "application/pdf"))],
+        )
+    assert response.status_code == 400
+    assert "fake.pdf is not a PDF" in response.json()["detail"]
+    mock_ingest.assert_not_called()
+
+
+def test_ingest_upload_streams_large_files_and_enforces_size_limit() -> None:
+    """Test uploads are copied in chunks, hashed whole, and rejected past the size limit."""
+    content = b"%PDF-1.7\n" + b"x" * 5000
+    result = FileIngestResult(filename="big.pdf", documents=1, chunk_ids=["id1"])
+    with (
+        patch.object(settings, "upload_chunk_bytes", 1024),
+        patch("api.main.ingest_pdfs", return_value=[result]) as mock_ingest,
+    ):
+        response = client.post(
+            "/ingest/upload",
+            files=[("files", ("big.pdf", BytesIO(content), "application/pdf"))],
+        )
+        assert response.status_code == 200
+        assert response.json()["files"][0]["sha256"] == hashlib.sha256(content).hexdigest()
+
+        with patch.object(settings, "upload_max_bytes", 4096):
+            response = client.post(
+                "/ingest/upload",
+                files=[("files", ("big.pdf", BytesIO(content), "application/pdf"))],
+            )
+        assert response.status_code == 413
+        assert mock_ingest.call_count == 1
+
+
+def test_ingest_upload_stream_reports_windows() -> None:
+    """Test /ingest/upload/stream emits one NDJSON event per window, then the result."""
+    result = FileIngestResult(filename="report.pdf", documents=3, chunk_ids=["id1", "id2", "id3"])
+
+    def fake_ingest(files, metadata=None, on_progress=None):
+        on_progress("report.pdf", UpsertProgress(window=1, pages=2, chunks=2))
+        on_progress("report.pdf", UpsertProgress(window=2, pages=3, chunks=3))
+        return [result]
+
+    with patch("api.main.ingest_pdfs", side_effect=fake_ingest):
+        response = client.post(
+            "/ingest/upload/stream",
+            files=[("files", ("report.pdf", BytesIO(b"%PDF-1.4 fake"), "application/pdf"))],
+        )
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["event"] for e in events] == ["window", "window", "done"]
+    assert events[1] == {"event": "window", "filename": "report.pdf", "window": 2, "pages": 3, "chunks": 3}
+    assert events[2]["result"]["chunk_count"] == 3
+
+
+def test_ingest_upload_stream_reports_errors_in_band() -> None:
+    """Test /ingest/upload/stream ends with an error event when parsing fails."""
+    with patch("api.main.ingest_pdfs", side_effect=ValueError("Could not parse bad.pdf")):
+        response = client.post(
+            "/ingest/upload/stream",
+            files=[("files", ("bad.pdf", BytesIO(b"%PDF-1.4 truncated"), "application/pdf"))],
+        )
+    assert response.status_code == 200
+    (event,) = [json.loads(line) for line in response.text.splitlines()]
+    assert event == {"event": "error", "detail": "Could not parse bad.pdf"}
+
+
+def test_ingest_upload_stream_holds_its_task_until_done() -> None:
+    """Test the streamed ingestion task is strongly referenced only while it runs."""
+    running = []
+
+    def fake_ingest(files, metadata=None, on_progress=None):
+        running.append(len(_background_tasks))
+        return []
+
+    with patch("api.main.ingest_pdfs", side_effect=fake_ingest):
+        response = client.post(
+            "/ingest/upload/stream",
+            files=[("files", ("report.pdf", BytesIO(b"%PDF-1.4 fake"), "application/pdf"))],
+        )
+    assert response.status_code == 200
+    assert running == [1]
+    assert not _background_tasks
 
 
 def test_ingest_url_validates_url() -> None:
@@ -119,3 +255,13 @@ def test_ingest_url_accepts_valid_url() -> None:
     data = response.json()
     assert data["chunk_count"] == 1
     assert data["chunk_ids"] == ["id1"]
+
+
+def test_metrics_exposes_prometheus_text() -> None:
+    """Test /metrics serves the retrieval metrics registry in Prometheus format."""
+    with patch("api.main.metrics_registry") as mock_registry:
+        mock_registry.render_prometheus.return_value = "retrieval_dedup_dropped_total 2\n"
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.text == "retrieval_dedup_dropped_total 2\n"
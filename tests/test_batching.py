@@ -0,0 +1,103 @@
+"""Tests for reranker micro-batching."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from retrieval.batching import RerankDispatcher
+
+
+def _score_by_length(pairs: list[tuple[str, str]]) -> list[float]:
+    return [float(len(p)) for _, p in pairs]
+
+
+class TestRerankDispatcher:
+    """Cross-thread batching behaviour."""
+
+    def test_concurrent_requests_share_a_batch(self) -> None:
+        calls: list[int] = []
+        lock = threading.Lock()
+
+        def score(pairs: list[tuple[str, str]]) -> list[float]:
+            with lock:
+                calls.append(len(pairs))
+            time.sleep(0.05)  # a forward pass; later requests queue up meanwhile
+            return _score_by_length(pairs)
+
+        dispatcher = RerankDispatcher(score, max_batch_size=64, max_wait_ms=200)
+        barrier = threading.Barrier(4)
+
+        def worker(i: int) -> list[float]:
+            barrier.wait()
+            return dispatcher.submit([("q", "x" * i), ("q", "y" * (i + 10))])
+
+        try:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(worker, range(1, 5)))
+        finally:
+            dispatcher.close()
+
+        assert results == [[float(i), float(i + 10)] for i in range(1, 5)]
+        assert sum(calls) == 8
+        assert len(calls) < 4
+        assert dispatcher.stats.requests == 4
+        assert dispatcher.stats.max_batch_pairs > 2
+
+    def test_batches_respect_max_batch_size(self) -> None:
+        dispatcher = RerankDispatcher(_score_by_length, max_batch_size=2, max_wait_ms=0)
+        try:
+            assert dispatcher.submit([("q", "abc")]) == [3.0]
+            assert dispatcher.submit([("q", "a"), ("q", "ab"), ("q", "abc")]) == [1.0, 2.0, 3.0]
+        finally:
+            dispatcher.close()
+        assert dispatcher.stats.batches == 2
+
+    def test_errors_propagate_to_callers(self) -> None:
+        def boom(pairs: list[tuple[str, str]]) -> list[float]:
+            raise RuntimeError("model failed")
+
+        dispatcher = RerankDispatcher(boom, max_wait_ms=0)
+        try:
+            with pytest.raises(RuntimeError, match="model failed"):
+                dispatcher.submit([("q", "p")])
+        finally:
+            dispatcher.close()
+
+    def test_submit_after_close_raises(self) -> None:
+        dispatcher = RerankDispatcher(_score_by_length)
+        dispatcher.close()
+        with pytest.raises(RuntimeError, match="closed"):
+            dispatcher.submit([("q", "p")])
+
+    def test_lone_caller_does_not_wait(self) -> None:
+        dispatcher = RerankDispatcher(_score_by_length, max_wait_ms=2000)
+        try:
+            started = time.perf_counter()
+            assert dispatcher.submit([("q", "ab")]) == [2.0]
+            assert dispatcher.submit([("q", "abc")]) == [3.0]
+            assert time.perf_counter() - started < 1.0
+        finally:
+            dispatcher.close()
+
+    def test_close_racing_submits_never_hangs(self) -> None:
+        for _ in range(20):
+            dispatcher = RerankDispatcher(_score_by_length, max_wait_ms=1)
+            outcomes: list[str] = []
+
+            def call() -> None:
+                try:
+                    dispatcher.submit([("q", "p")])
+                    outcomes.append("scored")
+                except RuntimeError:
+                    outcomes.append("closed")
+
+            threads = [threading.Thread(target=call) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            dispatcher.close()
+            for thread in threads:
+                thread.join(timeout=5)
+            assert not any(thread.is_alive() for thread in threads)
+            assert len(outcomes) == 4
@@ -0,0 +1,178 @@
+"""Tests for retrieval caches."""
+
+from pathlib import Path
+
+import pytest
+from langchain_core.documents import Document
+
+from retrieval.cache import (
+    LRUCache,
+    QueryEmbeddingCache,
+    RerankScoreCache,
+    SemanticResultCache,
+    normalize_query,
+    query_signature,
+)
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+class TestLRUCache:
+    """LRU eviction, TTL and counters."""
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1  # "a" becomes most recent
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats.evictions == 1
+
+    def test_entries_expire_after_ttl(self) -> None:
+        now = [0.0]
+        cache = LRUCache(maxsize=4, ttl_seconds=10, clock=lambda: now[0])
+        cache.put("a", 1)
+        now[0] = 5.0
+        assert cache.get("a") == 1
+        now[0] = 20.0
+        assert cache.get("a") is None
+        assert cache.stats.expirations == 1
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_invalid_maxsize_raises(self) -> None:
+        with pytest.raises(ValueError, match="maxsize must be at least 1"):
+            LRUCache(maxsize=0)
+
+
+class TestQueryEmbeddingCache:
+    """Query-embedding cache keys and on-disk tier."""
+
+    def test_normalize_query(self) -> None:
+        assert normalize_query("  Tesla\tRevenue  2024 ") == "tesla revenue 2024"
+
+    def test_keys_are_scoped_by_model(self) -> None:
+        cache = QueryEmbeddingCache(maxsize=4)
+        cache.put_many("model-a", ["q"], [[1.0]])
+        assert cache.get_many("model-a", ["Q"]) == [[1.0]]
+        assert cache.get_many("model-b", ["q"]) == [None]
+
+    def test_disk_tier_survives_new_instance(self) -> None:
+        FIXTURES_DIR.mkdir(exist_ok=True)
+        path = FIXTURES_DIR / "query_cache.sqlite"
+        path.unlink(missing_ok=True)
+        try:
+            first = QueryEmbeddingCache(maxsize=4, path=path)
+            first.put_many("m", ["tesla competitors"], [[0.25, 0.5]])
+            first.close()
+
+            second = QueryEmbeddingCache(maxsize=4, path=path)
+            assert second.get_many("m", ["tesla competitors"]) == [[0.25, 0.5]]
+            assert second.disk_hits == 1
+            second.close()
+        finally:
+            path.unlink(missing_ok=True)
+
+    def test_disk_tier_purges_expired_and_evicts_least_recently_used(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        now = [1000.0]
+        monkeypatch.setattr("retrieval.cache.time.time", lambda: now[0])
+        cache = QueryEmbeddingCache(
+            maxsize=4, ttl_seconds=100, path=tmp_path / "q.sqlite", max_disk_entries=2
+        )
+        cache.put_many("m", ["stale"], [[0.0]])
+        now[0] += 150
+        cache.put_many("m", ["a", "b"], [[1.0], [2.0]])
+        assert len(cache._conn.execute("SELECT key FROM query_embeddings").fetchall()) == 2
+        assert cache.disk_evictions == 0  # "stale" was purged by TTL, not evicted
+
+        now[0] += 1
+        cache.clear()
+        assert cache.get_many("m", ["a"]) == [[1.0]]  # disk hit refreshes "a"
+        now[0] += 1
+        cache.put_many("m", ["c"], [[3.0]])  # evicts "b", the least recently used
+
+        cache.clear()
+        assert cache.get_many("m", ["a", "b", "c"]) == [[1.0], None, [3.0]]
+        assert cache.disk_evictions == 1
+        cache.close()
+
+
+class TestRerankScoreCache:
+    """Reranker score cache keys."""
+
+    def test_scores_keyed_by_model_query_and_passage(self) -> None:
+        cache = RerankScoreCache(maxsize=4)
+        cache.put_many("bge", [("q", "chunk")], [0.75])
+
+        assert cache.get_many("bge", [("q", "chunk"), ("q", "other")]) == [0.75, None]
+        assert cache.get_many("other-model", [("q", "chunk")]) == [None]
+
+
+class TestSemanticResultCache:
+    """Nearest-neighbour lookup, scoping and namespace invalidation."""
+
+    @pytest.fixture
+    def versions(self) -> dict[str | None, int]:
+        return {}
+
+    @pytest.fixture
+    def cache(self, versions: dict[str | None, int]) -> SemanticResultCache:
+        return SemanticResultCache(maxsize=4, threshold=0.9, version=lambda ns: versions.get(ns, 0))
+
+    def test_hits_nearby_query_and_misses_distant_one(self, cache: SemanticResultCache) -> None:
+        cache.put("ns", "k", [1.0, 0.0, 0.1], [Document(page_content="a")], version=0)
+
+        hit = cache.get("ns", "k", [1.0, 0.05, 0.0])
+        assert [d.page_content for d in hit] == ["a"]
+        assert cache.get("ns", "k", [0.0, 1.0, 0.0]) is None
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    def test_scoped_by_namespace_and_key(self, cache: SemanticResultCache) -> None:
+        cache.put("ns", "k", [1.0, 0.0], [Document(page_content="a")], version=0)
+
+        assert cache.get("other", "k", [1.0, 0.0]) is None
+        assert cache.get("ns", "k2", [1.0, 0.0]) is None
+
+    def test_write_to_namespace_invalidates_its_entries(
+        self, cache: SemanticResultCache, versions: dict[str | None, int]
+    ) -> None:
+        cache.put("ns", "k", [1.0, 0.0], [Document(page_content="a")], version=0)
+        cache.put("other", "k", [1.0, 0.0], [Document(page_content="b")], version=0)
+        versions["ns"] = 1
+
+        assert cache.get("ns", "k", [1.0, 0.0]) is None
+        assert cache.get("other", "k", [1.0, 0.0]) is not None
+        assert cache.stats.invalidations == 1
+        assert len(cache) == 1
+
+    def test_result_computed_before_a_write_is_not_stored(
+        self, cache: SemanticResultCache, versions: dict[str | None, int]
+    ) -> None:
+        version = cache.version("ns")
+        versions["ns"] = 1
+        cache.put("ns", "k", [1.0, 0.0], [Document(page_content="a")], version)
+
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used_and_returns_copies(self, cache: SemanticResultCache) -> None:
+        for i in range(4):
+            cache.put("ns", i, [1.0, 0.0], [Document(page_content=str(i))], version=0)
+        cache.get("ns", 0, [1.0, 0.0])[0].metadata["mutated"] = True
+        cache.put("ns", 4, [1.0, 0.0], [Document(page_content="4")], version=0)
+
+        assert cache.get("ns", 1, [1.0, 0.0]) is None
+        assert cache.get("ns", 0, [1.0, 0.0])[0].metadata == {}
+        assert cache.stats.evictions == 1
+
+
+def test_query_signature_keeps_numbers_and_entities() -> None:
+    assert query_signature("What was Apple's revenue in 2023?") == {"apple", "2023"}
+    assert query_signature("Apple revenue 2023") != query_signature("Apple revenue 2022")
+    assert query_signature("Compare AAPL and MSFT Q3 margins") == {"aapl", "msft", "q3"}
+    assert query_signature("who competes with Tesla") == query_signature("Tesla main competitors")
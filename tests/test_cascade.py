@@ -0,0 +1,75 @@
+"""Tests for the reranker cascade."""
+
+from unittest.mock import patch
+
+import pytest
+from langchain_core.documents import Document
+
+from retrieval.cascade import apply_cascade, cascade_stats, lexical_overlap
+
+
+def _doc(text: str, vector_score: float) -> Document:
+    return Document(page_content=text, metadata={"vector_score": vector_score})
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    cascade_stats.reset()
+
+
+class TestApplyCascade:
+    """Skip and prune stages."""
+
+    def test_clear_vector_margin_skips_cross_encoder(self) -> None:
+        docs = [_doc("a", 0.5), _doc("b", 0.92), _doc("c", 0.4)]
+        with patch("retrieval.cascade.settings.rerank_cascade_skip_margin", 0.2):
+            final, to_rerank = apply_cascade("q", docs, k=1)
+
+        assert [d.page_content for d in final] == ["b"]
+        assert final[0].metadata["rerank_skipped"] is True
+        assert "rerank_score" not in final[0].metadata
+        assert to_rerank == []
+        assert cascade_stats.skipped == 1
+        assert cascade_stats.candidates_pruned == 2
+
+    def test_no_skip_with_reranker_threshold_or_sparse_only_candidates(self) -> None:
+        with patch("retrieval.cascade.settings.rerank_cascade_skip_margin", 0.2):
+            with patch("retrieval.cascade.settings.reranker_threshold", 0.3):
+                final, _ = apply_cascade("q", [_doc("a", 0.5), _doc("b", 0.92)], k=1)
+            assert final is None
+
+            sparse_only = Document(page_content="c", metadata={})
+            final, _ = apply_cascade("q", [_doc("b", 0.92), _doc("a", 0.5), sparse_only], k=2)
+            assert final is None  # its missing score must not open a 0.5 gap
+
+    def test_prunes_candidates_far_behind_best(self) -> None:
+        docs = [
+            _doc("tesla revenue grew", 0.80),
+            _doc("tesla revenue fell", 0.78),
+            _doc("board of directors", 0.40),
+        ]
+        with (
+            patch("retrieval.cascade.settings.rerank_cascade_skip_margin", 1.0),
+            patch("retrieval.cascade.settings.rerank_cascade_prune_margin", 0.2),
+        ):
+            final, to_rerank = apply_cascade("Tesla revenue", docs, k=1)
+
+        assert final is None
+        assert [d.page_content for d in to_rerank] == ["tesla revenue grew", "tesla revenue fell"]
+        assert cascade_stats.reranked == 1
+        assert cascade_stats.prune_rate == pytest.approx(1 / 3)
+
+    def test_never_keeps_fewer_than_k(self) -> None:
+        docs = [_doc("x", 0.9), _doc("y", 0.1), _doc("z", 0.05)]
+        with (
+            patch("retrieval.cascade.settings.rerank_cascade_skip_margin", 1.0),
+            patch("retrieval.cascade.settings.rerank_cascade_prune_margin", 0.0),
+        ):
+            _, to_rerank = apply_cascade("q", docs, k=2)
+
+        assert len(to_rerank) == 2
+
+
+def test_lexical_overlap() -> None:
+    assert lexical_overlap("Tesla EBITDA 2024", "EBITDA for Tesla rose in 2024") == 1.0
+    assert lexical_overlap("Tesla EBITDA", "Dogs are loyal") == 0.0
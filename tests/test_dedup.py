@@ -0,0 +1,37 @@
+"""Tests for near-duplicate candidate collapsing."""
+
+import pytest
+from langchain_core.documents import Document
+
+from retrieval.dedup import collapse_near_duplicates, dedup_stats, jaccard, shingles
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    dedup_stats.reset()
+
+
+class TestCollapseNearDuplicates:
+    """Dedup stage behaviour."""
+
+    def test_drops_layout_variants_of_the_same_text(self) -> None:
+        pdf = Document(page_content="Total revenues were $97.7 billion in 2024,\nup 1% year over year.")
+        html = Document(page_content="Total  revenues were $97.7 billion in 2024, up 1% year-over-year")
+        other = Document(page_content="We face competition from established automakers.")
+
+        result = collapse_near_duplicates([pdf, html, other], threshold=0.9)
+
+        assert result == [pdf, other]
+        assert dedup_stats.dropped == 1
+        assert dedup_stats.drop_rate == pytest.approx(1 / 3)
+
+    def test_overlapping_chunks_below_threshold_are_kept(self) -> None:
+        a = Document(page_content="one two three four five six seven eight")
+        b = Document(page_content="five six seven eight nine ten eleven twelve")
+
+        assert collapse_near_duplicates([a, b], threshold=0.9) == [a, b]
+
+
+def test_jaccard_of_identical_text_is_one() -> None:
+    text = "Revenue grew strongly in the automotive segment"
+    assert jaccard(shingles(text), shingles(text.upper())) == 1.0
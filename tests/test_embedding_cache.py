@@ -0,0 +1,50 @@
+"""Tests for the persistent ingestion embedding cache."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from ingestion.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+def test_vectors_round_trip_as_float16(tmp_path) -> None:
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=10)
+    cache.put_many("model", 3, ["a"], [[0.1, -0.5, 2.0]])
+
+    reopened = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=10)
+    (vector, missing) = reopened.get_many("model", 3, ["a", "b"])
+
+    assert vector == pytest.approx([0.1, -0.5, 2.0], abs=1e-3)
+    assert missing is None
+    assert reopened.get_many("other-model", 3, ["a"]) == [None]
+    assert reopened.get_many("model", 1024, ["a"]) == [None]
+    assert (reopened.stats.hits, reopened.stats.misses) == (1, 3)
+    assert reopened.stats.hit_rate == 0.25
+
+
+def test_evicts_least_recently_used(tmp_path) -> None:
+    clock = iter(range(100))
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=2)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("ingestion.embedding_cache.time.time", lambda: next(clock))
+        cache.put_many("m", 1, ["a"], [[1.0]])
+        cache.put_many("m", 1, ["b"], [[2.0]])
+        cache.get_many("m", 1, ["a"])  # "b" is now least recently used
+        cache.put_many("m", 1, ["c"], [[3.0]])
+
+    assert len(cache) == 2
+    assert cache.get_many("m", 1, ["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.stats.evictions == 1
+
+
+def test_cached_embeddings_embed_only_misses(tmp_path) -> None:
+    model = MagicMock()
+    model.embed_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+    embeddings = CachedEmbeddings(model, EmbeddingCache(tmp_path / "c.sqlite", 100), "m", 1)
+
+    assert embeddings.embed_documents(["aa", "bbb", "aa"]) == [[2.0], [3.0], [2.0]]
+    assert embeddings.embed_documents(["bbb", "cccc"]) == [[3.0], [4.0]]
+
+    assert [c.args[0] for c in model.embed_documents.call_args_list] == [["aa", "bbb"], ["cccc"]]
+    embeddings.embed_query("q")
+    model.embed_query.assert_called_once_with("q")
@@ -0,0 +1,77 @@
+"""Tests for metadata filters and ingestion metadata."""
+
+from datetime import date
+
+import pytest
+from langchain_core.documents import Document
+
+from ingestion.metadata import date_key, document_metadata, normalize_company, tag_documents
+from retrieval.filters import MetadataFilter
+
+
+class TestMetadataFilter:
+    """Pinecone filter expressions."""
+
+    def test_all_fields(self) -> None:
+        metadata_filter = MetadataFilter(
+            company=" Acme Corp ",
+            source="https://example.com/10k",
+            doc_type="10-K",
+            date_from=date(2023, 1, 1),
+            date_to="2023-12-31",
+        )
+
+        assert metadata_filter.to_pinecone() == {
+            "company": {"$eq": "acme corp"},
+            "source": {"$eq": "https://example.com/10k"},
+            "doc_type": {"$eq": "10-k"},
+            "doc_date": {"$gte": 20230101, "$lte": 20231231},
+        }
+
+    def test_empty_filter_is_none(self) -> None:
+        assert MetadataFilter().to_pinecone() is None
+
+    def test_coerce_accepts_dict_and_rejects_other_types(self) -> None:
+        assert MetadataFilter.coerce({"company": "Tesla"}) == MetadataFilter(company="Tesla")
+        with pytest.raises(TypeError, match="filter must be"):
+            MetadataFilter.coerce("company=Tesla")
+
+    def test_matches_evaluates_locally(self) -> None:
+        metadata_filter = MetadataFilter(company="Tesla", date_from="2024-01-01")
+
+        assert metadata_filter.matches({"company": "tesla", "doc_date": 20240315})
+        assert not metadata_filter.matches({"company": "tesla", "doc_date": 20231231})
+        assert not metadata_filter.matches({"company": "ford", "doc_date": 20240315})
+        assert not metadata_filter.matches({"company": "tesla"})
+
+    def test_filter_is_hashable(self) -> None:
+        assert len({MetadataFilter(company="a"), MetadataFilter(company="a")}) == 1
+
+    def test_date_forms_make_the_same_filter(self) -> None:
+        as_string = MetadataFilter(date_from="2024-01-01", date_to="2024-12-31T00:00:00")
+        as_date = MetadataFilter(date_from=date(2024, 1, 1), date_to=date(2024, 12, 31))
+
+        assert as_string == as_date
+        assert hash(as_string) == hash(as_date)
+
+
+class TestDocumentMetadata:
+    """Filterable fields written at ingestion."""
+
+    def test_company_matches_filter_normalisation(self) -> None:
+        assert normalize_company("ACME\tCorp ") == normalize_company("acme corp")
+
+    def test_date_key(self) -> None:
+        assert date_key("2024-02-29") == 20240229
+        assert date_key("2024-02-29T10:00:00") == 20240229
+        with pytest.raises(ValueError):
+            date_key("Feb 2024")
+
+    def test_unset_fields_are_omitted(self) -> None:
+        assert document_metadata(company="Tesla") == {"company": "tesla"}
+        assert document_metadata(company="  ") == {}
+
+    def test_tag_documents_merges_into_metadata(self) -> None:
+        doc = Document(page_content="x", metadata={"source": "a.pdf"})
+        tag_documents([doc], {"company": "tesla"})
+        assert doc.metadata == {"source": "a.pdf", "company": "tesla"}
@@ -0,0 +1,140 @@
+"""Tests for the embedded local vector store backend."""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingestion import get_vector_store, upsert_documents
+from ingestion.local_store import LocalVectorStore
+from ingestion.upsert import reset_upsert_cache
+
+TEXTS = [
+    "Tesla delivered 1.8 million vehicles in 2024.",
+    "Ford's Model e segment reported an operating loss.",
+    "GM expanded its Ultium battery platform.",
+    "Rivian ramped production of the R1S.",
+]
+
+
+@pytest.fixture
+def embedding() -> DeterministicFakeEmbedding:
+    return DeterministicFakeEmbedding(size=32)
+
+
+@pytest.fixture
+def store(tmp_path, embedding) -> LocalVectorStore:
+    store = LocalVectorStore(tmp_path / "ns", embedding)
+    store.add_texts(
+        TEXTS,
+        [{"company": c} for c in ("tesla", "ford", "gm", "rivian")],
+        ids=["t", "f", "g", "r"],
+    )
+    return store
+
+
+class TestLocalVectorStore:
+    """Search, persistence and write semantics."""
+
+    def test_search_returns_cosine_scores(self, store: LocalVectorStore) -> None:
+        results = store.similarity_search_with_score(TEXTS[1], k=2)
+
+        assert results[0][0].id == "f"
+        assert results[0][0].page_content == TEXTS[1]
+        assert results[0][0].metadata == {"company": "ford"}
+        assert results[0][1] == pytest.approx(1.0, abs=1e-3)
+        assert results[1][1] < results[0][1]
+
+    def test_int8_matches_float16_ranking(self, tmp_path, embedding, store) -> None:
+        quantized = LocalVectorStore(tmp_path / "q", embedding, dtype="int8")
+        quantized.add_texts(TEXTS, ids=["t", "f", "g", "r"])
+        query = embedding.embed_query("battery platforms")
+
+        exact = [d.id for d, _ in store.similarity_search_by_vector_with_score(query, k=4)]
+        approx = [d.id for d, _ in quantized.similarity_search_by_vector_with_score(query, k=4)]
+
+        assert approx[0] == exact[0]
+
+    def test_pinecone_style_filter(self, store: LocalVectorStore) -> None:
+        results = store.similarity_search_with_score(
+            TEXTS[0], k=4, filter={"company": {"$in": ["gm", "rivian"]}}
+        )
+
+        assert {d.id for d, _ in results} == {"g", "r"}
+
+    def test_store_persists_across_instances(self, tmp_path, embedding, store) -> None:
+        reopened = LocalVectorStore(tmp_path / "ns", embedding)
+
+        assert len(reopened) == 4
+        assert reopened.similarity_search(TEXTS[2], k=1)[0].id == "g"
+
+    def test_same_id_overwrites_and_delete_hides(self, store: LocalVectorStore) -> None:
+        store.add_texts(["Tesla guided to flat deliveries."], [{"company": "tesla"}], ids=["t"])
+        store.delete(["f"])
+
+        assert len(store) == 3
+        assert store.similarity_search("Tesla guided to flat deliveries.", k=1)[0].page_content == (
+            "Tesla guided to flat deliveries."
+        )
+        assert "f" not in {d.id for d in store.similarity_search(TEXTS[1], k=4)}
+        assert store.existing_ids(["t", "f", "x"]) == {"t"}
+
+    def test_dimension_mismatch_raises(self, store: LocalVectorStore) -> None:
+        with pytest.raises(ValueError, match="dimension"):
+            store.add_vectors(["x"], ["x"], [{}], [[0.1, 0.2]])
+
+    def test_ivf_search_finds_exact_match(self, tmp_path) -> None:
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(300, 16)).astype(np.float32)
+        ids = [f"id-{i}" for i in range(300)]
+        store = LocalVectorStore(
+            tmp_path / "ivf", DeterministicFakeEmbedding(size=16), ivf_min_vectors=200, nprobe=4
+        )
+        store.add_vectors(ids, ids, [{} for _ in ids], vectors)
+
+        (doc, score), = store.similarity_search_by_vector_with_score(vectors[123].tolist(), k=1)
+
+        assert store._centroids is not None
+        assert doc.id == "id-123"
+        assert score == pytest.approx(1.0, abs=1e-3)
+
+
+class TestLocalBackendSelection:
+    """settings.vector_backend wiring."""
+
+    def test_upsert_and_search_offline(self, tmp_path, embedding, sample_documents) -> None:
+        with (
+            patch("ingestion.upsert.settings.vector_backend", "local"),
+            patch("ingestion.upsert._get_embedding_model", return_value=embedding),
+        ):
+            reset_upsert_cache()
+            ids = upsert_documents(sample_documents, namespace="filings")
+            store = get_vector_store(namespace="filings")
+            results = store.similarity_search_with_score(sample_documents[0].page_content, k=1)
+        reset_upsert_cache()
+
+        assert isinstance(store, LocalVectorStore)
+        assert len(ids) == len(store) == 2
+        assert results[0][0].page_content == sample_documents[0].page_content
+
+    def test_unknown_backend_raises(self) -> None:
+        with patch("ingestion.upsert.settings.vector_backend", "faiss"):
+            reset_upsert_cache()
+            with pytest.raises(ValueError, match="Unknown vector backend"):
+                get_vector_store()
+        reset_upsert_cache()
+
+
+def test_retriever_runs_on_local_backend(tmp_path, embedding) -> None:
+    """retrieve_with_rerank needs no Pinecone index with the local backend."""
+    from retrieval import retriever
+
+    store = LocalVectorStore(tmp_path / "ns", embedding)
+    store.add_texts(TEXTS, ids=["t", "f", "g", "r"])
+    with patch("retrieval.retriever.get_vector_store", return_value=store):
+        docs = retriever.invoke({"query": TEXTS[3], "k": 2})
+
+    assert docs[0].page_content == TEXTS[3]
+    assert docs[0].metadata["vector_score"] == pytest.approx(1.0, abs=1e-3)
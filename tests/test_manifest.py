@@ -0,0 +1,39 @@
+"""Tests for deterministic chunk ids and the indexed-chunk manifest."""
+
+from langchain_core.documents import Document
+
+from ingestion.manifest import ChunkManifest, chunk_id
+
+
+def test_chunk_id_depends_on_text_source_and_filter_fields() -> None:
+    chunk = Document(page_content="Risk factors.", metadata={"source": "10k.pdf", "page": 3, "company": "acme"})
+
+    same_text_other_page = Document(page_content="Risk factors.", metadata={"source": "10k.pdf", "page": 9, "company": "acme"})
+    other_company = Document(page_content="Risk factors.", metadata={"source": "10k.pdf", "page": 3, "company": "globex"})
+
+    assert chunk_id(chunk) == chunk_id(same_text_other_page)
+    assert chunk_id(chunk) != chunk_id(other_company)
+    assert len(chunk_id(chunk)) == 64
+
+
+def test_manifest_tracks_ids_per_namespace(tmp_path) -> None:
+    manifest = ChunkManifest(tmp_path / "manifest.sqlite")
+    manifest.add_many(None, ["a", "b"])
+    manifest.add_many("tenant", ["a"])
+
+    reopened = ChunkManifest(tmp_path / "manifest.sqlite")
+
+    assert reopened.existing(None, ["a", "b", "c"]) == {"a", "b"}
+    assert reopened.existing("tenant", ["a", "b"]) == {"a"}
+    reopened.clear(None)
+    assert reopened.count(None) == 0
+    assert reopened.count("tenant") == 1
+
+
+def test_manifest_entries_are_scoped_to_their_store(tmp_path) -> None:
+    ChunkManifest(tmp_path / "manifest.sqlite", "pinecone:old-index").add_many(None, ["a"])
+
+    other = ChunkManifest(tmp_path / "manifest.sqlite", "pinecone:new-index")
+
+    assert other.existing(None, ["a"]) == set()
+    assert ChunkManifest(tmp_path / "manifest.sqlite", "pinecone:old-index").existing(None, ["a"]) == {"a"}
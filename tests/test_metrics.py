@@ -0,0 +1,93 @@
+"""Tests for retrieval metrics instrumentation."""
+
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from retrieval import metrics
+from retrieval.metrics import MetricsRegistry, MlflowSpanSink, registry
+
+
+@pytest.fixture(autouse=True)
+def _reset_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+class TestMetricsRegistry:
+    """Histogram/counter bookkeeping and Prometheus rendering."""
+
+    def test_render_prometheus_histogram_and_counter(self) -> None:
+        reg = MetricsRegistry()
+        reg.histogram("stage_seconds", "Stage duration.", (0.1, 1.0))
+        reg.counter("dropped_total", "Dropped matches.")
+        reg.observe("stage_seconds", 0.05, {"stage": "embed"})
+        reg.observe("stage_seconds", 0.5, {"stage": "embed"})
+        reg.inc("dropped_total", 3, {})
+
+        text = reg.render_prometheus()
+
+        assert "# TYPE stage_seconds histogram" in text
+        assert 'stage_seconds_bucket{stage="embed",le="0.1"} 1' in text
+        assert 'stage_seconds_bucket{stage="embed",le="1"} 2' in text
+        assert 'stage_seconds_bucket{stage="embed",le="+Inf"} 2' in text
+        assert 'stage_seconds_count{stage="embed"} 2' in text
+        assert "# TYPE dropped_total counter" in text
+        assert "dropped_total 3" in text
+
+    def test_timed_records_stage_duration(self) -> None:
+        with metrics.timed("embed"):
+            pass
+
+        count, total = registry.histogram_snapshot("retrieval_stage_seconds", stage="embed")
+        assert count == 1
+        assert total >= 0.0
+
+    def test_timed_records_even_when_stage_raises(self) -> None:
+        with pytest.raises(RuntimeError), metrics.timed("rerank"):
+            raise RuntimeError("boom")
+
+        assert registry.histogram_snapshot("retrieval_stage_seconds", stage="rerank")[0] == 1
+
+
+class TestSinks:
+    """Pluggable sinks."""
+
+    def test_failing_sink_does_not_break_retrieval(self) -> None:
+        bad = MagicMock()
+        bad.observe.side_effect = RuntimeError("sink down")
+        metrics.add_sink(bad)
+        try:
+            metrics.observe("retrieval_candidates", 5, stage="vector_search")
+        finally:
+            metrics.remove_sink(bad)
+
+        assert registry.histogram_snapshot("retrieval_candidates", stage="vector_search") == (1, 5)
+
+    def test_mlflow_sink_accumulates_attributes_on_active_span(self) -> None:
+        attributes: dict[str, float] = {}
+        span = MagicMock()
+        span.get_attribute.side_effect = attributes.get
+        span.set_attribute.side_effect = attributes.__setitem__
+        fake_mlflow = MagicMock()
+        fake_mlflow.get_current_active_span.return_value = span
+        sink = MlflowSpanSink()
+        with patch.dict(sys.modules, {"mlflow": fake_mlflow}):
+            sink.observe("retrieval_stage_seconds", 0.2, {"stage": "embed"})
+            sink.observe("retrieval_stage_seconds", 0.3, {"stage": "embed"})
+            sink.inc("retrieval_dedup_dropped_total", 2, {})
+            sink.inc("retrieval_dedup_dropped_total", 1, {})
+
+        assert attributes == {
+            "retrieval_stage_seconds.embed": pytest.approx(0.5),
+            "retrieval_stage_seconds.embed.count": 2,
+            "retrieval_dedup_dropped_total": 3,
+        }
+
+    def test_mlflow_sink_is_noop_without_active_span(self) -> None:
+        fake_mlflow = MagicMock()
+        fake_mlflow.get_current_active_span.return_value = None
+        with patch.dict(sys.modules, {"mlflow": fake_mlflow}):
+            MlflowSpanSink().observe("retrieval_stage_seconds", 0.2, {"stage": "embed"})
@@ -0,0 +1,127 @@
+"""Tests for token-budget context packing."""
+
+import sys
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from retrieval.packing import (
+    get_token_counter,
+    merge_adjacent_chunks,
+    pack_context,
+    trim_to_tokens,
+)
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def header(index: int, doc: Document) -> str:
+    return f"[{index}] {doc.metadata.get('source')}"
+
+
+def sentences(prefix: str, n: int) -> str:
+    return " ".join(f"{prefix} sentence number {i} has six words." for i in range(n))
+
+
+class TestTrimToTokens:
+    """Sentence-boundary trimming."""
+
+    def test_keeps_text_that_fits(self) -> None:
+        assert trim_to_tokens("Short text.", 10, count_words) == "Short text."
+
+    def test_cuts_at_last_whole_sentence(self) -> None:
+        text = "Revenue grew 12% in 2024. Margins fell. Guidance was raised for 2025."
+
+        assert trim_to_tokens(text, 9, count_words) == "Revenue grew 12% in 2024. Margins fell. ..."
+
+    def test_falls_back_to_words_when_first_sentence_is_too_long(self) -> None:
+        text = "One very long sentence without any early boundary at all."
+
+        assert trim_to_tokens(text, 4, count_words) == "One very long ..."
+
+
+class TestPackContext:
+    """Budget allocation, merging and formatting."""
+
+    def test_everything_fits_untrimmed(self) -> None:
+        docs = [
+            Document(page_content="Tesla sells cars.", metadata={"source": "a.pdf"}),
+            Document(page_content="Ford sells trucks.", metadata={"source": "b.pdf"}),
+        ]
+
+        packed = pack_context(docs, 100, count_words, header)
+
+        assert packed == "[1] a.pdf\nTesla sells cars.\n---\n[2] b.pdf\nFord sells trucks."
+
+    def test_higher_rerank_score_gets_more_room(self) -> None:
+        docs = [
+            Document(page_content=sentences("Top", 20), metadata={"source": "a", "rerank_score": 0.9}),
+            Document(page_content=sentences("Low", 20), metadata={"source": "b", "rerank_score": 0.1}),
+        ]
+
+        packed = pack_context(docs, 80, count_words, header)
+        top, low = packed.split("\n---\n")
+
+        assert count_words(packed) <= 80
+        assert top.count("Top sentence") > low.count("Low sentence") >= 1
+        assert top.endswith("six words. ...")
+
+    def test_scores_from_different_stages_are_not_mixed(self) -> None:
+        mixed = [
+            Document(page_content="a", metadata={"source": "a", "vector_score": 0.95}),
+            Document(page_content="b", metadata={"source": "b", "rerank_score": 0.2}),
+        ]
+        skipped = [
+            Document(page_content="c", metadata={"source": "c", "vector_score": 0.8, "rerank_skipped": True}),
+            Document(page_content="d", metadata={"source": "d", "vector_score": 0.4, "rerank_skipped": True}),
+        ]
+
+        assert [c.weight for c in merge_adjacent_chunks(mixed)] == [1.0, 0.5]
+        assert [c.weight for c in merge_adjacent_chunks(skipped)] == [0.8, 0.4]
+
+    def test_short_chunk_leaves_room_for_others(self) -> None:
+        docs = [
+            Document(page_content="Tiny.", metadata={"source": "a", "rerank_score": 0.9}),
+            Document(page_content=sentences("Long", 10), metadata={"source": "b", "rerank_score": 0.1}),
+        ]
+
+        packed = pack_context(docs, 60, count_words, header)
+
+        assert packed.count("Long sentence") == 7  # not the 3 an even split would allow
+
+    def test_same_page_chunks_are_merged_and_stitched(self) -> None:
+        first = "Alpha revenue rose sharply in the fourth quarter of the fiscal year."
+        second = "in the fourth quarter of the fiscal year. Beta margins were flat."
+        docs = [
+            Document(page_content=first, metadata={"source": "10k.pdf", "page": 3}),
+            Document(page_content="Other page.", metadata={"source": "10k.pdf", "page": 4}),
+            Document(page_content=second, metadata={"source": "10k.pdf", "page": 3}),
+        ]
+
+        packed = pack_context(docs, 200, count_words, header)
+
+        assert packed.split("\n---\n") == [
+            "[1] 10k.pdf\nAlpha revenue rose sharply in the fourth quarter of the fiscal year. "
+            "Beta margins were flat.",
+            "[2] 10k.pdf\nOther page.",
+        ]
+
+    def test_chunks_without_page_are_not_merged(self) -> None:
+        docs = [
+            Document(page_content="One.", metadata={"source": "https://x"}),
+            Document(page_content="Two.", metadata={"source": "https://x"}),
+        ]
+
+        assert len(merge_adjacent_chunks(docs)) == 2
+
+
+def test_token_counter_falls_back_without_litellm() -> None:
+    get_token_counter.cache_clear()
+    try:
+        with patch.dict(sys.modules, {"litellm": None}):
+            count = get_token_counter("groq/model")
+        assert count("x" * 40) == 10
+    finally:
+        get_token_counter.cache_clear()
@@ -0,0 +1,141 @@
+"""Tests for parallel PDF ingestion."""
+
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from langchain_community.document_loaders import PyPDFLoader
+from reportlab.pdfgen import canvas
+
+from config import settings
+from ingestion.load import load_pdf_pages
+from ingestion import parallel
+from ingestion.parallel import available_cpus, ingest_pdfs, page_ranges, shutdown_parse_pool
+from ingestion.upsert import UpsertProgress
+
+
+def make_pdf(path: Path, pages: int) -> Path:
+    pdf = canvas.Canvas(str(path))
+    for i in range(pages):
+        pdf.drawString(72, 720, f"{path.stem} page {i} text.")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+@pytest.fixture
+def parse_pool(monkeypatch):
+    monkeypatch.setattr(settings, "ingest_workers", 2)
+    monkeypatch.setattr(settings, "ingest_pages_per_task", 2)
+    shutdown_parse_pool()
+    yield
+    shutdown_parse_pool()
+
+
+def test_page_ranges() -> None:
+    assert page_ranges(5, 2) == [(0, 2), (2, 4), (4, 5)]
+    assert page_ranges(0, 2) == []
+
+
+def test_available_cpus_respects_cgroup_quota(tmp_path, monkeypatch) -> None:
+    cpu_max = tmp_path / "cpu.max"
+    monkeypatch.setattr(parallel, "_CGROUP_CPU_MAX", cpu_max)
+    monkeypatch.setattr(parallel.os, "sched_getaffinity", lambda pid: set(range(64)), raising=False)
+
+    cpu_max.write_text("50000 100000\n")
+    assert available_cpus() == 1
+    cpu_max.write_text("300000 100000\n")
+    assert available_cpus() == 3
+    cpu_max.write_text("max 100000\n")
+    assert available_cpus() == 64
+
+
+def test_parse_worker_imports_stay_light() -> None:
+    """Unpickling the worker entry point must not import upsert (Pinecone, embeddings)."""
+    code = "import sys, ingestion.load; print('ingestion.upsert' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_load_pdf_pages_matches_pypdfloader(tmp_path) -> None:
+    path = make_pdf(tmp_path / "report.pdf", 3)
+
+    (doc,) = load_pdf_pages(path, 1, 2)
+
+    expected = PyPDFLoader(file_path=path).load()[1]
+    assert doc.page_content == expected.page_content == "report page 1 text."
+    assert doc.metadata == expected.metadata
+
+
+def test_ingest_pdfs_parses_in_workers_and_upserts_per_file(tmp_path, parse_pool) -> None:
+    big = make_pdf(tmp_path / "big.pdf", 5)
+    small = make_pdf(tmp_path / "small.pdf", 1)
+    upserted = {}
+    progress = []
+
+    def fake_upsert(pages, metadata=None, namespace=None, on_progress=None):
+        docs = list(pages)
+        upserted[docs[0].metadata["source"]] = [d.metadata["page"] for d in docs]
+        on_progress(UpsertProgress(window=1, pages=len(docs), chunks=len(docs)))
+        return [f"{docs[0].metadata['source']}-{i}" for i in range(len(docs))]
+
+    with patch("ingestion.parallel.upsert_stream", side_effect=fake_upsert):
+        results = ingest_pdfs(
+            [("Big.pdf", big), ("Small.pdf", small)],
+            metadata={"company": "acme"},
+            on_progress=lambda name, p: progress.append((name, p.chunks)),
+        )
+
+    assert [(r.filename, r.documents, len(r.chunk_ids)) for r in results] == [
+        ("Big.pdf", 5, 5),
+        ("Small.pdf", 1, 1),
+    ]
+    assert upserted == {"Big.pdf": [0, 1, 2, 3, 4], "Small.pdf": [0]}
+    assert sorted(progress) == [("Big.pdf", 5), ("Small.pdf", 1)]
+
+
+def test_ingest_pdfs_bounds_parsed_pages_held_ahead(tmp_path, monkeypatch) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(settings, "ingest_pages_per_task", 1)
+    monkeypatch.setattr(settings, "ingest_parse_ahead", 2)
+    submitted = []
+
+    class CountingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            submitted.append(args)
+            return super().submit(fn, *args)
+
+    pool = CountingPool(max_workers=2)
+    monkeypatch.setattr(parallel, "get_parse_pool", lambda: pool)
+    first = make_pdf(tmp_path / "first.pdf", 4)
+    second = make_pdf(tmp_path / "second.pdf", 3)
+    consumed = []
+    ahead = []
+
+    def fake_upsert(pages, metadata=None, namespace=None, on_progress=None):
+        ids = []
+        for doc in pages:
+            consumed.append(doc)
+            ids.append(doc.metadata["page"])
+            # One page per task: ranges parsed or parsing but not yet handed to the upsert
+            ahead.append(len(submitted) - len(consumed))
+        return ids
+
+    with patch("ingestion.parallel.upsert_stream", side_effect=fake_upsert):
+        results = ingest_pdfs([("First.pdf", first), ("Second.pdf", second)])
+    pool.shutdown()
+
+    assert [r.chunk_ids for r in results] == [[0, 1, 2, 3], [0, 1, 2]]
+    assert len(submitted) == 7
+    assert max(ahead) <= 2
+
+
+def test_ingest_pdfs_rejects_unreadable_file(tmp_path, parse_pool) -> None:
+    bad = tmp_path / "bad.pdf"
+    bad.write_bytes(b"not a pdf")
+
+    with pytest.raises(ValueError, match="bad.pdf"):
+        ingest_pdfs([("bad.pdf", bad)])
@@ -0,0 +1,58 @@
+"""Tests for the parent-document store."""
+
+from langchain_core.documents import Document
+
+from ingestion.parents import ParentStore, child_metadata, expand_to_parents, split_parents
+
+
+def test_store_is_content_addressed(tmp_path) -> None:
+    store = ParentStore(tmp_path / "parents.sqlite")
+    page = Document(page_content="Full page text.", metadata={"source": "a.pdf", "page": 0})
+
+    first = store.put_many([page, page])
+    reopened = ParentStore(tmp_path / "parents.sqlite")
+
+    assert first[0] == first[1] == ParentStore.key("Full page text.")
+    assert len(reopened) == 1
+    assert reopened.get_many([first[0], "missing"])[first[0]].metadata == {"source": "a.pdf", "page": 0}
+
+
+def test_long_pages_are_split_into_sections() -> None:
+    page = Document(page_content="word " * 300, metadata={"source": "https://x"})
+
+    sections = split_parents([page], max_chars=500)
+
+    assert len(sections) > 1
+    assert all(len(s.page_content) <= 500 for s in sections)
+    assert all(s.metadata == {"source": "https://x"} for s in sections)
+
+
+def test_child_metadata_keeps_index_fields_only() -> None:
+    metadata = {"source": "a.pdf", "page": 2, "producer": "Acrobat", "company": "acme", "total_pages": 90}
+
+    assert child_metadata(metadata, "p1") == {
+        "source": "a.pdf", "page": 2, "company": "acme", "parent_id": "p1",
+    }
+
+
+def test_expand_to_parents_dedups_and_keeps_order(tmp_path) -> None:
+    store = ParentStore(tmp_path / "parents.sqlite")
+    p1, p2 = store.put_many(
+        [
+            Document(page_content="Page one in full.", metadata={"source": "a.pdf", "producer": "X"}),
+            Document(page_content="Page two in full.", metadata={"source": "a.pdf"}),
+        ]
+    )
+    chunks = [
+        Document(page_content="two", metadata={"parent_id": p2, "rerank_score": 0.9}),
+        Document(page_content="one", metadata={"parent_id": p1, "rerank_score": 0.8}),
+        Document(page_content="two again", metadata={"parent_id": p2, "rerank_score": 0.7}),
+        Document(page_content="orphan", metadata={"parent_id": "unknown"}),
+    ]
+
+    expanded = expand_to_parents(chunks, store)
+
+    assert [d.page_content for d in expanded] == ["Page two in full.", "Page one in full.", "orphan"]
+    assert expanded[0].metadata["rerank_score"] == 0.9
+    assert expanded[0].metadata["matched_chunk"] == "two"
+    assert expanded[1].metadata["producer"] == "X"
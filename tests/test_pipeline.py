@@ -0,0 +1,85 @@
+"""Tests for the staged embed/upsert pipeline."""
+
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from ingestion.pipeline import StageStats, run_pipeline
+from ingestion.throttle import BatchController
+
+
+def chunks(n: int) -> tuple[list[str], list[Document]]:
+    return [f"id-{i}" for i in range(n)], [Document(page_content=f"text {i}") for i in range(n)]
+
+
+def run(ids, docs, embed, write, embed_batch_size=4, write_batch_size=3, **overrides):
+    options = dict(
+        embed_control=BatchController("embed", max_items=embed_batch_size, max_retries=0),
+        write_control=BatchController("write", max_items=write_batch_size, max_retries=0),
+        embed_workers=2,
+        write_workers=2,
+        queue_size=2,
+    )
+    return run_pipeline(ids, docs, embed, write, **(options | overrides))
+
+
+def test_every_chunk_is_written_once_with_its_vector() -> None:
+    ids, docs = chunks(10)
+    written = {}
+    lock = threading.Lock()
+
+    def write(batch_ids, batch, vectors):
+        assert len(batch_ids) <= 3
+        with lock:
+            written.update(zip(batch_ids, zip((d.page_content for d in batch), vectors)))
+
+    stages = run(ids, docs, lambda texts: [[float(t.split()[1])] for t in texts], write)
+
+    assert written == {f"id-{i}": (f"text {i}", [float(i)]) for i in range(10)}
+    produce, embed, write_stats = stages
+    assert (produce.items, embed.items, write_stats.items) == (10, 10, 10)
+    assert (embed.batches, write_stats.batches) == (3, 5)  # 4+4+2 embedded, each split into <=3
+
+
+def test_embedding_overlaps_with_writes() -> None:
+    ids, docs = chunks(8)
+    embedding_during_write = threading.Event()
+    writing = threading.Event()
+
+    def embed(texts):
+        if writing.is_set():
+            embedding_during_write.set()
+        return [[0.0] for _ in texts]
+
+    def write(batch_ids, batch, vectors):
+        writing.set()
+        time.sleep(0.05)
+
+    run(ids, docs, embed, write, embed_batch_size=2, write_batch_size=2, embed_workers=1, write_workers=1)
+
+    assert embedding_during_write.is_set()
+
+
+def test_stage_error_stops_pipeline_and_is_raised() -> None:
+    ids, docs = chunks(40)
+    calls = []
+
+    def embed(texts):
+        calls.append(texts)
+        if len(calls) == 2:
+            raise RuntimeError("429 Too Many Requests")
+        return [[0.0] for _ in texts]
+
+    with pytest.raises(RuntimeError, match="429"):
+        run(ids, docs, embed, lambda *args: None, embed_workers=1)
+
+    assert len(calls) < 10  # producer stopped instead of embedding everything
+
+
+def test_throughput_is_capacity_with_all_workers_busy() -> None:
+    stats = StageStats("embed", workers=4, items=100, busy_seconds=10.0)
+
+    assert stats.throughput == 40.0
+    assert StageStats("write", workers=1).throughput == 0.0
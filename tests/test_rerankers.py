@@ -0,0 +1,121 @@
+"""Tests for reranker backends and the parity check."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from retrieval.rerankers import (
+    ONNX_FP32_MODEL_FILE,
+    PARITY_PAIRS,
+    TOKENIZER_FILE,
+    OnnxReranker,
+    bucket_by_length,
+    check_parity,
+)
+
+
+def _backend(scores: list[float]) -> MagicMock:
+    backend = MagicMock()
+    backend.compute_score.return_value = scores
+    return backend
+
+
+class TestCheckParity:
+    """Score agreement between reference and candidate rerankers."""
+
+    def test_identical_scores_are_in_parity(self) -> None:
+        scores = [0.1 * i for i in range(len(PARITY_PAIRS))]
+        report = check_parity(_backend(scores), _backend(scores))
+
+        assert report.max_abs_diff == 0.0
+        assert report.spearman == 1.0
+        assert report.ok(tolerance=0.01)
+
+    def test_drift_and_rank_changes_are_reported(self) -> None:
+        pairs = [("q", "a"), ("q", "b"), ("q", "c")]
+        report = check_parity(_backend([0.9, 0.5, 0.1]), _backend([0.1, 0.5, 0.9]), pairs)
+
+        assert report.max_abs_diff == 0.8
+        assert report.spearman == -1.0
+        assert not report.ok(tolerance=0.05)
+
+
+class TestBucketByLength:
+    """Length-sorted batching."""
+
+    def test_buckets_group_similar_lengths(self) -> None:
+        assert bucket_by_length([30, 5, 20, 10, 40], 2) == [[1, 3], [2, 0], [4]]
+
+
+_VOCAB = ["<pad>", "[UNK]", "[CLS]", "[SEP]", "revenue", "growth", "margin", "outlook"]
+
+
+@pytest.fixture
+def onnx_model_dir(tmp_path):
+    """A tiny ONNX "cross-encoder" whose logit is the count of "revenue" tokens in the pair."""
+    pytest.importorskip("onnxruntime")
+    onnx = pytest.importorskip("onnx")
+    tokenizers = pytest.importorskip("tokenizers")
+    from onnx import TensorProto, helper
+
+    tokenizer = tokenizers.Tokenizer(
+        tokenizers.models.WordLevel({t: i for i, t in enumerate(_VOCAB)}, unk_token="[UNK]")
+    )
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.post_processor = tokenizers.processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", 2), ("[SEP]", 3)],
+    )
+    tokenizer.save(str(tmp_path / TOKENIZER_FILE))
+
+    graph = helper.make_graph(
+        [
+            helper.make_node("Equal", ["input_ids", "target"], ["is_target"]),
+            helper.make_node("Cast", ["is_target"], ["hits"], to=TensorProto.FLOAT),
+            helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+            helper.make_node("Mul", ["hits", "mask"], ["counted"]),
+            helper.make_node("ReduceSum", ["counted", "axes"], ["logits"], keepdims=1),
+        ],
+        "revenue_counter",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "tokens"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "tokens"]),
+        ],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", 1])],
+        initializer=[
+            helper.make_tensor("target", TensorProto.INT64, [], [_VOCAB.index("revenue")]),
+            helper.make_tensor("axes", TensorProto.INT64, [1], [1]),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(tmp_path / ONNX_FP32_MODEL_FILE))
+    return tmp_path
+
+
+class TestOnnxReranker:
+    """ONNX Runtime backend: scoring and the tokenization cache."""
+
+    def test_scores_follow_the_model_in_input_order(self, onnx_model_dir) -> None:
+        reranker = OnnxReranker(onnx_model_dir, batch_size=2)
+        pairs = [
+            ("revenue", "revenue revenue growth"),
+            ("revenue", "margin outlook"),
+            ("revenue", "revenue outlook"),
+        ]
+
+        assert reranker.compute_score(pairs) == [3.0, 1.0, 2.0]
+        assert reranker.compute_score(pairs, batch_size=1) == [3.0, 1.0, 2.0]
+        normalized = reranker.compute_score(pairs, normalize=True)
+        assert sorted(range(3), key=lambda i: -normalized[i]) == [0, 2, 1]
+        assert reranker.compute_score(pairs[1]) == 1.0
+
+    def test_token_cache_is_bounded(self, onnx_model_dir) -> None:
+        reranker = OnnxReranker(onnx_model_dir, token_cache_size=2)
+
+        reranker.compute_score([("revenue", "growth"), ("margin", "outlook")])
+
+        assert len(reranker._token_cache) == 2
+        assert reranker._token_cache.stats.evictions == 2
+        assert reranker.count_tokens("revenue growth outlook") == 3
@@ -1,11 +1,29 @@
 """Tests for RAG retriever and reranking."""
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from langchain_core.documents import Document
 
-from retrieval import retriever, retrieve_with_rerank, rerank, reset_retriever_cache
+from config import settings
+from ingestion import get_sparse_index
+
+from retrieval import (
+    MetadataFilter,
+    aretrieve_with_rerank,
+    aretriever,
+    get_query_embedding_cache,
+    get_rerank_score_cache,
+    get_result_cache,
+    metrics_registry,
+    rerank,
+    rerank_many,
+    reset_retriever_cache,
+    retrieve_many,
+    retrieve_with_rerank,
+    retriever,
+    warm_up,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -31,17 +49,21 @@ class TestRetriever:
     def test_retriever_returns_documents(
         self, mock_get_store: MagicMock, sample_retrieved_docs: list[Document]
     ) -> None:
-        """Retriever returns documents from vector store (similarity_search_with_score, score >= 0.6)."""
+        """Retriever returns documents from vector store (search by query vector, score >= threshold)."""
         mock_store = MagicMock()
-        # similarity_search_with_score returns [(doc, score), ...]; scores must be >= 0.6
-        mock_store.similarity_search_with_score.return_value = [
+        mock_store.embeddings.embed_query.return_value = [0.1, 0.2]
+        # similarity_search_by_vector_with_score returns [(doc, score), ...]
+        mock_store.similarity_search_by_vector_with_score.return_value = [
             (d, 0.9) for d in sample_retrieved_docs
         ]
         mock_get_store.return_value = mock_store
 
         result = retriever.invoke({"query": "pet animals", "k": 10})
 
-        mock_store.similarity_search_with_score.assert_called_once_with("pet animals", k=10)
+        mock_store.embeddings.embed_query.assert_called_once_with("pet animals")
+        mock_store.similarity_search_by_vector_with_score.assert_called_once_with(
+            [0.1, 0.2], k=10
+        )
         assert result == sample_retrieved_docs
         assert len(result) == 3
 
@@ -49,26 +71,73 @@ class TestRetriever:
     def test_retriever_uses_settings_default_k(self, mock_get_store: MagicMock) -> None:
         """Retriever uses settings.retrieval_top_k when k not provided."""
         mock_store = MagicMock()
-        mock_store.similarity_search_with_score.return_value = []
+        mock_store.similarity_search_by_vector_with_score.return_value = []
         mock_get_store.return_value = mock_store
 
         with patch("retrieval.retriever.settings") as mock_settings:
             mock_settings.retrieval_top_k = 50
+            mock_settings.query_embedding_cache_size = 0
             retriever.invoke({"query": "test"})
 
-        mock_store.similarity_search_with_score.assert_called_once_with("test", k=50)
+        assert mock_store.similarity_search_by_vector_with_score.call_args.kwargs == {"k": 50}
 
     @patch("retrieval.retriever.get_vector_store")
     def test_retriever_with_namespace(self, mock_get_store: MagicMock) -> None:
         """Retriever passes namespace to get_vector_store."""
         mock_store = MagicMock()
-        mock_store.similarity_search_with_score.return_value = []
+        mock_store.similarity_search_by_vector_with_score.return_value = []
         mock_get_store.return_value = mock_store
 
         retriever.invoke({"query": "test", "namespace": "my-ns"})
 
         mock_get_store.assert_called_once_with(namespace="my-ns")
 
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retriever_pushes_metadata_filter_to_pinecone(self, mock_get_store: MagicMock) -> None:
+        """A metadata filter is sent with the query instead of filtering afterwards."""
+        mock_store = MagicMock()
+        mock_store.embeddings.embed_query.return_value = [0.1]
+        mock_store.similarity_search_by_vector_with_score.return_value = []
+        mock_get_store.return_value = mock_store
+
+        retriever.invoke(
+            {
+                "query": "revenue",
+                "k": 5,
+                "filter": {"company": "Tesla", "doc_type": "10-K", "date_from": "2024-01-01"},
+            }
+        )
+
+        mock_store.similarity_search_by_vector_with_score.assert_called_once_with(
+            [0.1],
+            k=5,
+            filter={
+                "company": {"$eq": "tesla"},
+                "doc_type": {"$eq": "10-k"},
+                "doc_date": {"$gte": 20240101},
+            },
+        )
+
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retriever_batch_groups_by_filter(self, mock_get_store: MagicMock) -> None:
+        """Inputs with different filters are searched with their own filter."""
+        mock_store = MagicMock()
+        mock_store.embeddings.embed_query.side_effect = lambda q: [float(len(q))]
+        mock_store.similarity_search_by_vector_with_score.return_value = []
+        mock_get_store.return_value = mock_store
+
+        retriever.batch(
+            [
+                {"query": "a", "filter": MetadataFilter(company="Tesla")},
+                {"query": "bb", "filter": {"company": "Ford"}},
+            ]
+        )
+
+        filters = [
+            c.kwargs["filter"] for c in mock_store.similarity_search_by_vector_with_score.call_args_list
+        ]
+        assert filters == [{"company": {"$eq": "tesla"}}, {"company": {"$eq": "ford"}}]
+
     def test_retriever_empty_query_raises(self) -> None:
         """Empty query raises ValueError."""
         with pytest.raises(ValueError, match="Query cannot be empty"):
@@ -121,6 +190,59 @@ class TestRerank:
         assert len(result) == 1
         assert result[0].page_content == "Single doc."
 
+    @patch("retrieval.retriever._get_reranker")
+    def test_rerank_scores_only_cache_misses(
+        self, mock_get_reranker: MagicMock, sample_retrieved_docs: list[Document]
+    ) -> None:
+        """Cached (query, chunk) scores are reused; only new pairs hit the model."""
+        mock_reranker = MagicMock()
+        mock_reranker.compute_score.side_effect = [[0.3, 0.9], [0.5]]
+        mock_get_reranker.return_value = mock_reranker
+
+        rerank("pets", sample_retrieved_docs[:2], k=3)
+        result = rerank("pets", sample_retrieved_docs, k=3)
+
+        second_pairs = mock_reranker.compute_score.call_args_list[1].args[0]
+        assert second_pairs == [("pets", "Birds can sing melodies.")]
+        assert [d.metadata["rerank_score"] for d in result] == [0.9, 0.5, 0.3]
+        assert get_rerank_score_cache().stats.hits == 2
+
+    @patch("retrieval.retriever._get_reranker")
+    def test_rerank_scores_are_not_shared_across_reranker_configs(
+        self, mock_get_reranker: MagicMock, sample_retrieved_docs: list[Document], monkeypatch
+    ) -> None:
+        """Changing the max length (or backend) must not reuse earlier scores."""
+        mock_reranker = MagicMock()
+        mock_reranker.compute_score.side_effect = [[0.3], [0.4]]
+        mock_get_reranker.return_value = mock_reranker
+
+        rerank("pets", sample_retrieved_docs[:1], k=1)
+        monkeypatch.setattr(settings, "reranker_max_length", 256)
+        result = rerank("pets", sample_retrieved_docs[:1], k=1)
+
+        assert mock_reranker.compute_score.call_count == 2
+        assert result[0].metadata["rerank_score"] == 0.4
+
+    @patch("retrieval.retriever._get_reranker")
+    def test_rerank_buckets_pairs_by_length(self, mock_get_reranker: MagicMock) -> None:
+        """Large inputs are scored in length-sorted buckets; order is restored."""
+        batches: list[list[str]] = []
+
+        class FakeReranker:
+            def compute_score(self, pairs, normalize=False, batch_size=None, max_length=None):
+                batches.append([p for _, p in pairs])
+                return [len(p) / 100 for _, p in pairs]
+
+        mock_get_reranker.return_value = FakeReranker()
+        docs = [Document(page_content="x" * n, metadata={}) for n in (40, 5, 30, 10, 20)]
+
+        with patch("retrieval.retriever.settings.reranker_batch_size", 2):
+            result = rerank("q", docs, k=5)
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+        assert [len(p) for p in batches[0]] == [5, 10]
+        assert [d.metadata["rerank_score"] for d in result] == [0.4, 0.3, 0.2, 0.1, 0.05]
+
     def test_rerank_empty_documents_returns_empty(self) -> None:
         """Rerank with empty list returns empty list."""
         result = rerank("query", [], k=5)
@@ -157,10 +279,10 @@ class TestRetrieveWithRerank:
         mock_rerank: MagicMock,
         sample_retrieved_docs: list[Document],
     ) -> None:
-        """Full pipeline: vector search (similarity_search_with_score) then rerank."""
+        """Full pipeline: vector search (by query vector) then rerank."""
         mock_store = MagicMock()
-        # similarity_search_with_score returns [(doc, score), ...]; scores >= 0.6
-        mock_store.similarity_search_with_score.return_value = [
+        mock_store.embeddings.embed_query.return_value = [0.3]
+        mock_store.similarity_search_by_vector_with_score.return_value = [
             (d, 0.9) for d in sample_retrieved_docs
         ]
         mock_get_store.return_value = mock_store
@@ -172,31 +294,506 @@ class TestRetrieveWithRerank:
             {"query": "pet animals", "retrieval_k": 50, "rerank_k": 2}
         )
 
-        mock_store.similarity_search_with_score.assert_called_once_with("pet animals", k=50)
+        mock_store.similarity_search_by_vector_with_score.assert_called_once_with([0.3], k=50)
         mock_rerank.assert_called_once_with(
             "pet animals", sample_retrieved_docs, k=2
         )
         assert result == top_two
 
+    @patch("retrieval.retriever.rerank")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retrieve_with_rerank_cascade_skips_reranker(
+        self,
+        mock_get_store: MagicMock,
+        mock_rerank: MagicMock,
+        sample_retrieved_docs: list[Document],
+    ) -> None:
+        """With the cascade on, a clear vector score margin bypasses the cross-encoder."""
+        mock_store = MagicMock()
+        mock_store.similarity_search_by_vector_with_score.return_value = list(
+            zip(sample_retrieved_docs, [0.95, 0.5, 0.45])
+        )
+        mock_get_store.return_value = mock_store
+
+        with (
+            patch("retrieval.retriever.settings.rerank_cascade_enabled", True),
+            patch("retrieval.cascade.settings.rerank_cascade_skip_margin", 0.2),
+        ):
+            result = retrieve_with_rerank.invoke({"query": "dogs", "rerank_k": 1})
+
+        mock_rerank.assert_not_called()
+        assert result == [sample_retrieved_docs[0]]
+        assert result[0].metadata["vector_score"] == 0.95
+
     @patch("retrieval.retriever.get_vector_store")
     def test_retrieve_with_rerank_empty_candidates(
         self, mock_get_store: MagicMock
     ) -> None:
         """When no candidates found, returns empty list."""
         mock_store = MagicMock()
-        mock_store.similarity_search_with_score.return_value = []
+        mock_store.similarity_search_by_vector_with_score.return_value = []
         mock_get_store.return_value = mock_store
 
         result = retrieve_with_rerank.invoke({"query": "obscure query"})
 
         assert result == []
 
+    @patch("retrieval.retriever._get_reranker")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retrieve_with_rerank_records_stage_metrics(
+        self,
+        mock_get_store: MagicMock,
+        mock_get_reranker: MagicMock,
+        sample_retrieved_docs: list[Document],
+    ) -> None:
+        """Each stage is timed and threshold drops are counted."""
+        metrics_registry.reset()
+        mock_store = MagicMock()
+        mock_store.embeddings.embed_query.return_value = [0.3]
+        mock_store.similarity_search_by_vector_with_score.return_value = list(
+            zip(sample_retrieved_docs, [0.9, 0.8, 0.1])
+        )
+        mock_get_store.return_value = mock_store
+        mock_get_reranker.return_value.compute_score.return_value = [0.7, 0.6]
+
+        with patch("retrieval.retriever.settings.retriever_threshold", 0.5):
+            retrieve_with_rerank.invoke({"query": "pets", "rerank_k": 2})
+
+        for stage in ("embed", "vector_search", "rerank", "rerank_forward", "total"):
+            count, _ = metrics_registry.histogram_snapshot("retrieval_stage_seconds", stage=stage)
+            assert count == 1, stage
+        assert metrics_registry.counter_value("retrieval_threshold_dropped_total") == 1
+        assert metrics_registry.histogram_snapshot(
+            "retrieval_candidates", stage="vector_search"
+        ) == (1, 2)
+        assert metrics_registry.histogram_snapshot("reranker_batch_pairs") == (1, 2)
+
+    @patch("retrieval.retriever.rerank")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retrieve_with_rerank_fuses_bm25_hits(
+        self,
+        mock_get_store: MagicMock,
+        mock_rerank: MagicMock,
+        sample_retrieved_docs: list[Document],
+    ) -> None:
+        """Exact-term hits from the local BM25 index join the dense candidates (RRF)."""
+        mock_store = MagicMock()
+        mock_store.embeddings.embed_query.return_value = [0.3]
+        mock_store.similarity_search_by_vector_with_score.return_value = [
+            (sample_retrieved_docs[0], 0.8),
+            (sample_retrieved_docs[1], 0.7),
+        ]
+        mock_get_store.return_value = mock_store
+        get_sparse_index().add(
+            ["x", "y"],
+            [
+                Document(page_content="Adjusted EBITDA 2024 rose 8%.", metadata={"source": "10k"}),
+                Document(page_content="Cats enjoy independence.", metadata={"source": "pets"}),
+            ],
+        )
+        mock_rerank.side_effect = lambda query, docs, k=None: docs
+
+        with patch("retrieval.retriever.settings.dedup_enabled", False):
+            result = retrieve_with_rerank.invoke({"query": "EBITDA 2024 cats", "rerank_k": 3})
+
+        contents = [d.page_content for d in result]
+        assert contents[0] == "Cats enjoy independence."  # ranked by both searches
+        assert set(contents) == {
+            "Cats enjoy independence.",
+            "Dogs are loyal companions.",
+            "Adjusted EBITDA 2024 rose 8%.",
+        }
+        assert result[0].metadata["vector_score"] == 0.7
+        assert result[0].metadata["bm25_score"] > 0
+
+    @patch("retrieval.retriever.rerank")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retrieve_with_rerank_hybrid_disabled(
+        self, mock_get_store: MagicMock, mock_rerank: MagicMock
+    ) -> None:
+        """With hybrid off, BM25 hits are ignored."""
+        mock_store = MagicMock()
+        mock_store.similarity_search_by_vector_with_score.return_value = []
+        mock_get_store.return_value = mock_store
+        get_sparse_index().add(["x"], [Document(page_content="EBITDA 2024", metadata={})])
+
+        with patch("retrieval.retriever.settings.hybrid_enabled", False):
+            result = retrieve_with_rerank.invoke({"query": "EBITDA 2024"})
+
+        assert result == []
+        mock_rerank.assert_not_called()
+
     def test_retrieve_with_rerank_empty_query_raises(self) -> None:
         """Empty query raises ValueError."""
         with pytest.raises(ValueError, match="Query cannot be empty"):
             retrieve_with_rerank.invoke({"query": ""})
 
 
+class TestQueryEmbeddingCache:
+    """Query-embedding cache integration tests."""
+
+    @patch("retrieval.retriever.get_vector_store")
+    def test_repeated_query_is_embedded_once(self, mock_get_store: MagicMock) -> None:
+        """Same query (modulo case/whitespace) is served from the cache."""
+        mock_store = MagicMock()
+        mock_store.embeddings.embed_query.return_value = [0.5]
+        mock_store.similarity_search_by_vector_with_score.return_value = []
+        mock_get_store.return_value = mock_store
+
+        retriever.invoke({"query": "Tesla revenue 2024"})
+        retriever.invoke({"query": "  tesla   REVENUE 2024 "})
+
+        mock_store.embeddings.embed_query.assert_called_once()
+        stats = get_query_embedding_cache().stats
+        assert stats.hits == 1
+        assert stats.misses == 1
+
+
+class TestParentExpansion:
+    """Reranked chunks are swapped for their parent passages."""
+
+    @patch("retrieval.retriever.rerank")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retrieve_with_rerank_returns_parent_pages(
+        self, mock_get_store: MagicMock, mock_rerank: MagicMock
+    ) -> None:
+        from ingestion.parents import get_parent_store
+
+        (parent_id,) = get_parent_store().put_many(
+            [Document(page_content="Full page about dogs and cats.", metadata={"source": "pets.pdf"})]
+        )
+        chunks = [
+            Document(page_content="dogs", metadata={"parent_id": parent_id}),
+            Document(page_content="cats", metadata={"parent_id": parent_id}),
+        ]
+        mock_store = MagicMock()
+        mock_store.embeddings.embed_query.return_value = [0.1, 0.2]
+        mock_store.similarity_search_by_vector_with_score.return_value = [(d, 0.9) for d in chunks]
+        mock_get_store.return_value = mock_store
+        mock_rerank.side_effect = lambda query, docs, k: docs
+
+        (doc,) = retrieve_with_rerank.invoke({"query": "pets"})
+
+        mock_rerank.assert_called_once()
+        assert mock_rerank.call_args.args[1][0].page_content == "dogs"  # reranked on chunks
+        assert doc.page_content == "Full page about dogs and cats."
+        assert doc.metadata["matched_chunk"] == "dogs"
+
+
+class TestSemanticResultCache:
+    """Semantic result cache integration tests."""
+
+    QUERY_VECTORS = {
+        "Tesla main competitors": [1.0, 0.0, 0.1],
+        "who competes with Tesla": [1.0, 0.1, 0.05],
+        "Ford battery plans": [0.0, 1.0, 0.0],
+        "Apple revenue 2023": [0.0, 0.0, 1.0],
+        "Apple revenue 2022": [0.0, 0.01, 1.0],
+    }
+
+    @pytest.fixture(autouse=True)
+    def _enable_result_cache(self, monkeypatch):
+        monkeypatch.setattr(settings, "result_cache_size", 256)
+        reset_retriever_cache()
+        yield
+        reset_retriever_cache()
+
+    @pytest.fixture
+    def mock_store(self, sample_retrieved_docs: list[Document]) -> MagicMock:
+        store = MagicMock()
+        store.embeddings.embed_query.side_effect = self.QUERY_VECTORS.__getitem__
+        store.similarity_search_by_vector_with_score.return_value = [
+            (d, 0.9) for d in sample_retrieved_docs
+        ]
+        return store
+
+    @patch("retrieval.retriever.rerank")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_paraphrase_skips_search_and_rerank(
+        self,
+        mock_get_store: MagicMock,
+        mock_rerank: MagicMock,
+        mock_store: MagicMock,
+        sample_retrieved_docs: list[Document],
+    ) -> None:
+        """A close paraphrase is served from the cache; a different question is not."""
+        mock_get_store.return_value = mock_store
+        mock_rerank.return_value = sample_retrieved_docs[:2]
+
+        first = retrieve_with_rerank.invoke({"query": "Tesla main competitors"})
+        second = retrieve_with_rerank.invoke({"query": "who competes with Tesla"})
+        retrieve_with_rerank.invoke({"query": "Ford battery plans"})
+
+        assert [d.page_content for d in second] == [d.page_content for d in first]
+        assert mock_store.similarity_search_by_vector_with_score.call_count == 2
+        assert mock_rerank.call_count == 2
+        assert get_result_cache().stats.hits == 1
+
+    @patch("retrieval.retriever.rerank_many")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retrieve_many_caches_per_query(
+        self,
+        mock_get_store: MagicMock,
+        mock_rerank_many: MagicMock,
+        mock_store: MagicMock,
+        sample_retrieved_docs: list[Document],
+    ) -> None:
+        """retrieve_many only searches and reranks the queries that miss."""
+        mock_get_store.return_value = mock_store
+        mock_rerank_many.side_effect = lambda queries, candidates, k: [
+            docs[:1] for docs in candidates
+        ]
+
+        retrieve_many(["Tesla main competitors"])
+        results = retrieve_many(["who competes with Tesla", "Ford battery plans"])
+
+        assert len(results) == 2
+        assert mock_store.similarity_search_by_vector_with_score.call_count == 2
+        assert mock_rerank_many.call_args.args[0] == ["Ford battery plans"]
+
+    @patch("retrieval.retriever.rerank")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_upsert_invalidates_namespace(
+        self,
+        mock_get_store: MagicMock,
+        mock_rerank: MagicMock,
+        mock_store: MagicMock,
+        sample_retrieved_docs: list[Document],
+    ) -> None:
+        """Writing to a namespace drops its cached results, not other namespaces'."""
+        from ingestion.upsert import _bump_namespace_version
+
+        mock_get_store.return_value = mock_store
+        mock_rerank.return_value = sample_retrieved_docs[:2]
+        query = {"query": "Tesla main competitors"}
+
+        retrieve_with_rerank.invoke({**query, "namespace": "filings"})
+        retrieve_with_rerank.invoke({**query, "namespace": "news"})
+        _bump_namespace_version("filings")
+        retrieve_with_rerank.invoke({**query, "namespace": "filings"})
+        retrieve_with_rerank.invoke({**query, "namespace": "news"})
+
+        assert mock_rerank.call_count == 3
+        assert get_result_cache().stats.invalidations == 1
+
+    @patch("retrieval.retriever.rerank")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_queries_differing_in_year_do_not_share_results(
+        self,
+        mock_get_store: MagicMock,
+        mock_rerank: MagicMock,
+        mock_store: MagicMock,
+        sample_retrieved_docs: list[Document],
+    ) -> None:
+        """Near-identical embeddings with different numbers are cache misses."""
+        mock_get_store.return_value = mock_store
+        mock_rerank.return_value = sample_retrieved_docs[:2]
+
+        retrieve_with_rerank.invoke({"query": "Apple revenue 2023"})
+        retrieve_with_rerank.invoke({"query": "Apple revenue 2022"})
+
+        assert mock_rerank.call_count == 2
+        assert get_result_cache().stats.hits == 0
+
+
+def test_result_cache_is_disabled_by_default() -> None:
+    assert get_result_cache() is None
+
+
+class TestRetrieveMany:
+    """Batched multi-query retrieval tests."""
+
+    @patch("retrieval.retriever.get_vector_store")
+    def test_retrieve_many_batches_embedding_and_rerank(
+        self, mock_get_store: MagicMock, sample_retrieved_docs: list[Document]
+    ) -> None:
+        """All queries share one embedding call and one cross-encoder batch."""
+        mock_store = MagicMock()
+        mock_store.embeddings.embed_query.side_effect = lambda q: [float(len(q))]
+        mock_store.similarity_search_by_vector_with_score.side_effect = [
+            [(d, 0.9) for d in sample_retrieved_docs[:2]],
+            [(sample_retrieved_docs[2], 0.9)],
+        ]
+        mock_get_store.return_value = mock_store
+
+        with patch("retrieval.retriever._get_reranker") as mock_get_reranker:
+            mock_get_reranker.return_value.compute_score.return_value = [0.2, 0.8, 0.6]
+            result = retrieve_many(["dogs", "birds"], retrieval_k=5, rerank_k=1)
+
+        mock_get_store.assert_called_once_with(namespace=None)
+        mock_get_reranker.return_value.compute_score.assert_called_once()
+        pairs = mock_get_reranker.return_value.compute_score.call_args.args[0]
+        assert len(pairs) == 3
+        assert [d.page_content for d in result[0]] == ["Cats enjoy independence."]
+        assert [d.page_content for d in result[1]] == ["Birds can sing melodies."]
+
+    def test_retrieve_many_empty_query_raises(self) -> None:
+        """Any empty query raises ValueError."""
+        with pytest.raises(ValueError, match="Query cannot be empty"):
+            retrieve_many(["ok", " "])
+
+    @patch("retrieval.retriever._get_reranker")
+    def test_rerank_many_splits_scores_per_query(
+        self, mock_get_reranker: MagicMock, sample_retrieved_docs: list[Document]
+    ) -> None:
+        """Scores from one batch are mapped back to each query's candidates."""
+        mock_get_reranker.return_value.compute_score.return_value = [0.1, 0.9, 0.7]
+
+        result = rerank_many(
+            ["a", "b"], [sample_retrieved_docs[:1], sample_retrieved_docs[1:]], k=3
+        )
+
+        assert [d.page_content for d in result[0]] == ["Dogs are loyal companions."]
+        assert [d.page_content for d in result[1]] == [
+            "Cats enjoy independence.",
+            "Birds can sing melodies.",
+        ]
+
+    @patch("retrieval.retriever.retrieve_many")
+    def test_retrieve_with_rerank_batch_groups_inputs(self, mock_many: MagicMock) -> None:
+        """.batch() groups inputs by arguments and preserves input order."""
+        mock_many.side_effect = lambda queries, **kw: [[Document(page_content=q)] for q in queries]
+
+        result = retrieve_with_rerank.batch(
+            [{"query": "a"}, {"query": "b", "namespace": "ns"}, {"query": "c"}]
+        )
+
+        assert [r[0].page_content for r in result] == ["a", "b", "c"]
+        assert mock_many.call_count == 2
+
+
+class TestRerankerBackend:
+    """Reranker backend selection."""
+
+    def test_onnx_backend_uses_onnx_reranker(self) -> None:
+        """settings.reranker_backend='onnx' loads the ONNX Runtime reranker."""
+        with (
+            patch("retrieval.retriever.settings.reranker_backend", "onnx"),
+            patch("retrieval.retriever.OnnxReranker") as mock_onnx,
+            patch("retrieval.retriever.FlagReranker") as mock_flag,
+        ):
+            mock_onnx.return_value.compute_score.return_value = [0.7]
+            result = rerank("q", [Document(page_content="x", metadata={})])
+
+        mock_onnx.assert_called_once()
+        mock_flag.assert_not_called()
+        assert result[0].metadata["rerank_score"] == 0.7
+
+    def test_unknown_backend_raises(self) -> None:
+        """Unsupported backend names raise ValueError."""
+        with patch("retrieval.retriever.settings.reranker_backend", "tensorrt"):
+            with pytest.raises(ValueError, match="Unknown reranker backend"):
+                rerank("q", [Document(page_content="x", metadata={})])
+
+
+def _async_clients(matches: list[dict]) -> tuple[MagicMock, MagicMock]:
+    """Mock (PineconeAsyncio, IndexAsyncio) pair returning the given matches."""
+    client = MagicMock()
+    client.inference.embed = AsyncMock(side_effect=lambda model, inputs, parameters: [
+        {"values": [float(len(q))]} for q in inputs
+    ])
+    index = MagicMock()
+    index.query = AsyncMock(return_value={"matches": matches})
+    return client, index
+
+
+class TestAsyncRetrieval:
+    """Async retrieval path (aretriever / aretrieve_with_rerank / ainvoke / abatch)."""
+
+    @patch("retrieval.retriever.get_vector_store")
+    @patch("retrieval.retriever.get_async_clients")
+    async def test_aretriever_queries_async_index(
+        self, mock_clients: MagicMock, mock_get_store: MagicMock
+    ) -> None:
+        mock_store = MagicMock()
+        mock_store.embeddings.aembed_query = AsyncMock(return_value=[0.4])
+        mock_get_store.return_value = mock_store
+        client, index = _async_clients(
+            [{"id": "a", "score": 0.8, "metadata": {"text": "Dogs.", "source": "pets"}}]
+        )
+        mock_clients.return_value = (client, index)
+
+        result = await aretriever("dogs", k=5, namespace="ns")
+
+        index.query.assert_awaited_once_with(
+            vector=[0.4], top_k=5, include_metadata=True, namespace="ns"
+        )
+        assert result[0].page_content == "Dogs."
+        assert result[0].metadata == {"source": "pets", "vector_score": 0.8}
+
+    @patch("retrieval.retriever.get_vector_store")
+    @patch("retrieval.retriever.get_async_clients")
+    async def test_aretriever_pushes_metadata_filter(
+        self, mock_clients: MagicMock, mock_get_store: MagicMock
+    ) -> None:
+        mock_store = MagicMock()
+        mock_store.embeddings.aembed_query = AsyncMock(return_value=[0.4])
+        mock_get_store.return_value = mock_store
+        client, index = _async_clients([])
+        mock_clients.return_value = (client, index)
+
+        await aretriever("dogs", k=5, filter={"source": "pets", "date_to": "2024-06-30"})
+
+        index.query.assert_awaited_once_with(
+            vector=[0.4],
+            top_k=5,
+            include_metadata=True,
+            namespace=None,
+            filter={"source": {"$eq": "pets"}, "doc_date": {"$lte": 20240630}},
+        )
+
+    @patch("retrieval.retriever._get_reranker")
+    @patch("retrieval.retriever.get_vector_store")
+    @patch("retrieval.retriever.get_async_clients")
+    async def test_aretrieve_with_rerank_and_ainvoke(
+        self, mock_clients: MagicMock, mock_get_store: MagicMock, mock_get_reranker: MagicMock
+    ) -> None:
+        mock_store = MagicMock()
+        mock_store.embeddings.aembed_query = AsyncMock(return_value=[0.1])
+        mock_get_store.return_value = mock_store
+        mock_clients.return_value = _async_clients(
+            [
+                {"id": "a", "score": 0.9, "metadata": {"text": "Cats."}},
+                {"id": "b", "score": 0.8, "metadata": {"text": "Birds."}},
+            ]
+        )
+        mock_get_reranker.return_value.compute_score.return_value = [0.2, 0.7]
+
+        direct = await aretrieve_with_rerank("pets", rerank_k=1)
+        via_chain = await retrieve_with_rerank.ainvoke({"query": "pets", "rerank_k": 1})
+
+        assert [d.page_content for d in direct] == ["Birds."]
+        assert [d.page_content for d in via_chain] == ["Birds."]
+
+    @patch("retrieval.retriever.aretrieve_many")
+    async def test_abatch_groups_inputs(self, mock_many: AsyncMock) -> None:
+        mock_many.side_effect = lambda queries, **kw: [[Document(page_content=q)] for q in queries]
+
+        result = await retrieve_with_rerank.abatch([{"query": "a"}, {"query": "b", "rerank_k": 1}])
+
+        assert [r[0].page_content for r in result] == ["a", "b"]
+
+    async def test_aretriever_empty_query_raises(self) -> None:
+        with pytest.raises(ValueError, match="Query cannot be empty"):
+            await aretriever(" ")
+
+
+class TestWarmUp:
+    """Startup warm-up."""
+
+    @patch("retrieval.retriever._get_reranker")
+    @patch("retrieval.retriever.get_vector_store")
+    def test_warm_up_loads_index_and_runs_dummy_inference(
+        self, mock_get_store: MagicMock, mock_get_reranker: MagicMock
+    ) -> None:
+        mock_get_reranker.return_value.compute_score.return_value = 0.5
+
+        warm_up()
+
+        mock_get_store.return_value.index.describe_index_stats.assert_called_once()
+        mock_get_reranker.return_value.compute_score.assert_called_once()
+
+
 class TestResetRetrieverCache:
     """Cache reset tests."""
 
@@ -222,3 +819,52 @@ class TestResetRetrieverCache:
 
         mock_cls2.assert_called_once()
         assert result[0].page_content == "y"
+
+
+def test_query_embedding_bypasses_ingestion_passage_cache(tmp_path) -> None:
+    """Queries are embedded in one batched request by the model under CachedEmbeddings."""
+    from langchain_pinecone import PineconeEmbeddings
+
+    from ingestion.embedding_cache import CachedEmbeddings, EmbeddingCache
+    from retrieval.retriever import _embed_uncached
+
+    model = MagicMock(spec=PineconeEmbeddings)
+    model.model, model.query_params = "m", {"input_type": "query"}
+    model._embed_texts.return_value = [{"values": [0.1]}, {"values": [0.2]}]
+    store = MagicMock()
+    store.embeddings = CachedEmbeddings(model, EmbeddingCache(tmp_path / "c.sqlite", 10), "m", 1)
+
+    assert _embed_uncached(store, ["q1", "q2"]) == [[0.1], [0.2]]
+    model._embed_texts.assert_called_once()
+    model.embed_documents.assert_not_called()
+
+
+@patch("ingestion.upsert._get_pinecone_index", side_effect=AssertionError("index resolved"))
+@patch("retrieval.retriever._get_reranker")
+@patch("retrieval.retriever.get_vector_store")
+async def test_async_local_backend_never_resolves_the_pinecone_index(
+    mock_get_store: MagicMock,
+    mock_get_reranker: MagicMock,
+    mock_index: MagicMock,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """With vector_backend="local", async queries embed without the Pinecone index."""
+    from langchain_pinecone import PineconeEmbeddings
+
+    monkeypatch.setattr(settings, "vector_backend", "local")
+    model = MagicMock(spec=PineconeEmbeddings)
+    model.model, model.query_params = "m", {"input_type": "query"}
+    model._embed_texts.return_value = [{"values": [0.3]}]
+    store = MagicMock()
+    store.embeddings = model
+    store.similarity_search_by_vector_with_score.return_value = [
+        (Document(page_content="Local hit."), 0.9)
+    ]
+    mock_get_store.return_value = store
+    mock_get_reranker.return_value.compute_score.return_value = [0.5]
+
+    result = await aretrieve_with_rerank("local query", rerank_k=1)
+
+    assert [d.page_content for d in result] == ["Local hit."]
+    model._embed_texts.assert_called_once()
+    mock_index.assert_not_called()
@@ -0,0 +1,122 @@
+"""Tests for the local BM25 sparse index."""
+
+from unittest.mock import patch
+
+import numpy as np
+from langchain_core.documents import Document
+
+from ingestion.sparse import SparseIndex, tokenize
+
+
+def _docs(*texts: str) -> list[Document]:
+    return [Document(page_content=t, metadata={"source": f"doc-{i}"}) for i, t in enumerate(texts)]
+
+
+class TestSparseIndex:
+    """BM25 scoring, persistence and segment handling."""
+
+    def test_exact_terms_rank_first(self, tmp_path) -> None:
+        index = SparseIndex(tmp_path / "ns")
+        index.add(
+            ["a", "b", "c"],
+            _docs(
+                "Adjusted EBITDA 2024 was $16.6 billion.",
+                "Revenue grew in 2024 across all segments.",
+                "The energy storage segment expanded deployments.",
+            ),
+        )
+
+        results = index.search("EBITDA 2024", k=2)
+
+        assert [d.id for d, _ in results] == ["a", "b"]
+        assert results[0][1] > results[1][1] > 0
+        assert results[0][0].metadata == {"source": "doc-0"}
+
+    def test_scores_match_textbook_bm25(self, tmp_path) -> None:
+        texts = ["tesla tesla revenue", "ford revenue", "gm trucks"]
+        index = SparseIndex(tmp_path / "ns", k1=1.2, b=0.75)
+        index.add(["a", "b", "c"], _docs(*texts))
+
+        (doc, score), = index.search("tesla", k=1)
+
+        n, df, tf, dl, avgdl = 3, 1, 2, 3, 7 / 3
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        expected = idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * dl / avgdl))
+        assert doc.id == "a"
+        assert np.isclose(score, expected, rtol=1e-5)
+
+    def test_index_persists_across_instances(self, tmp_path) -> None:
+        SparseIndex(tmp_path / "ns").add(["a"], _docs("Cybertruck deliveries"))
+
+        reopened = SparseIndex(tmp_path / "ns")
+
+        assert len(reopened) == 1
+        assert reopened.search("cybertruck", k=5)[0][0].page_content == "Cybertruck deliveries"
+
+    def test_segments_are_compacted(self, tmp_path) -> None:
+        index = SparseIndex(tmp_path / "ns")
+        with patch("ingestion.sparse.settings.sparse_max_segments", 2):
+            for i in range(3):
+                index.add([f"id-{i}"], _docs(f"filing number {i}"))
+
+        assert index.num_segments == 2
+        assert len(index) == 3
+        assert len(list((tmp_path / "ns").glob("seg-*"))) == 2
+        assert {d.id for d, _ in index.search("filing", k=5)} == {"id-0", "id-1", "id-2"}
+
+    def test_compaction_merges_small_segments_and_keeps_scores(self, tmp_path) -> None:
+        texts = [f"filing {i} revenue" if i % 3 else f"filing {i} margins outlook" for i in range(12)]
+        ids = [f"id-{i}" for i in range(12)]
+        reference = SparseIndex(tmp_path / "reference")
+        reference.add(ids, _docs(*texts))
+
+        index = SparseIndex(tmp_path / "ns")
+        with patch("ingestion.sparse.settings.sparse_max_segments", 4):
+            index.add(ids[:6], _docs(*texts[:6]))
+            large = index._segments[0].path
+            for i in range(6, 12):
+                index.add([ids[i]], _docs(texts[i]))
+
+        assert index.num_segments <= 4
+        assert large.is_dir()  # the big segment was never rewritten
+        assert len(index) == 12
+        expected = [(d.id, round(s, 5)) for d, s in reference.search("margins filing", k=12)]
+        actual = [(d.id, round(s, 5)) for d, s in index.search("margins filing", k=12)]
+        assert sorted(actual) == sorted(expected)
+        reopened = SparseIndex(tmp_path / "ns")
+        assert {d.page_content for d, _ in reopened.search("outlook", k=12)} == {
+            texts[i] for i in (0, 3, 6, 9)
+        }
+
+    def test_compaction_closes_merged_segments_after_searches_finish(self, tmp_path) -> None:
+        index = SparseIndex(tmp_path / "ns")
+        with patch("ingestion.sparse.settings.sparse_max_segments", 2):
+            index.add(["a"], _docs("tesla margins"))
+            index.add(["b"], _docs("tesla outlook"))
+            first, second = index._segments
+            in_flight = index._acquire()  # a search still reading both segments
+            index.add(["c"], _docs("tesla revenue"))
+
+        assert first.retired and second.retired
+        assert not first._docs_file.closed
+        index._release(in_flight)
+        assert first._docs_file.closed and second._docs_file.closed
+        assert {d.id for d, _ in index.search("tesla", k=5)} == {"a", "b", "c"}
+
+    def test_predicate_filters_by_metadata(self, tmp_path) -> None:
+        index = SparseIndex(tmp_path / "ns")
+        index.add(["a", "b"], _docs("tesla margins", "tesla margins outlook"))
+
+        results = index.search("tesla", k=5, predicate=lambda m: m["source"] == "doc-1")
+
+        assert [d.id for d, _ in results] == ["b"]
+
+    def test_unknown_terms_and_empty_index(self, tmp_path) -> None:
+        index = SparseIndex(tmp_path / "ns")
+        assert index.search("anything", k=5) == []
+        index.add(["a"], _docs("some text"))
+        assert index.search("zzz", k=5) == []
+
+
+def test_tokenize_keeps_tickers_and_years() -> None:
+    assert tokenize("TSLA: EBITDA (2024) up 5%") == ["tsla", "ebitda", "2024", "up", "5"]
@@ -0,0 +1,137 @@
+"""Tests for adaptive batch sizing, pacing and retries."""
+
+import pytest
+
+from ingestion.throttle import BatchController, TokenBucket, is_retryable, retry_after
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ProviderError(Exception):
+    def __init__(self, status: int, headers: dict[str, str] | None = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.headers = headers or {}
+
+
+def controller(clock: FakeClock, **options) -> BatchController:
+    return BatchController("test", clock=clock, sleep=clock.sleep, **(dict(max_items=8) | options))
+
+
+def test_batches_are_cut_by_items_and_bytes() -> None:
+    control = BatchController("test", max_items=3, max_bytes=100)
+
+    assert control.next_batch_len([10] * 10, 0) == 3
+    assert control.next_batch_len([10] * 10, 9) == 1
+    assert control.next_batch_len([60, 60, 10], 0) == 1
+    # An item larger than the byte cap still goes out on its own
+    assert control.next_batch_len([500, 10], 0) == 1
+
+
+def test_too_large_batch_is_split_and_results_concatenated() -> None:
+    clock = FakeClock()
+    control = controller(clock)
+    calls = []
+
+    def send(batch):
+        calls.append(list(batch))
+        if len(batch) > 2:
+            raise ProviderError(413)
+        return [x * 10 for x in batch]
+
+    assert control.call(send, [1, 2, 3, 4]) == [10, 20, 30, 40]
+    assert calls == [[1, 2, 3, 4], [1, 2], [3, 4]]
+    assert control.size < 8
+
+
+def test_rate_limit_retries_only_the_failed_batch_after_retry_after() -> None:
+    clock = FakeClock()
+    control = controller(clock, limiter=TokenBucket(10, clock=clock, sleep=clock.sleep))
+    responses = [ProviderError(429, {"Retry-After": "3"}), "ok"]
+    calls = []
+
+    def send(batch):
+        calls.append(batch)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    assert control.call(send, ["a", "b"]) == "ok"
+    assert calls == [["a", "b"], ["a", "b"]]
+    assert sum(clock.sleeps) >= 3
+    assert control.retries == 1
+    assert control.size < 8
+    assert control.limiter.rate < 10
+
+
+def test_non_retryable_error_is_raised_at_once() -> None:
+    clock = FakeClock()
+    control = controller(clock)
+    calls = []
+
+    def send(batch):
+        calls.append(batch)
+        raise ProviderError(400)
+
+    with pytest.raises(ProviderError):
+        control.call(send, [1])
+    assert len(calls) == 1
+
+
+def test_retries_give_up_after_max_retries() -> None:
+    clock = FakeClock()
+    control = controller(clock, max_retries=2)
+
+    def send(batch):
+        raise ProviderError(503)
+
+    with pytest.raises(ProviderError):
+        control.call(send, [1])
+    assert control.retries == 2
+
+
+def test_slow_requests_shrink_batches_and_fast_ones_grow_them_back() -> None:
+    clock = FakeClock()
+    control = controller(clock, target_seconds=1.0)
+
+    def slow(batch):
+        clock.now += 2
+        return batch
+
+    control.call(slow, [1])
+    assert control.size == 4
+    control.call(lambda batch: batch, [1])
+    control.call(lambda batch: batch, [1])
+    assert control.size == 6
+
+
+def test_token_bucket_paces_requests() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(2, burst=1, clock=clock, sleep=clock.sleep)
+
+    for _ in range(3):
+        bucket.acquire()
+
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_error_classification() -> None:
+    assert is_retryable(ProviderError(429))
+    assert is_retryable(ProviderError(502))
+    assert is_retryable(ConnectionError())
+    assert not is_retryable(ProviderError(400))
+    assert not is_retryable(ValueError())
+    assert retry_after(ProviderError(429, {"retry-after": "1.5"})) == 1.5
+    assert retry_after(ProviderError(429)) is None
@@ -1,20 +1,57 @@
 """Tests for document upsert to Pinecone."""
 
-from unittest.mock import MagicMock, patch
+import asyncio
+import logging
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from ingestion import upsert_documents
-from ingestion.upsert import reset_upsert_cache
-from ingestion import upsert as upsert_mod
+from ingestion import (
+    document_metadata,
+    get_sparse_index,
+    get_vector_store,
+    get_vector_store_stats,
+    upsert_documents,
+    upsert_stream,
+)
+from ingestion.embedding_cache import CachedEmbeddings
+from ingestion.manifest import reset_chunk_manifest
+from ingestion.parents import get_parent_store
+from ingestion.upsert import (
+    VectorStorePool,
+    aclose_async_clients,
+    get_async_clients,
+    namespace_version,
+    reset_upsert_cache,
+)
 from langchain_core.documents import Document
 
 
+def fake_store() -> MagicMock:
+    """Mock PineconeVectorStore: one-dim embeddings, index.upsert records writes, index.fetch finds them."""
+    store = MagicMock()
+    store.embeddings.embed_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+    store.index.fetch.side_effect = lambda ids, namespace=None: SimpleNamespace(
+        vectors={d.id: d for d in upserted(store) if d.id in ids}
+    )
+    return store
+
+
+def upserted(store: MagicMock) -> list[Document]:
+    """Chunks written to the mock index (write order across upsert workers is not fixed)."""
+    return [
+        Document(id=i, page_content=meta["text"], metadata={k: v for k, v in meta.items() if k != "text"})
+        for call in store.index.upsert.call_args_list
+        for i, _, meta in call.kwargs["vectors"]
+    ]
+
+
 @pytest.fixture(autouse=True)
 def _reset_upsert_cache():
-    """Clear cached model/index/vector_store so each test gets fresh mocks."""
+    """Clear cached model/index/vector stores so each test gets fresh mocks."""
     reset_upsert_cache()
-    upsert_mod._vector_store = None
 
 
 class TestUpsertDocuments:
@@ -24,8 +61,7 @@ class TestUpsertDocuments:
     @patch("ingestion.upsert.Pinecone")
     @patch("ingestion.upsert.PineconeEmbeddings")
     def test_upsert_returns_ids(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, sample_documents):
-        mock_store = MagicMock()
-        mock_store.add_documents.return_value = ["id-1", "id-2", "id-3"]
+        mock_store = fake_store()
         mock_store_cls.return_value = mock_store
 
         mock_index = MagicMock()
@@ -34,17 +70,17 @@ class TestUpsertDocuments:
         ids = upsert_documents(sample_documents)
 
         mock_embeddings_cls.assert_called_once()
-        mock_store.add_documents.assert_called_once()
-        docs_passed = mock_store.add_documents.call_args.kwargs["documents"]
+        mock_store.index.upsert.assert_called_once()
+        docs_passed = upserted(mock_store)
         assert len(docs_passed) >= 2  # Chunked from 2 docs
-        assert ids == ["id-1", "id-2", "id-3"]
+        assert sorted(ids) == sorted(d.id for d in docs_passed)
+        assert upsert_documents(sample_documents) == ids  # ids are content hashes
 
     @patch("ingestion.upsert.PineconeVectorStore")
     @patch("ingestion.upsert.Pinecone")
     @patch("ingestion.upsert.PineconeEmbeddings")
     def test_upsert_chunks_documents(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, sample_documents):
-        mock_store = MagicMock()
-        mock_store.add_documents.return_value = []
+        mock_store = fake_store()
         mock_store_cls.return_value = mock_store
 
         mock_index = MagicMock()
@@ -52,7 +88,7 @@ class TestUpsertDocuments:
 
         upsert_documents(sample_documents, chunk_size=20, chunk_overlap=5)
 
-        docs_passed = mock_store.add_documents.call_args.kwargs["documents"]
+        docs_passed = upserted(mock_store)
         # With chunk_size=20, 2 short docs should produce multiple chunks
         assert len(docs_passed) > 2
         for doc in docs_passed:
@@ -60,12 +96,80 @@ class TestUpsertDocuments:
             assert doc.page_content
             assert "source" in doc.metadata
 
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_upsert_tags_chunks_with_metadata(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, sample_documents):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+
+        metadata = document_metadata(company="Acme  Corp", doc_type="10-K", doc_date="2024-12-31")
+        upsert_documents(sample_documents, metadata=metadata)
+
+        docs_passed = upserted(mock_store)
+        for doc in docs_passed:
+            assert doc.metadata["company"] == "acme corp"
+            assert doc.metadata["doc_type"] == "10-k"
+            assert doc.metadata["doc_date"] == 20241231
+            assert "source" in doc.metadata
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_upsert_stores_parents_and_indexes_compact_children(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+        page = Document(
+            page_content=("Revenue grew strongly. " * 10).strip(),
+            metadata={"source": "10k.pdf", "page": 4, "producer": "Acrobat", "total_pages": 90},
+        )
+
+        upsert_documents([page], chunk_size=60, chunk_overlap=0, metadata={"company": "acme"})
+
+        children = upserted(mock_store)
+        parent_id = children[0].metadata["parent_id"]
+        parent = get_parent_store().get_many([parent_id])[parent_id]
+        assert len(children) > 1
+        assert all(c.metadata == {"source": "10k.pdf", "page": 4, "company": "acme", "parent_id": parent_id} for c in children)
+        assert parent.page_content == page.page_content
+        assert parent.metadata["producer"] == "Acrobat"
+        assert parent.metadata["company"] == "acme"
+        assert "company" not in page.metadata  # caller's documents are not mutated
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_upsert_without_parent_store_indexes_full_metadata(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, monkeypatch):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+        monkeypatch.setattr("ingestion.parents.settings.parent_store_path", None)
+        page = Document(page_content="Revenue grew.", metadata={"source": "10k.pdf", "producer": "Acrobat"})
+
+        upsert_documents([page])
+
+        (chunk,) = upserted(mock_store)
+        assert chunk.metadata == {"source": "10k.pdf", "producer": "Acrobat"}
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_upsert_builds_sparse_index(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, sample_documents):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+
+        ids = upsert_documents(sample_documents, namespace="filings")
+
+        index = get_sparse_index("filings")
+        assert len(index) == 2
+        (doc, _), = index.search("loyalty", k=5)
+        assert doc.id == ids[0]
+        assert len(get_sparse_index()) == 0  # other namespaces untouched
+
     @patch("ingestion.upsert.PineconeVectorStore")
     @patch("ingestion.upsert.Pinecone")
     @patch("ingestion.upsert.PineconeEmbeddings")
     def test_upsert_uses_settings(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, sample_documents):
-        mock_store = MagicMock()
-        mock_store.add_documents.return_value = ["id-1"]
+        mock_store = fake_store()
         mock_store_cls.return_value = mock_store
 
         mock_index = MagicMock()
@@ -86,8 +190,7 @@ class TestUpsertDocuments:
     @patch("ingestion.upsert.PineconeEmbeddings")
     def test_upsert_with_namespace(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, sample_documents):
         """Upsert accepts namespace param and completes (namespace passed to get_vector_store when used)."""
-        mock_store = MagicMock()
-        mock_store.add_documents.return_value = ["id-1"]
+        mock_store = fake_store()
         mock_store_cls.return_value = mock_store
 
         mock_index = MagicMock()
@@ -95,23 +198,286 @@ class TestUpsertDocuments:
 
         ids = upsert_documents(sample_documents, namespace="test-ns")
 
-        mock_store.add_documents.assert_called_once()
-        assert ids == ["id-1"]
+        mock_store.index.upsert.assert_called_once()
+        assert mock_store_cls.call_args.kwargs["namespace"] == "test-ns"
+        assert mock_store.index.upsert.call_args.kwargs["namespace"] == "test-ns"
+        assert len(ids) == 2
 
     @patch("ingestion.upsert.PineconeVectorStore")
     @patch("ingestion.upsert.Pinecone")
     @patch("ingestion.upsert.PineconeEmbeddings")
     def test_upsert_single_document(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
         docs = [Document(page_content="Single doc.", metadata={"source": "single"})]
-        mock_store = MagicMock()
-        mock_store.add_documents.return_value = ["id-1"]
+        mock_store = fake_store()
         mock_store_cls.return_value = mock_store
 
         mock_index = MagicMock()
         mock_pinecone_cls.return_value.Index.return_value = mock_index
 
         ids = upsert_documents(docs)
-        assert ids == ["id-1"]
+        assert ids == [upserted(mock_store)[0].id]
+
+
+class TestIdempotentUpsert:
+    """Content-addressed chunk ids and the manifest skip path."""
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_reingest_embeds_only_new_chunks(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+        v1 = [Document(page_content="Revenue grew.", metadata={"source": "10k.pdf", "page": 0})]
+        v2 = v1 + [Document(page_content="Margins fell.", metadata={"source": "10k.pdf", "page": 1})]
+
+        first = upsert_documents(v1)
+        second = upsert_documents(v2)
+        third = upsert_documents(v2)
+
+        embed_calls = mock_store.embeddings.embed_documents.call_args_list
+        assert [c.args[0] for c in embed_calls] == [["Revenue grew."], ["Margins fell."]]
+        assert len(upserted(mock_store)) == 2
+        assert set(first) < set(second) == set(third)
+        assert len(get_sparse_index(None)) == 2
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_namespaces_are_tracked_separately(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+        docs = [Document(page_content="Revenue grew.", metadata={"source": "10k.pdf"})]
+
+        a = upsert_documents(docs, namespace="tenant-a")
+        b = upsert_documents(docs, namespace="tenant-b")
+
+        assert a == b
+        assert mock_store.embeddings.embed_documents.call_count == 2
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_fully_skipped_ingest_warns(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, caplog):
+        mock_store_cls.return_value = fake_store()
+        docs = [Document(page_content="Revenue grew.", metadata={"source": "10k.pdf"})]
+        upsert_documents(docs)
+
+        with caplog.at_level(logging.WARNING, logger="ingestion.upsert"):
+            upsert_documents(docs)
+
+        assert "already indexed" in caplog.text
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_rebuilt_index_is_reingested(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+        docs = [Document(page_content="Revenue grew.", metadata={"source": "10k.pdf"})]
+        upsert_documents(docs)
+        mock_store.index.upsert.reset_mock()  # vectors gone, manifest still lists them
+
+        ids = upsert_documents(docs)
+
+        assert [d.id for d in upserted(mock_store)] == ids
+        assert mock_store.embeddings.embed_documents.call_count == 2
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_other_index_does_not_inherit_manifest(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, monkeypatch):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+        docs = [Document(page_content="Revenue grew.", metadata={"source": "10k.pdf"})]
+        upsert_documents(docs)
+
+        monkeypatch.setattr("ingestion.manifest.settings.pinecone_index_name", "rebuilt")
+        reset_chunk_manifest()
+        mock_store.index.fetch.side_effect = None  # the new index must not even be asked
+        upsert_documents(docs)
+
+        assert mock_store.embeddings.embed_documents.call_count == 2
+        mock_store.index.fetch.assert_not_called()
+
+
+class TestEmbeddingCache:
+    """Stores embed passages through the persistent ingestion cache."""
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_store_embeds_passages_through_cache(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        get_vector_store()
+
+        embedding = mock_store_cls.call_args.kwargs["embedding"]
+        assert isinstance(embedding, CachedEmbeddings)
+        assert embedding.embeddings is mock_embeddings_cls.return_value
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_disabled_cache_uses_model_directly(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls, monkeypatch):
+        monkeypatch.setattr("ingestion.embedding_cache.settings.ingest_embedding_cache_path", None)
+
+        get_vector_store()
+
+        assert mock_store_cls.call_args.kwargs["embedding"] is mock_embeddings_cls.return_value
+
+
+class TestUpsertStream:
+    """Windowed streaming upsert (mocked embeddings and Pinecone)."""
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_upserts_fixed_size_windows_while_reading(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+        pages_read = []
+
+        def pages():
+            for n in range(4):
+                pages_read.append(n)
+                yield Document(page_content=f"Page {n} first part. Second part of page {n}.", metadata={"source": "10k.pdf", "page": n})
+
+        progress = []
+        ids = upsert_stream(pages(), window_size=3, chunk_size=25, chunk_overlap=0, on_progress=progress.append)
+
+        windows = [c.args[0] for c in mock_store.embeddings.embed_documents.call_args_list]
+        assert [len(w) for w in windows] == [3, 3, 2]
+        assert [(p.window, p.pages, p.chunks) for p in progress] == [(1, 2, 3), (2, 3, 6), (3, 4, 8)]
+        assert len(ids) == 8
+        assert all(c.metadata["parent_id"] for c in upserted(mock_store))
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_each_window_reaches_sparse_index_and_cache_version(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        mock_store = fake_store()
+        mock_store_cls.return_value = mock_store
+        docs = [Document(page_content=f"Revenue note {n}.", metadata={"source": "a.pdf"}) for n in range(2)]
+        before = namespace_version("tenant-a")
+
+        upsert_stream(iter(docs), window_size=1, namespace="tenant-a")
+
+        assert namespace_version("tenant-a") == before + 2
+        assert len(get_sparse_index("tenant-a")) == 2
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_empty_stream_upserts_nothing(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        assert upsert_stream(iter([])) == []
+        mock_store_cls.return_value.index.upsert.assert_not_called()
+
+
+class TestVectorStorePool:
+    """Namespace-keyed vector store pool."""
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_stores_are_keyed_by_namespace(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        mock_store_cls.side_effect = lambda **kwargs: MagicMock(namespace=kwargs.get("namespace"))
+
+        a = get_vector_store(namespace="tenant-a")
+        b = get_vector_store(namespace="tenant-b")
+
+        assert a is not b
+        assert get_vector_store(namespace="tenant-a") is a
+        # One embedding model and one index connection shared by all namespaces
+        mock_embeddings_cls.assert_called_once()
+        mock_pinecone_cls.assert_called_once()
+        stats = get_vector_store_stats()
+        assert (stats["tenant-a"].hits, stats["tenant-a"].misses) == (1, 1)
+
+    @patch("ingestion.upsert.PineconeVectorStore")
+    @patch("ingestion.upsert.Pinecone")
+    @patch("ingestion.upsert.PineconeEmbeddings")
+    def test_pool_evicts_least_recently_used(self, mock_embeddings_cls, mock_pinecone_cls, mock_store_cls):
+        mock_store_cls.side_effect = lambda **kwargs: MagicMock()
+        pool = VectorStorePool(maxsize=2)
+
+        first = pool.get("a")
+        pool.get("b")
+        pool.get("a")
+        pool.get("c")  # evicts "b"
+
+        assert len(pool) == 2
+        assert pool.get("a") is first
+        assert pool.stats()["b"].evictions == 1
+
+    @patch("ingestion.upsert._create_vector_store")
+    def test_evicted_and_cleared_stores_are_closed(self, mock_create):
+        mock_create.side_effect = lambda namespace: MagicMock(name=namespace)
+        pool = VectorStorePool(maxsize=1)
+
+        a = pool.get("a")
+        b = pool.get("b")  # evicts "a"
+
+        a.close.assert_called_once()
+        b.close.assert_not_called()
+        pool.clear()
+        b.close.assert_called_once()
+
+    @patch("ingestion.upsert._create_vector_store")
+    def test_store_is_created_outside_the_lock(self, mock_create):
+        pool = VectorStorePool(maxsize=4)
+        both_creating = threading.Barrier(3, timeout=5)
+        release = threading.Event()
+        created = []
+
+        def create(namespace):
+            if namespace == "slow":
+                both_creating.wait()
+                assert release.wait(timeout=5)
+            store = MagicMock(name=namespace)
+            created.append(store)
+            return store
+
+        mock_create.side_effect = create
+        results = []
+        slow = [threading.Thread(target=lambda: results.append(pool.get("slow"))) for _ in range(2)]
+        for thread in slow:
+            thread.start()
+        both_creating.wait()
+        # Not blocked behind the slow namespace's creation
+        fast = pool.get("fast")
+        release.set()
+        for thread in slow:
+            thread.join(timeout=5)
+
+        assert pool.get("fast") is fast
+        # Both threads built a store for "slow"; one is kept, the loser is closed
+        assert results[0] is results[1] is pool.get("slow")
+        (loser,) = [s for s in created if s not in (fast, results[0])]
+        loser.close.assert_called_once()
+
+
+class TestAsyncClients:
+    """Per-loop shared async Pinecone clients."""
+
+    @patch("ingestion.upsert.PineconeAsyncio")
+    @patch("ingestion.upsert._get_pinecone_index")
+    async def test_host_is_resolved_off_the_event_loop_once(self, mock_index, mock_client_cls):
+        loop_thread = threading.current_thread()
+        resolved_in = []
+
+        def resolve():
+            resolved_in.append(threading.current_thread())
+            return SimpleNamespace(config=SimpleNamespace(host="idx.example"))
+
+        mock_index.side_effect = resolve
+        client = mock_client_cls.return_value
+        client.IndexAsyncio.return_value = MagicMock(close=AsyncMock())
+        client.close = AsyncMock()
+
+        first, second = await asyncio.gather(get_async_clients(), get_async_clients())
+
+        assert first is second
+        assert resolved_in and loop_thread not in resolved_in
+        client.IndexAsyncio.assert_called_once_with(host="idx.example")
+        await aclose_async_clients()
 
 
 class TestUpsertErrors: